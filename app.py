@@ -5,6 +5,9 @@ import random
 import json
 from datetime import datetime
 import re
+from src.question_bank import get_question_bank
+from src.dedup import padded_paper, repeat_warning
+from src.topic_cache import get_topic_cache
 
 # Page configuration
 st.set_page_config(
@@ -422,7 +425,10 @@ SAMPLE_PAST_PAPERS = {
 }
 
 def extract_topics_from_text(text):
-    """Extract potential topics from uploaded/pasted text"""
+    """Extract potential topics from uploaded/pasted text (cached by content hash across sessions)"""
+    return get_topic_cache().get_or_extract(text, 'app-patterns-v1', None, lambda: _extract_topics_from_text(text))
+
+def _extract_topics_from_text(text):
     # Improved topic extraction with better pattern matching
     lines = text.split('\n')
     topics = []
@@ -471,10 +477,6 @@ def generate_questions_from_topics(topics, num_questions, question_types, subjec
     if not topics:
         return []
     
-    questions = []
-    questions_per_type = num_questions // len(question_types)
-    remaining = num_questions % len(question_types)
-    
     # Enhanced question templates for better context
     enhanced_templates = {
         "MCQ": [
@@ -507,69 +509,50 @@ def generate_questions_from_topics(topics, num_questions, question_types, subjec
         ]
     }
     
-    for qtype in question_types:
-        count = questions_per_type + (1 if remaining > 0 else 0)
-        remaining -= 1
+    def make_question(topic, qtype):
+        templates = enhanced_templates.get(qtype, [f"Describe {topic} in {subject}."])
+        question_text = random.choice(templates).format(topic=topic, subject=subject)
         
-        selected_topics = random.sample(topics, min(count, len(topics)))
-        if count > len(topics):
-            additional_needed = count - len(topics)
-            additional_topics = random.choices(topics, k=additional_needed)
-            selected_topics.extend(additional_topics)
+        marks_map = {"MCQ": 1, "Short Answer": 3, "Long Answer": 8, "Case Study": 10}
+        marks = marks_map.get(qtype, 5)
         
-        for topic in selected_topics[:count]:
-            templates = enhanced_templates.get(qtype, [f"Describe {topic} in {subject}."])
-            question_text = random.choice(templates).format(topic=topic, subject=subject)
-            
-            marks_map = {"MCQ": 1, "Short Answer": 3, "Long Answer": 8, "Case Study": 10}
-            marks = marks_map.get(qtype, 5)
-            
-            questions.append({
-                'question': question_text,
-                'type': qtype,
-                'topic': topic,
-                'marks': marks,
-                'bloom_level': random.choice(BLOOM_LEVELS)
-            })
+        return {
+            'question': question_text,
+            'type': qtype,
+            'topic': topic,
+            'marks': marks,
+            'bloom_level': random.choice(BLOOM_LEVELS)
+        }
     
-    return questions
+    return padded_paper(topics, num_questions, question_types, make_question)
 
 def generate_auto_questions(subject, num_questions, question_types):
     """Generate questions automatically from predefined syllabus"""
     topics = SYLLABUS_TOPICS.get(subject, [])
     if not topics:
         return []
+    bank = get_question_bank('app', QUESTION_TEMPLATES, SYLLABUS_TOPICS)
     
-    questions = []
-    questions_per_type = num_questions // len(question_types)
-    remaining = num_questions % len(question_types)
-    
-    for qtype in question_types:
-        count = questions_per_type + (1 if remaining > 0 else 0)
-        remaining -= 1
-        
-        selected_topics = random.sample(topics, min(count, len(topics)))
-        if count > len(topics):
-            additional_needed = count - len(topics)
-            additional_topics = random.choices(topics, k=additional_needed)
-            selected_topics.extend(additional_topics)
-        
-        for topic in selected_topics[:count]:
+    def make_question(topic, qtype):
+        entry = bank.sample(subject, topic, qtype)
+        if entry:
+            question_text = entry['question']
+        else:
             templates = QUESTION_TEMPLATES.get(qtype, [f"Describe {topic}."])
             question_text = random.choice(templates).format(topic=topic)
-            
-            marks_map = {"MCQ": 1, "Short Answer": 3, "Long Answer": 8, "Case Study": 10}
-            marks = marks_map.get(qtype, 5)
-            
-            questions.append({
-                'question': question_text,
-                'type': qtype,
-                'topic': topic,
-                'marks': marks,
-                'bloom_level': random.choice(BLOOM_LEVELS)
-            })
+        
+        marks_map = {"MCQ": 1, "Short Answer": 3, "Long Answer": 8, "Case Study": 10}
+        marks = marks_map.get(qtype, 5)
+        
+        return {
+            'question': question_text,
+            'type': qtype,
+            'topic': topic,
+            'marks': marks,
+            'bloom_level': random.choice(BLOOM_LEVELS)
+        }
     
-    return questions
+    return padded_paper(topics, num_questions, question_types, make_question)
 
 def analyze_questions(questions):
     """Analyze generated questions"""
@@ -792,6 +775,9 @@ def manual_creation_page():
                 analysis = analyze_questions(questions)
                 
                 st.success("✅ Questions generated successfully!")
+                warning = repeat_warning(questions)
+                if warning:
+                    st.warning(warning)
                 
                 st.markdown("## 📄 Generated Question Paper")
                 st.markdown(f"**{exam_title}**")
@@ -1182,6 +1168,9 @@ def auto_generation_page():
             analysis = analyze_questions(questions)
             
             st.success("✅ Question paper generated successfully!")
+            warning = repeat_warning(questions)
+            if warning:
+                st.warning(warning)
             
             st.markdown("## 📄 Generated Question Paper")
             st.markdown(f"**{exam_title}**")
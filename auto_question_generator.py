@@ -4,6 +4,8 @@ import plotly.express as px
 import random
 import json
 from datetime import datetime
+from src.question_bank import get_question_bank
+from src.dedup import padded_paper, repeat_warning
 
 # Page configuration
 st.set_page_config(
@@ -99,11 +101,15 @@ QUESTION_TEMPLATES = {
 # Bloom's taxonomy levels
 BLOOM_LEVELS = ["Remember", "Understand", "Apply", "Analyze", "Evaluate", "Create"]
 
-def generate_question(topic, question_type):
-    """Generate a question for a given topic and type"""
-    templates = QUESTION_TEMPLATES.get(question_type, [f"Describe {topic}."])
-    template = random.choice(templates)
-    question = template.format(topic=topic)
+def generate_question(topic, question_type, subject=None):
+    """Generate a question for a given topic and type (a bank lookup for syllabus topics)"""
+    bank = get_question_bank('auto_question_generator', QUESTION_TEMPLATES, SYLLABUS_TOPICS)
+    entry = bank.sample(subject, topic, question_type) if subject else None
+    if entry:
+        question = entry['question']
+    else:
+        templates = QUESTION_TEMPLATES.get(question_type, [f"Describe {topic}."])
+        question = random.choice(templates).format(topic=topic)
     
     # Assign marks based on question type
     marks_map = {
@@ -130,27 +136,8 @@ def generate_question_paper(subject, num_questions, question_types, difficulty="
     if not topics:
         return []
     
-    questions = []
-    questions_per_type = num_questions // len(question_types)
-    remaining = num_questions % len(question_types)
-    
-    for qtype in question_types:
-        count = questions_per_type + (1 if remaining > 0 else 0)
-        remaining -= 1
-        
-        # Select topics for this question type
-        selected_topics = random.sample(topics, min(count, len(topics)))
-        if count > len(topics):
-            # If we need more questions than topics, repeat some topics
-            additional_needed = count - len(topics)
-            additional_topics = random.choices(topics, k=additional_needed)
-            selected_topics.extend(additional_topics)
-        
-        for topic in selected_topics[:count]:
-            question = generate_question(topic, qtype)
-            questions.append(question)
-    
-    return questions
+    return padded_paper(topics, num_questions, question_types,
+                        lambda topic, qtype: generate_question(topic, qtype, subject))
 
 def analyze_questions(questions):
     """Analyze generated questions"""
@@ -236,6 +223,9 @@ def main():
             analysis = analyze_questions(questions)
             
             st.success("✅ Question paper generated successfully!")
+            warning = repeat_warning(questions)
+            if warning:
+                st.warning(warning)
             
             # Display generated paper
             st.markdown("## 📄 Generated Question Paper")
@@ -1,4 +1,3 @@
-<<<<<<< HEAD
 import streamlit as st
 import pandas as pd
 import numpy as np
@@ -6,6 +5,8 @@ from typing import List, Dict, Optional
 import os
 import tempfile
 from datetime import datetime
+from contextlib import nullcontext
+from concurrent.futures import TimeoutError as FuturesTimeoutError
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
@@ -16,6 +17,8 @@ from src.advanced_analyzer import AdvancedExamAnalyzer
 from src.advanced_generator import AdvancedQuestionGenerator
 from src.model_answer_generator import ModelAnswerGenerator
 from src.report_generator import ReportGenerator
+from src.singleflight import generation_flight, request_key
+from src.dedup import repeat_warning
 
 # Page configuration
 st.set_page_config(
@@ -327,39 +330,64 @@ def question_generation_page():
             topics = [line.strip() for line in syllabus_text.split('\n') if line.strip()]
             
             if topics:
-                with st.spinner("Generating question paper..."):
-                    # Prepare exam configuration
-                    exam_config = {
-                        'title': exam_title,
-                        'total_questions': total_questions,
-                        'total_marks': total_marks,
-                        'duration': duration,
-                        'question_types': question_types,
-                        'instructions': f"Answer all questions. Total marks: {total_marks}, Duration: {duration} minutes."
-                    }
-                    
-                    difficulty_dist = {
-                        'Easy': difficulty_distribution,
-                        'Medium': medium_percentage,
-                        'Hard': hard_percentage
-                    }
-                    
-                    # Generate question paper
-                    question_paper = st.session_state.generator.generate_question_paper(
-                        topics, exam_config, difficulty_dist
-                    )
-                    
-                    # Store in session state
-                    st.session_state.current_paper = question_paper
-                    
-                    st.success("Question paper generated successfully!")
-                    
-                    # Display generated paper
-                    display_generated_paper(question_paper)
+                # Prepare exam configuration
+                exam_config = {
+                    'title': exam_title,
+                    'total_questions': total_questions,
+                    'total_marks': total_marks,
+                    'duration': duration,
+                    'question_types': question_types,
+                    'instructions': f"Answer all questions. Total marks: {total_marks}, Duration: {duration} minutes."
+                }
+                
+                difficulty_dist = {
+                    'Easy': difficulty_distribution,
+                    'Medium': medium_percentage,
+                    'Hard': hard_percentage
+                }
+                
+                # Generate question paper, showing each question as soon as it is ready
+                generator = st.session_state.generator
+                
+                def generate_live():
+                    live = st.empty()
+                    questions = []
+                    with live.container():
+                        progress = st.progress(0.0, text="Generating question paper...")
+                        for question in generator.iter_question_paper(topics, exam_config, difficulty_dist):
+                            questions.append(question)
+                            progress.progress(len(questions) / total_questions,
+                                              text=f"Generated {len(questions)} of {total_questions} questions")
+                            st.markdown(f"**Q{len(questions)}** ({question['type']}, {question['marks']} marks): "
+                                        f"{question['question']}")
+                    live.empty()
+                    return generator.assemble_paper(questions, topics, exam_config)
+                
+                # Identical requests from other sessions share one generation
+                key = request_key('template', topics, exam_config, difficulty_dist)
+                waiting = st.spinner("An identical paper is already being generated; sharing it...") \
+                    if generation_flight.waiting(key) else nullcontext()
+                try:
+                    with waiting:
+                        question_paper = generation_flight.do(key, generate_live, timeout=60)
+                except FuturesTimeoutError:
+                    question_paper = generator.generate_question_paper(topics, exam_config, difficulty_dist)
+                
+                # Store in session state
+                st.session_state.current_paper = question_paper
+                
+                st.success("Question paper generated successfully!")
+                warning = repeat_warning(question_paper['questions'])
+                if warning:
+                    st.warning(warning)
             else:
                 st.error("No topics found in syllabus!")
         else:
             st.error("Please provide syllabus content!")
+    
+    # Shown from session state so the answer and export controls keep the paper across reruns
+    if 'current_paper' in st.session_state:
+        display_generated_paper(st.session_state.current_paper)
 
 def display_generated_paper(question_paper):
     """Display the generated question paper"""
@@ -380,9 +408,9 @@ def display_generated_paper(question_paper):
         with st.expander(f"Q{i} ({question['type']}, {question['bloom_level']}, {question['difficulty']}, {question['marks']} marks)"):
             st.write(f"**Question:** {question['question']}")
             
-            # Generate model answer
-            if st.button(f"Generate Answer for Q{i}", key=f"answer_{i}"):
-                model_answer = st.session_state.answer_generator.generate_model_answer(question)
+            # Model answers are generated on request and then kept on the paper
+            if 'model_answer' in question or st.button(f"Generate Answer for Q{i}", key=f"answer_{i}"):
+                model_answer = st.session_state.answer_generator.answer_for(question)
                 
                 st.markdown("**Model Answer:**")
                 st.write(model_answer['main_answer'])
@@ -414,12 +442,14 @@ def display_generated_paper(question_paper):
         # Export options
         st.subheader("📤 Export Options")
         
+        include_answers = st.checkbox("Include model answers", value=False)
         col1, col2, col3 = st.columns(3)
         
         with col1:
-            if st.button("📄 Export as Word"):
-                # Generate Word document
-                pass
+            # Answers are only generated (once, then kept on the paper) when they are included
+            st.download_button("📄 Export as Word", export_paper_to_docx(question_paper, include_answers),
+                               file_name='question_paper.docx',
+                               mime='application/vnd.openxmlformats-officedocument.wordprocessingml.document')
         
         with col2:
             if st.button("📊 Export as PDF"):
@@ -431,6 +461,23 @@ def display_generated_paper(question_paper):
                 # Generate comprehensive report
                 pass
 
+def export_paper_to_docx(question_paper, include_answers=False):
+    """The paper as Word document bytes, with the model answer under each question if requested"""
+    from io import BytesIO
+    from docx import Document
+    paper_info = question_paper.get('paper_info', {})
+    doc = Document()
+    doc.add_heading(paper_info.get('title', 'Question Paper'), 0)
+    doc.add_paragraph(f"Total Marks: {paper_info.get('total_marks', 0)}    Duration: {paper_info.get('duration', 0)} minutes")
+    answers = st.session_state.answer_generator.answer_key(question_paper) if include_answers else None
+    for i, question in enumerate(question_paper.get('questions', []), 1):
+        doc.add_paragraph(f"Q{i} ({question['type']}, {question['marks']} marks): {question['question']}")
+        if answers:
+            doc.add_paragraph(f"Model Answer: {answers[i - 1]['main_answer']}")
+    buffer = BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
 def analytics_dashboard_page():
     st.markdown('<h2 class="section-header">📈 Analytics Dashboard</h2>', unsafe_allow_html=True)
     
@@ -618,6 +665,3 @@ def display_report_summary(report):
 
 if __name__ == "__main__":
     main() 
-=======
-"import streamlit as st" 
->>>>>>> 35e755a853804fdb1232efc8ebde7c8921a69db5
@@ -12,7 +12,7 @@ import tempfile
 
 # Import existing modules
 from src.ingest import DocumentIngestor
-from src.generate import generate_questions, generate_model_answer, assign_marks, format_export_text, format_export_docx
+from src.generate import generate_questions, get_model_answer, assign_marks, format_export_text, format_export_docx
 from src.analyze import compute_analytics, compute_topic_frequency
 from src.classify import tag_questions_by_topic
 
@@ -449,9 +449,9 @@ def display_generated_paper(question_paper):
         with st.expander(f"Q{i} ({question['type']}, {question['bloom_level']}, {question['topic']}, {assign_marks(question)} marks)"):
             st.write(f"**Question:** {question['question']}")
             
-            # Generate model answer
-            if st.button(f"Generate Answer for Q{i}", key=f"answer_{i}"):
-                model_answer = generate_model_answer(question)
+            # Model answers are generated on request and then kept on the question
+            if 'model_answer' in question or st.button(f"Generate Answer for Q{i}", key=f"answer_{i}"):
+                model_answer = get_model_answer(question)
                 st.markdown("**Model Answer:**")
                 st.write(model_answer)
     
@@ -488,17 +488,18 @@ def display_generated_paper(question_paper):
     # Export options
     st.subheader("📤 Export Options")
     
+    include_answers = st.checkbox("Include model answers", value=False)
     col1, col2 = st.columns(2)
     
     with col1:
         if st.button("📄 Export as Text"):
-            export_text = format_export_text(questions)
+            export_text = format_export_text(questions, include_answers)
             st.download_button('Download as Text', export_text, file_name='question_paper.txt')
     
     with col2:
         if st.button("📊 Export as Word Document"):
             docx_filename = 'question_paper.docx'
-            format_export_docx(questions, docx_filename)
+            format_export_docx(questions, docx_filename, include_answers)
             with open(docx_filename, 'rb') as f:
                 st.download_button('Download as Word (.docx)', f, file_name=docx_filename)
 
@@ -6,6 +6,8 @@ import tempfile
 import random
 import json
 from datetime import datetime
+from src.question_bank import get_question_bank
+from src.dedup import deduplicate_questions, padded_paper, repeat_warning
 
 # Page configuration
 st.set_page_config(
@@ -455,6 +457,8 @@ QUESTION_TEMPLATES = {
 # Bloom's taxonomy levels
 BLOOM_LEVELS = ["Remember", "Understand", "Apply", "Analyze", "Evaluate", "Create"]
 
+MARKS_MAP = {"MCQ": 1, "Short Answer": 3, "Long Answer": 8, "Case Study": 10}
+
 def generate_questions(topics, num_questions, question_types):
     """Generate questions based on topics and parameters"""
     questions = []
@@ -489,6 +493,10 @@ def generate_questions(topics, num_questions, question_types):
                 'bloom_level': random.choice(BLOOM_LEVELS)
             })
     
+    # Repeated syllabus lines would repeat questions; redraw those slots from the same topic and type
+    questions = deduplicate_questions(
+        questions, lambda index, q: generate_questions([q['topic']], 1, [q['type']])[0], keep_repeats=True
+    )
     return questions[:num_questions]
 
 def generate_auto_questions(subject, num_questions, question_types, difficulty="Mixed"):
@@ -496,28 +504,21 @@ def generate_auto_questions(subject, num_questions, question_types, difficulty="
     topics = SYLLABUS_TOPICS.get(subject, [])
     if not topics:
         return []
+    bank = get_question_bank('simple_app', QUESTION_TEMPLATES, SYLLABUS_TOPICS)
     
-    questions = []
-    questions_per_type = num_questions // len(question_types)
-    remaining = num_questions % len(question_types)
-    
-    for qtype in question_types:
-        count = questions_per_type + (1 if remaining > 0 else 0)
-        remaining -= 1
-        
-        # Select topics for this question type
-        selected_topics = random.sample(topics, min(count, len(topics)))
-        if count > len(topics):
-            # If we need more questions than topics, repeat some topics
-            additional_needed = count - len(topics)
-            additional_topics = random.choices(topics, k=additional_needed)
-            selected_topics.extend(additional_topics)
-        
-        for topic in selected_topics[:count]:
-            question = generate_questions([topic], 1, [qtype])[0]
-            questions.append(question)
+    def make_question(topic, qtype):
+        entry = bank.sample(subject, topic, qtype)
+        if not entry:
+            return generate_questions([topic], 1, [qtype])[0]
+        return {
+            'question': entry['question'],
+            'type': qtype,
+            'topic': topic,
+            'marks': MARKS_MAP.get(qtype, 5),
+            'bloom_level': random.choice(BLOOM_LEVELS)
+        }
     
-    return questions
+    return padded_paper(topics, num_questions, question_types, make_question)
 
 def analyze_questions(questions):
     """Analyze generated questions"""
@@ -616,6 +617,9 @@ def question_creation_page():
                     )
                     
                     st.success("Question paper generated successfully!")
+                    warning = repeat_warning(questions)
+                    if warning:
+                        st.warning(warning)
                     
                     # Display generated paper
                     st.markdown("## 📄 Generated Question Paper")
@@ -844,6 +848,9 @@ def auto_generation_page():
             )
             
             st.success("✅ Question paper generated successfully!")
+            warning = repeat_warning(questions)
+            if warning:
+                st.warning(warning)
             
             # Display generated paper
             st.markdown("## 📄 Generated Question Paper")
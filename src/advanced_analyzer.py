@@ -12,6 +12,9 @@ import seaborn as sns
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
+
+from .likelihood_model import QuestionLikelihoodModel
+
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -21,6 +24,7 @@ class AdvancedExamAnalyzer:
         self.topic_weights = {}
         self.trend_analysis = {}
         self.prediction_model = None
+        self.modelled_papers = 0
         
     def add_question_paper(self, questions: List[Dict], paper_metadata: Dict = None):
         """Add a question paper to the analysis database"""
@@ -51,6 +55,7 @@ class AdvancedExamAnalyzer:
         return {
             'topic_frequency': dict(topic_frequency),
             'topic_weightage': topic_weightage,
+            'topic_marks': dict(topic_marks),
             'total_questions': len(all_topics),
             'unique_topics': len(set(all_topics))
         }
@@ -106,63 +111,23 @@ class AdvancedExamAnalyzer:
         return dict(year_data)
     
     def predict_likely_questions(self, syllabus_topics: List[str], num_predictions: int = 10) -> List[Dict]:
-        """Predict likely questions based on historical patterns"""
-        topic_analysis = self.analyze_topic_distribution()
-        type_analysis = self.analyze_question_types()
-        
-        predictions = []
-        
-        for topic in syllabus_topics:
-            # Calculate topic probability
-            topic_freq = topic_analysis['topic_frequency'].get(topic, 0)
-            total_questions = topic_analysis['total_questions']
-            topic_probability = (topic_freq / total_questions) * 100 if total_questions > 0 else 0
-            
-            # Get most common question types for this topic
-            topic_questions = []
-            for paper in self.question_database:
-                for q in paper['questions']:
-                    if q.get('topic', '').lower() == topic.lower():
-                        topic_questions.append(q)
-            
-            if topic_questions:
-                type_counts = Counter(q.get('type', 'Unknown') for q in topic_questions)
-                most_common_type = type_counts.most_common(1)[0][0] if type_counts else 'Short Answer'
-                
-                # Calculate confidence based on frequency and recency
-                confidence = min(95, topic_probability + 20)  # Base confidence
-                
-                predictions.append({
-                    'topic': topic,
-                    'question_type': most_common_type,
-                    'probability': topic_probability,
-                    'confidence': confidence,
-                    'historical_frequency': topic_freq,
-                    'recommended_marks': self._get_recommended_marks(most_common_type)
-                })
-        
-        # Sort by probability and return top predictions
-        predictions.sort(key=lambda x: x['probability'], reverse=True)
-        return predictions[:num_predictions]
+        """Predict likely questions with the question likelihood model (see QuestionLikelihoodModel)"""
+        return self.get_prediction_model().predict_likely_questions(syllabus_topics, num_predictions)
     
-    def _get_recommended_marks(self, question_type: str) -> int:
-        """Get recommended marks for a question type based on historical data"""
-        type_marks = []
-        for paper in self.question_database:
-            for q in paper['questions']:
-                if q.get('type') == question_type:
-                    type_marks.append(q.get('marks', 1))
-        
-        if type_marks:
-            return int(np.mean(type_marks))
-        else:
-            # Default marks
-            defaults = {'MCQ': 1, 'Short Answer': 3, 'Long Answer': 8, 'Case Study': 10}
-            return defaults.get(question_type, 2)
+    def get_prediction_model(self) -> QuestionLikelihoodModel:
+        """The likelihood model, trained on question_database and updated as papers are added"""
+        papers = self.question_database
+        if self.prediction_model is None or self.modelled_papers > len(papers):
+            self.prediction_model = QuestionLikelihoodModel().fit(papers)
+        elif self.modelled_papers < len(papers):
+            self.prediction_model.update(papers[self.modelled_papers:])
+        self.modelled_papers = len(papers)
+        return self.prediction_model
     
-    def identify_hot_topics(self, threshold_percentage: float = 10.0) -> List[Dict]:
+    def identify_hot_topics(self, threshold_percentage: float = 10.0, topic_analysis: Dict = None) -> List[Dict]:
         """Identify topics that appear frequently (hot topics)"""
-        topic_analysis = self.analyze_topic_distribution()
+        if topic_analysis is None:
+            topic_analysis = self.analyze_topic_distribution()
         hot_topics = []
         
         for topic, weightage in topic_analysis['topic_weightage'].items():
@@ -176,9 +141,10 @@ class AdvancedExamAnalyzer:
         
         return sorted(hot_topics, key=lambda x: x['weightage'], reverse=True)
     
-    def identify_declining_topics(self, years_back: int = 3) -> List[Dict]:
+    def identify_declining_topics(self, years_back: int = 3, temporal_data: Dict = None) -> List[Dict]:
         """Identify topics that are declining in frequency"""
-        temporal_data = self.analyze_temporal_trends(years_back)
+        if temporal_data is None:
+            temporal_data = self.analyze_temporal_trends(years_back)
         current_year = datetime.now().year
         
         # Get recent years data
@@ -213,12 +179,13 @@ class AdvancedExamAnalyzer:
     
     def generate_analytics_report(self) -> Dict:
         """Generate comprehensive analytics report"""
+        topic_analysis = self.analyze_topic_distribution()
         return {
-            'topic_analysis': self.analyze_topic_distribution(),
+            'topic_analysis': topic_analysis,
             'type_analysis': self.analyze_question_types(),
             'bloom_analysis': self.analyze_bloom_levels(),
             'temporal_trends': self.analyze_temporal_trends(),
-            'hot_topics': self.identify_hot_topics(),
+            'hot_topics': self.identify_hot_topics(topic_analysis=topic_analysis),
             'declining_topics': self.identify_declining_topics(),
             'total_papers_analyzed': len(self.question_database)
         }
@@ -1,15 +1,54 @@
 import random
 import json
-from typing import List, Dict, Tuple, Optional
-from collections import defaultdict
+from typing import List, Dict, Tuple, Optional, Iterator
+from collections import Counter, defaultdict
 import numpy as np
 from datetime import datetime
 
+from .template_engine import CompiledTemplate, compile_templates
+from .apportionment import apportion
+from .blueprint_solver import BlueprintSolver
+from .dedup import DuplicateFilter, count_repeats, deduplicate_questions
+
+def variant_label(index: int) -> str:
+    """Label sets A, B, ..., Z, AA, AB, ... from a zero-based index"""
+    label = ''
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        label = chr(ord('A') + remainder) + label
+    return label
+
 class AdvancedQuestionGenerator:
     def __init__(self):
         self.question_templates = self._load_question_templates()
         self.bloom_verbs = self._load_bloom_verbs()
         self.difficulty_markers = self._load_difficulty_markers()
+        self.bloom_levels_by_difficulty = {
+            'Easy': ['Remember', 'Understand'],
+            'Medium': ['Understand', 'Apply', 'Analyze'],
+            'Hard': ['Analyze', 'Evaluate', 'Create']
+        }
+        # Templates are parsed once; each render resolves only the placeholders it uses
+        self.compiled_templates = compile_templates(self.question_templates)
+        self.fallback_template = CompiledTemplate('Discuss {topic} in detail.')
+        self.placeholder_resolvers = {
+            'related_concept': self._get_related_concept,
+            'context': self._get_context,
+            'scenario': self._get_scenario,
+            'problem': self._get_problem,
+            'situation': self._get_situation,
+            'related_topic': self._get_related_topic,
+            'factor': self._get_factor,
+            'objective': self._get_objective,
+            'outcome': self._get_outcome,
+            'challenge': self._get_challenge,
+            'purpose': self._get_purpose,
+            'goal': self._get_goal
+        }
+        # Optional pre-rendered QuestionBank; see attach_question_bank
+        self.question_bank = None
+        self.bank_subject = ''
         
     def _load_question_templates(self) -> Dict:
         """Load question templates for different types and cognitive levels"""
@@ -191,15 +230,25 @@ class AdvancedQuestionGenerator:
                                syllabus_topics: List[str],
                                exam_config: Dict,
                                difficulty_distribution: Dict = None,
-                               topic_weightage: Dict = None) -> Dict:
+                               topic_weightage: Dict = None,
+                               seed: int = None,
+                               allow_repeats: bool = True) -> Dict:
         """
         Generate a comprehensive question paper based on syllabus and configuration
         
         Args:
             syllabus_topics: List of topics from syllabus
-            exam_config: Dictionary with exam parameters
-            difficulty_distribution: Distribution of difficulty levels
+            exam_config: Dictionary with exam parameters (near_duplicate_threshold
+                         also rejects reworded repeats, see DuplicateFilter)
+            difficulty_distribution: Share of each difficulty level (split into exact counts like the topic quotas)
             topic_weightage: Weightage for each topic
+            seed: Seed for a reproducible paper
+            allow_repeats: Fill a slot that cannot be made unique with a repeat marked
+                           'repeat': True (counted in paper_info['repeated_questions'])
+                           rather than failing
+        
+        Raises:
+            ValueError: If allow_repeats is off and a slot cannot be filled without repeating a question
         """
         
         # Default configurations
@@ -210,34 +259,280 @@ class AdvancedQuestionGenerator:
             # Equal weightage for all topics
             topic_weightage = {topic: 1.0 for topic in syllabus_topics}
         
-        # Calculate questions per topic based on weightage
-        total_weight = sum(topic_weightage.values())
-        topic_questions = {}
+        # Plan which (topic, type, difficulty) slot each question fills
+        slots = self._plan_paper(syllabus_topics, exam_config, topic_weightage, difficulty_distribution)
         
-        for topic, weight in topic_weightage.items():
-            topic_questions[topic] = int((weight / total_weight) * exam_config['total_questions'])
+        # Generate questions, redrawing only the slots that repeat an earlier question
+        rng = random.Random(seed) if seed is not None else random
+        all_questions = [self._generate_single_question(*slot, rng) for slot in slots]
+        seen = DuplicateFilter(exam_config.get('near_duplicate_threshold'))
+        all_questions = deduplicate_questions(
+            all_questions,
+            lambda index, q: self._generate_single_question(*slots[index], rng, seen),
+            seen,
+            keep_repeats=True
+        )
+        if not allow_repeats and count_repeats(all_questions):
+            raise ValueError("Not enough distinct questions for this syllabus and question count")
         
-        # Adjust for rounding errors
-        while sum(topic_questions.values()) < exam_config['total_questions']:
-            # Add remaining questions to topics with highest weightage
-            max_topic = max(topic_weightage.items(), key=lambda x: x[1])[0]
-            topic_questions[max_topic] += 1
+        for question_id, q in enumerate(all_questions, 1):
+            q['id'] = question_id
         
-        # Generate questions
-        all_questions = []
-        question_id = 1
+        return self._assemble_paper(all_questions, syllabus_topics, exam_config)
+    
+    def iter_question_paper(self,
+                            syllabus_topics: List[str],
+                            exam_config: Dict,
+                            difficulty_distribution: Dict = None,
+                            topic_weightage: Dict = None,
+                            seed: int = None,
+                            max_attempts: int = 20,
+                            allow_repeats: bool = True) -> Iterator[Dict]:
+        """
+        Yield the questions of a paper one at a time, as soon as each is generated
         
-        for topic, num_questions in topic_questions.items():
-            topic_questions_list = self._generate_topic_questions(
-                topic, num_questions, exam_config, difficulty_distribution
-            )
+        Takes the same arguments as generate_question_paper; pass the collected questions
+        to assemble_paper for the paper info and analysis.
+        
+        Raises:
+            ValueError: If allow_repeats is off and a slot cannot be filled without repeating a question
+        """
+        if difficulty_distribution is None:
+            difficulty_distribution = {'Easy': 0.3, 'Medium': 0.5, 'Hard': 0.2}
+        
+        if topic_weightage is None:
+            topic_weightage = {topic: 1.0 for topic in syllabus_topics}
+        
+        slots = self._plan_paper(syllabus_topics, exam_config, topic_weightage, difficulty_distribution)
+        rng = random.Random(seed) if seed is not None else random
+        seen = DuplicateFilter(exam_config.get('near_duplicate_threshold'))
+        
+        for question_id, (topic, qtype, difficulty) in enumerate(slots, 1):
+            for _ in range(max_attempts):
+                q = self._generate_single_question(topic, qtype, difficulty, rng, seen)
+                if not seen.is_duplicate(q['question']):
+                    break
+            else:
+                if not allow_repeats:
+                    raise ValueError(f"Not enough distinct {qtype} questions for '{topic}'")
+                q['repeat'] = True
+            seen.add(q['question'])
+            q['id'] = question_id
+            yield q
+    
+    def assemble_paper(self, questions: List[Dict], syllabus_topics: List[str], exam_config: Dict) -> Dict:
+        """Build the paper (info, questions and analysis) from questions collected from iter_question_paper"""
+        return self._assemble_paper(questions, syllabus_topics, exam_config)
+    
+    def generate_question_paper_variants(self,
+                                         syllabus_topics: List[str],
+                                         exam_config: Dict,
+                                         num_variants: int = None,
+                                         seeds: List[int] = None,
+                                         difficulty_distribution: Dict = None,
+                                         topic_weightage: Dict = None,
+                                         max_overlap: float = 0.2,
+                                         max_attempts: int = 50,
+                                         near_duplicate_threshold: float = None) -> List[Dict]:
+        """
+        Generate parallel sets (A/B/C...) of the same blueprint in one call
+        
+        Args:
+            syllabus_topics: List of topics from syllabus
+            exam_config: Dictionary with exam parameters
+            num_variants: Number of sets to generate (defaults to len(seeds))
+            seeds: Per-variant seeds; the same seeds reproduce the same sets
+            difficulty_distribution: Share of each difficulty level (split into exact counts like the topic quotas)
+            topic_weightage: Weightage for each topic
+            max_overlap: Maximum fraction of questions any two sets may share (0 makes the batch fully unique)
+            max_attempts: Redraws per question before the overlap limit is declared infeasible
+            near_duplicate_threshold: Also treat reworded questions as repeats (see DuplicateFilter)
+        
+        Questions never repeat within a set; sets are compared by normalised-text hash.
+        """
+        if seeds is None:
+            if num_variants is None:
+                raise ValueError("Either num_variants or seeds must be given")
+            seeds = [random.randrange(2 ** 32) for _ in range(num_variants)]
+        elif num_variants is not None and num_variants != len(seeds):
+            raise ValueError("num_variants must match the number of seeds")
+        
+        if difficulty_distribution is None:
+            difficulty_distribution = {'Easy': 0.3, 'Medium': 0.5, 'Hard': 0.2}
+        
+        if topic_weightage is None:
+            topic_weightage = {topic: 1.0 for topic in syllabus_topics}
+        
+        # Shared precomputation: quotas, type and difficulty split and slot order are identical for every set
+        slots = self._plan_paper(syllabus_topics, exam_config, topic_weightage, difficulty_distribution)
+        overlap_limit = int(max_overlap * len(slots))
+        
+        variants = []
+        batch_filter = DuplicateFilter(near_duplicate_threshold)
+        owners_by_fingerprint = defaultdict(set)  # question fingerprint -> indices of sets already using it
+        
+        for index, seed in enumerate(seeds):
+            rng = random.Random(seed)
+            shared = Counter()  # questions shared with each earlier set
+            paper_filter = DuplicateFilter(near_duplicate_threshold)
+            questions = []
             
-            for q in topic_questions_list:
+            for question_id, (topic, qtype, difficulty) in enumerate(slots, 1):
+                for _ in range(max_attempts):
+                    q = self._generate_single_question(topic, qtype, difficulty, rng, paper_filter)
+                    if paper_filter.is_duplicate(q['question']):
+                        continue
+                    owners = set()
+                    for fingerprint in batch_filter.matches(q['question']):
+                        owners |= owners_by_fingerprint[fingerprint]
+                    if all(shared[owner] < overlap_limit for owner in owners):
+                        break
+                else:
+                    raise ValueError(
+                        f"Cannot keep set overlap within {max_overlap:.0%}: "
+                        f"not enough distinct {qtype} questions for '{topic}'"
+                    )
+                for owner in owners:
+                    shared[owner] += 1
+                paper_filter.add(q['question'])
                 q['id'] = question_id
-                q['topic'] = topic
-                all_questions.append(q)
-                question_id += 1
+                questions.append(q)
+            
+            for q in questions:
+                owners_by_fingerprint[batch_filter.add(q['question'])].add(index)
+            
+            paper = self._assemble_paper(questions, syllabus_topics, exam_config)
+            paper['paper_info']['variant'] = variant_label(index)
+            paper['paper_info']['seed'] = seed
+            variants.append(paper)
         
+        return variants
+    
+    def attach_question_bank(self, bank, subject: str = ''):
+        """
+        Draw question texts from a pre-rendered QuestionBank instead of rendering them
+        
+        Args:
+            bank: QuestionBank built from self.question_templates (topics missing from it are rendered as usual)
+            subject: Subject the bank was synced under
+        """
+        self.question_bank = bank
+        self.bank_subject = subject
+    
+    def generate_blueprint_paper(self,
+                                 syllabus_topics,
+                                 blueprint: Dict,
+                                 seed: int = None,
+                                 per_combination: int = 2) -> Dict:
+        """
+        Generate a paper that meets a full exam blueprint in one solve
+        
+        Args:
+            syllabus_topics: List of topics, or a dict of unit -> topics for per-unit mark bands
+            blueprint: Blueprint for BlueprintSolver (total marks, sections, unit bands, Bloom/difficulty mix)
+            seed: Seed for the candidate pool and the solver's choice among feasible papers
+            per_combination: Candidates rendered per (topic, type, Bloom, difficulty) combination
+        """
+        if isinstance(syllabus_topics, dict):
+            units = syllabus_topics
+        else:
+            units = {topic: [topic] for topic in syllabus_topics}
+        
+        question_types = []
+        for section in blueprint.get('sections', []):
+            question_types.extend(t for t in section.get('question_types', []) if t not in question_types)
+        if not question_types:
+            question_types = blueprint.get('question_types', list(self.question_templates.keys()))
+        
+        rng = random.Random(seed)
+        candidates = self.generate_candidate_pool(units, question_types, per_combination, rng)
+        selected = BlueprintSolver().solve(candidates, blueprint, seed=seed)
+        
+        for question_id, q in enumerate(selected, 1):
+            q['id'] = question_id
+        
+        all_topics = [topic for topics in units.values() for topic in topics]
+        paper = self._assemble_paper(selected, all_topics, blueprint)
+        paper['paper_info']['sections'] = [s.get('name') for s in blueprint.get('sections', [])]
+        return paper
+    
+    def generate_candidate_pool(self, units: Dict, question_types: List[str], per_combination: int = 2, rng=random) -> List[Dict]:
+        """
+        Render candidates for every unit topic, type, difficulty and matching Bloom level
+        
+        Renders that repeat a text already in the pool are dropped (a few extra draws make up
+        for them), so a combination with few distinct templates yields fewer candidates.
+        """
+        candidates = []
+        seen = DuplicateFilter()
+        for unit, topics in units.items():
+            for topic in topics:
+                for qtype in question_types:
+                    for difficulty, levels in self.bloom_levels_by_difficulty.items():
+                        for bloom_level in levels:
+                            kept = 0
+                            for _ in range(per_combination * 3):
+                                if kept == per_combination:
+                                    break
+                                text = self._generate_question_text(topic, qtype, bloom_level, difficulty, rng)
+                                if text in seen:
+                                    continue
+                                seen.add(text)
+                                kept += 1
+                                candidates.append({
+                                    'question': text,
+                                    'type': qtype,
+                                    'bloom_level': bloom_level,
+                                    'difficulty': difficulty,
+                                    'marks': self._assign_marks(qtype, difficulty, bloom_level),
+                                    'topic': topic,
+                                    'unit': unit
+                                })
+        return candidates
+    
+    def _plan_paper(self, syllabus_topics: List[str], exam_config: Dict, topic_weightage: Dict,
+                    difficulty_distribution: Dict) -> List[Tuple[str, str, str]]:
+        """Work out the (topic, question type, difficulty) of every question in paper order"""
+        # Calculate questions per topic based on weightage (exact largest-remainder split)
+        topic_questions = apportion(
+            exam_config['total_questions'],
+            topic_weightage,
+            minimums=exam_config.get('min_questions_per_topic'),
+            maximums=exam_config.get('max_questions_per_topic')
+        )
+        
+        question_types = exam_config.get('question_types', ['MCQ', 'Short Answer', 'Long Answer'])
+        slots = []
+        
+        for topic, num_questions in topic_questions.items():
+            # Distribute questions across types
+            type_distribution = self._calculate_type_distribution(num_questions, question_types)
+            for qtype, count in type_distribution.items():
+                slots.extend([(topic, qtype)] * count)
+        
+        # Exact difficulty counts for the whole paper, spread evenly within each question type
+        difficulty_counts = apportion(len(slots), {level: max(0.0, weight) for level, weight
+                                                   in difficulty_distribution.items()})
+        by_type = sorted(range(len(slots)), key=lambda i: question_types.index(slots[i][1]))
+        difficulties = [None] * len(slots)
+        for index, difficulty in zip(by_type, self._interleave(difficulty_counts)):
+            difficulties[index] = difficulty
+        
+        return [(topic, qtype, difficulty) for (topic, qtype), difficulty in zip(slots, difficulties)]
+    
+    def _interleave(self, counts: Dict[str, int]) -> List[str]:
+        """Each label exactly counts[label] times, every prefix as close to the overall mix as possible"""
+        total = sum(counts.values())
+        placed = Counter()
+        order = []
+        for position in range(1, total + 1):
+            label = max(counts, key=lambda l: counts[l] * position / total - placed[l])
+            placed[label] += 1
+            order.append(label)
+        return order
+    
+    def _assemble_paper(self, all_questions: List[Dict], syllabus_topics: List[str], exam_config: Dict) -> Dict:
+        """Wrap generated questions with paper info and analysis"""
         # Calculate total marks
         total_marks = sum(q['marks'] for q in all_questions)
         
@@ -248,48 +543,39 @@ class AdvancedQuestionGenerator:
                 'total_marks': total_marks,
                 'duration': exam_config.get('duration', 180),
                 'instructions': exam_config.get('instructions', ''),
+                'repeated_questions': count_repeats(all_questions),
                 'generated_at': datetime.now().isoformat()
             },
             'questions': all_questions,
             'analysis': self._analyze_generated_paper(all_questions, syllabus_topics)
         }
     
-    def _generate_topic_questions(self, 
-                                 topic: str, 
-                                 num_questions: int, 
-                                 exam_config: Dict,
-                                 difficulty_distribution: Dict) -> List[Dict]:
-        """Generate questions for a specific topic"""
-        questions = []
-        question_types = exam_config.get('question_types', ['MCQ', 'Short Answer', 'Long Answer'])
+    def _generate_single_question(self, topic: str, qtype: str, difficulty: str, rng=random,
+                                  used=None) -> Dict:
+        """Generate one question for a planned slot (used: texts the bank should not hand out again)"""
+        # Select cognitive level
+        bloom_level = self._select_bloom_level(qtype, difficulty, rng)
+        
+        # Generate question (a bank lookup when one is attached, rendered live once its stratum is used up)
+        entry = None
+        if self.question_bank is not None:
+            entry = self.question_bank.sample(self.bank_subject, topic, qtype, bloom_level, difficulty, rng, used)
+        if entry:
+            question_text = entry['question']
+        else:
+            question_text = self._generate_question_text(topic, qtype, bloom_level, difficulty, rng)
+        
+        # Assign marks
+        marks = self._assign_marks(qtype, difficulty, bloom_level)
         
-        # Distribute questions across types
-        type_distribution = self._calculate_type_distribution(num_questions, question_types)
-        
-        for qtype, count in type_distribution.items():
-            for _ in range(count):
-                # Select difficulty level based on distribution
-                difficulty = self._select_difficulty(difficulty_distribution)
-                
-                # Select cognitive level
-                bloom_level = self._select_bloom_level(qtype, difficulty)
-                
-                # Generate question
-                question_text = self._generate_question_text(topic, qtype, bloom_level, difficulty)
-                
-                # Assign marks
-                marks = self._assign_marks(qtype, difficulty, bloom_level)
-                
-                questions.append({
-                    'question': question_text,
-                    'type': qtype,
-                    'bloom_level': bloom_level,
-                    'difficulty': difficulty,
-                    'marks': marks,
-                    'topic': topic
-                })
-        
-        return questions
+        return {
+            'question': question_text,
+            'type': qtype,
+            'bloom_level': bloom_level,
+            'difficulty': difficulty,
+            'marks': marks,
+            'topic': topic
+        }
     
     def _calculate_type_distribution(self, num_questions: int, question_types: List[str]) -> Dict:
         """Calculate how many questions of each type to generate"""
@@ -301,67 +587,38 @@ class AdvancedQuestionGenerator:
             'Case Study': 0.1
         }
         
-        distribution = {}
-        total_weight = sum(type_weights.get(qtype, 0.1) for qtype in question_types)
-        
-        for qtype in question_types:
-            weight = type_weights.get(qtype, 0.1)
-            distribution[qtype] = int((weight / total_weight) * num_questions)
-        
-        # Adjust for rounding
-        while sum(distribution.values()) < num_questions:
-            # Add to type with highest weight
-            max_type = max(type_weights.items(), key=lambda x: x[1])[0]
-            if max_type in distribution:
-                distribution[max_type] += 1
-        
-        return distribution
+        return apportion(num_questions, {qtype: type_weights.get(qtype, 0.1) for qtype in question_types})
     
-    def _select_difficulty(self, difficulty_distribution: Dict) -> str:
-        """Select difficulty level based on distribution"""
-        difficulties = list(difficulty_distribution.keys())
-        probabilities = list(difficulty_distribution.values())
-        return random.choices(difficulties, weights=probabilities)[0]
-    
-    def _select_bloom_level(self, question_type: str, difficulty: str) -> str:
+    def _select_bloom_level(self, question_type: str, difficulty: str, rng=random) -> str:
         """Select appropriate Bloom's level based on question type and difficulty"""
-        if difficulty == 'Easy':
-            levels = ['Remember', 'Understand']
-        elif difficulty == 'Medium':
-            levels = ['Understand', 'Apply', 'Analyze']
-        else:  # Hard
-            levels = ['Analyze', 'Evaluate', 'Create']
-        
-        return random.choice(levels)
+        return rng.choice(self._bloom_levels_for(difficulty))
     
-    def _generate_question_text(self, topic: str, qtype: str, bloom_level: str, difficulty: str) -> str:
+    def _bloom_levels_for(self, difficulty: str) -> List[str]:
+        # Unknown difficulties are treated as Hard
+        return self.bloom_levels_by_difficulty.get(difficulty, self.bloom_levels_by_difficulty['Hard'])
+    
+    def _generate_question_text(self, topic: str, qtype: str, bloom_level: str, difficulty: str, rng=random) -> str:
         """Generate question text using templates"""
-        templates = self.question_templates.get(qtype, {}).get(bloom_level, [])
+        templates = self.compiled_templates.get(qtype, {}).get(bloom_level, [])
         
-        if not templates:
+        if templates:
+            template = rng.choice(templates)
+        else:
             # Fallback template
-            templates = [f'Discuss {topic} in detail.']
-        
-        template = random.choice(templates)
-        
-        # Replace placeholders
-        question_text = template.format(
-            topic=topic,
-            related_concept=self._get_related_concept(topic),
-            context=self._get_context(topic),
-            scenario=self._get_scenario(topic),
-            problem=self._get_problem(topic),
-            situation=self._get_situation(topic),
-            related_topic=self._get_related_topic(topic),
-            factor=self._get_factor(topic),
-            objective=self._get_objective(topic),
-            outcome=self._get_outcome(topic),
-            challenge=self._get_challenge(topic),
-            purpose=self._get_purpose(topic),
-            goal=self._get_goal(topic)
-        )
+            template = self.fallback_template
+        
+        return self._render_template(template, topic, rng)
+    
+    def _render_template(self, template: CompiledTemplate, topic: str, rng=random) -> str:
+        """Render a compiled template, resolving only the placeholders it uses"""
+        resolvers = self.placeholder_resolvers
+        
+        def resolve(field):
+            if field == 'topic':
+                return topic
+            return resolvers[field](topic, rng)
         
-        return question_text
+        return template.render(resolve)
     
     def _assign_marks(self, question_type: str, difficulty: str, bloom_level: str) -> int:
         """Assign marks based on question type, difficulty, and cognitive level"""
@@ -416,53 +673,53 @@ class AdvancedQuestionGenerator:
         }
     
     # Helper methods for placeholder replacement
-    def _get_related_concept(self, topic: str) -> str:
+    def _get_related_concept(self, topic: str, rng=random) -> str:
         related_concepts = ['data management', 'system design', 'analysis', 'implementation']
-        return random.choice(related_concepts)
+        return rng.choice(related_concepts)
     
-    def _get_context(self, topic: str) -> str:
+    def _get_context(self, topic: str, rng=random) -> str:
         contexts = ['business environment', 'technical system', 'organizational setting', 'academic research']
-        return random.choice(contexts)
+        return rng.choice(contexts)
     
-    def _get_scenario(self, topic: str) -> str:
+    def _get_scenario(self, topic: str, rng=random) -> str:
         scenarios = ['a company implementing new technology', 'an organization undergoing digital transformation', 
                     'a project team working on system development', 'a business facing operational challenges']
-        return random.choice(scenarios)
+        return rng.choice(scenarios)
     
-    def _get_problem(self, topic: str) -> str:
+    def _get_problem(self, topic: str, rng=random) -> str:
         problems = ['data management issues', 'system performance problems', 'operational inefficiencies', 
                    'technical challenges', 'organizational bottlenecks']
-        return random.choice(problems)
+        return rng.choice(problems)
     
-    def _get_situation(self, topic: str) -> str:
+    def _get_situation(self, topic: str, rng=random) -> str:
         situations = ['high-volume data processing', 'real-time system requirements', 'multi-user environment', 
                      'distributed system architecture', 'mission-critical applications']
-        return random.choice(situations)
+        return rng.choice(situations)
     
-    def _get_related_topic(self, topic: str) -> str:
+    def _get_related_topic(self, topic: str, rng=random) -> str:
         related_topics = ['data structures', 'algorithms', 'system architecture', 'performance optimization']
-        return random.choice(related_topics)
+        return rng.choice(related_topics)
     
-    def _get_factor(self, topic: str) -> str:
+    def _get_factor(self, topic: str, rng=random) -> str:
         factors = ['performance', 'scalability', 'reliability', 'security', 'cost-effectiveness']
-        return random.choice(factors)
+        return rng.choice(factors)
     
-    def _get_objective(self, topic: str) -> str:
+    def _get_objective(self, topic: str, rng=random) -> str:
         objectives = ['improving efficiency', 'reducing costs', 'enhancing performance', 'increasing reliability']
-        return random.choice(objectives)
+        return rng.choice(objectives)
     
-    def _get_outcome(self, topic: str) -> str:
+    def _get_outcome(self, topic: str, rng=random) -> str:
         outcomes = ['system performance', 'user satisfaction', 'operational efficiency', 'business success']
-        return random.choice(outcomes)
+        return rng.choice(outcomes)
     
-    def _get_challenge(self, topic: str) -> str:
+    def _get_challenge(self, topic: str, rng=random) -> str:
         challenges = ['scaling operations', 'managing complexity', 'ensuring reliability', 'optimizing performance']
-        return random.choice(challenges)
+        return rng.choice(challenges)
     
-    def _get_purpose(self, topic: str) -> str:
+    def _get_purpose(self, topic: str, rng=random) -> str:
         purposes = ['data analysis', 'system optimization', 'process improvement', 'decision support']
-        return random.choice(purposes)
+        return rng.choice(purposes)
     
-    def _get_goal(self, topic: str) -> str:
+    def _get_goal(self, topic: str, rng=random) -> str:
         goals = ['improving efficiency', 'reducing costs', 'enhancing performance', 'achieving scalability']
-        return random.choice(goals) 
\ No newline at end of file
+        return rng.choice(goals) 
\ No newline at end of file
@@ -0,0 +1,111 @@
+from fractions import Fraction
+from typing import Dict, Hashable, Union
+
+Bound = Union[int, Dict[Hashable, int], None]
+
+
+def _bound_for(bound: Bound, key: Hashable, default):
+    if bound is None:
+        return default
+    if isinstance(bound, dict):
+        return bound.get(key, default)
+    return bound
+
+
+def apportion(total: int,
+              weights: Dict[Hashable, float],
+              minimums: Bound = None,
+              maximums: Bound = None) -> Dict[Hashable, int]:
+    """
+    Split total whole units across buckets in proportion to weights (largest-remainder method)
+
+    Exact quotas are found by water-filling: a single scale factor is chosen so that the
+    weights, clamped to each bucket's [minimum, maximum], sum to total. The whole parts are
+    kept and the leftover units go to the largest fractional parts. Runs in O(k log k) and
+    always terminates.
+
+    Args:
+        total: Number of units to distribute
+        weights: Relative weight per bucket (non-negative; all zero means equal weights)
+        minimums: Minimum units per bucket, as one int for every bucket or a dict per bucket
+        maximums: Maximum units per bucket, as one int for every bucket or a dict per bucket
+
+    Raises:
+        ValueError: If the bounds cannot be met for this total
+    """
+    keys = list(weights.keys())
+    if total < 0:
+        raise ValueError("Total must be non-negative")
+    if not keys:
+        if total:
+            raise ValueError(f"Cannot distribute {total} units across no buckets")
+        return {}
+
+    w = {}
+    for key in keys:
+        # Via str so float weights keep their decimal value (0.35 -> 7/20)
+        weight = Fraction(str(weights[key]))
+        if weight < 0:
+            raise ValueError(f"Weight for {key!r} must be non-negative")
+        w[key] = weight
+    if not any(w.values()):
+        w = {key: Fraction(1) for key in keys}
+
+    lo = {key: int(_bound_for(minimums, key, 0)) for key in keys}
+    hi = {key: _bound_for(maximums, key, None) for key in keys}
+    for key in keys:
+        if lo[key] < 0 or (hi[key] is not None and hi[key] < lo[key]):
+            raise ValueError(f"Invalid bounds for {key!r}: min={lo[key]}, max={hi[key]}")
+
+    if sum(lo.values()) > total:
+        raise ValueError(f"Minimums ({sum(lo.values())}) exceed the total of {total}")
+    # Zero-weight buckets stay at their minimum, so only weighted buckets can grow
+    if all(hi[key] is not None for key in keys if w[key] > 0):
+        capacity = sum(hi[key] if w[key] > 0 else lo[key] for key in keys)
+        if capacity < total:
+            raise ValueError(f"Maximums allow only {capacity} of {total} units")
+
+    # Water-filling: S(scale) = sum(clamp(scale * w, lo, hi)) is piecewise linear and
+    # non-decreasing; sweep its breakpoints to find the scale where it equals total.
+    events = []
+    for key in keys:
+        if w[key] > 0:
+            events.append((lo[key] / w[key], 0, key))
+            if hi[key] is not None:
+                events.append((hi[key] / w[key], 1, key))
+    events.sort(key=lambda e: (e[0], e[1]))
+
+    constant = Fraction(sum(lo.values()))
+    slope = Fraction(0)
+    scale = Fraction(0)
+    for position, kind, key in events:
+        if constant + slope * position >= total:
+            break
+        if kind == 0:
+            constant -= lo[key]
+            slope += w[key]
+        else:
+            constant += hi[key]
+            slope -= w[key]
+    if slope > 0:
+        scale = (total - constant) / slope
+
+    quotas = {}
+    for key in keys:
+        quota = scale * w[key]
+        if quota < lo[key]:
+            quota = Fraction(lo[key])
+        if hi[key] is not None and quota > hi[key]:
+            quota = Fraction(hi[key])
+        quotas[key] = quota
+
+    allocation = {key: int(quotas[key]) for key in keys}
+    leftover = total - sum(allocation.values())
+    if leftover:
+        order = sorted(
+            range(len(keys)),
+            key=lambda i: (-(quotas[keys[i]] - allocation[keys[i]]), -w[keys[i]], i)
+        )
+        for i in order[:leftover]:
+            allocation[keys[i]] += 1
+    return allocation
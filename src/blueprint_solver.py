@@ -0,0 +1,159 @@
+from typing import List, Dict, Optional, Tuple
+
+import numpy as np
+from scipy.optimize import milp, LinearConstraint, Bounds
+
+from .apportionment import apportion
+from .dedup import question_fingerprint
+
+
+class BlueprintSolver:
+    """
+    Assemble a paper from a candidate pool so that a whole exam blueprint holds at once
+
+    The selection is a 0/1 integer program (solved with HiGHS through scipy.optimize.milp):
+    one variable per (candidate, section) pair, with linear constraints for section sizes,
+    total marks, per-unit mark bands, the Bloom mix and the difficulty mix.
+
+    Blueprint keys:
+        total_marks: Exact paper total (e.g. 70)
+        sections: List of {'name', 'questions', 'question_types' (optional),
+                  'marks' (optional section total), 'marks_per_question' (optional)}
+        total_questions: Question count when no sections are given
+        unit_marks: {unit: [min, max]} or {unit: exact} mark bands
+        unit_key: Question field naming the unit (defaults to 'unit', falling back to 'topic')
+        bloom_mix / difficulty_mix: {level: fraction of questions}
+        mix_tolerance: Allowed deviation, in questions, from each mix target (default 1)
+    """
+
+    def __init__(self, time_limit: float = 10.0):
+        self.time_limit = time_limit
+
+    def solve(self, candidates: List[Dict], blueprint: Dict, seed: Optional[int] = None) -> List[Dict]:
+        """
+        Select questions satisfying the blueprint
+
+        Returns the selected questions in section order, each tagged with its 'section';
+        no question text appears twice.
+
+        Raises:
+            ValueError: If the blueprint is infeasible for this pool
+        """
+        sections = self._normalise_sections(blueprint)
+        total_questions = sum(s['questions'] for s in sections)
+
+        # Variables: one per eligible (candidate, section) pair
+        pairs = []
+        for s_index, section in enumerate(sections):
+            eligible = [c for c, q in enumerate(candidates) if self._fits_section(q, section)]
+            if len(eligible) < section['questions']:
+                raise ValueError(
+                    f"Section '{section['name']}' needs {section['questions']} questions "
+                    f"but only {len(eligible)} candidates fit it"
+                )
+            pairs.extend((c, s_index) for c in eligible)
+
+        n = len(pairs)
+        marks = np.array([candidates[c].get('marks', 1) for c, _ in pairs], dtype=float)
+        rows, lower, upper = [], [], []
+
+        def add(row, lb, ub):
+            rows.append(row)
+            lower.append(lb)
+            upper.append(ub)
+
+        # Section sizes and optional section marks
+        for s_index, section in enumerate(sections):
+            in_section = np.array([1.0 if s == s_index else 0.0 for _, s in pairs])
+            add(in_section, section['questions'], section['questions'])
+            if section.get('marks') is not None:
+                add(in_section * marks, section['marks'], section['marks'])
+
+        # Each question text is used at most once (a pool may hold the same text twice)
+        uses = {}
+        for i, (c, _) in enumerate(pairs):
+            text = candidates[c].get('question')
+            uses.setdefault(question_fingerprint(text) if text is not None else c, []).append(i)
+        for indices in uses.values():
+            if len(indices) > 1:
+                row = np.zeros(n)
+                row[indices] = 1.0
+                add(row, 0, 1)
+
+        # Exact total marks
+        if blueprint.get('total_marks') is not None:
+            add(marks, blueprint['total_marks'], blueprint['total_marks'])
+
+        # Per-unit mark bands
+        unit_key = blueprint.get('unit_key', 'unit')
+        for unit, band in blueprint.get('unit_marks', {}).items():
+            lb, ub = self._band(band)
+            row = np.array([
+                marks[i] if self._unit_of(candidates[c], unit_key) == unit else 0.0
+                for i, (c, _) in enumerate(pairs)
+            ])
+            add(row, lb, ub)
+
+        # Bloom and difficulty mixes, as question-count bands around exact targets
+        tolerance = blueprint.get('mix_tolerance', 1)
+        for field, mix_key in (('bloom_level', 'bloom_mix'), ('difficulty', 'difficulty_mix')):
+            mix = blueprint.get(mix_key)
+            if not mix:
+                continue
+            targets = apportion(total_questions, mix)
+            for level, target in targets.items():
+                row = np.array([1.0 if candidates[c].get(field) == level else 0.0 for c, _ in pairs])
+                add(row, max(0, target - tolerance), target + tolerance)
+            others = np.array([0.0 if candidates[c].get(field) in mix else 1.0 for c, _ in pairs])
+            if others.any():
+                add(others, 0, 0)
+
+        # A seeded random objective picks a different feasible paper per seed
+        rng = np.random.default_rng(seed)
+        cost = rng.random(n)
+
+        result = milp(
+            cost,
+            constraints=LinearConstraint(np.vstack(rows), lower, upper),
+            integrality=np.ones(n),
+            bounds=Bounds(0, 1),
+            # Any feasible paper will do; the cost only varies which one is found
+            options={'time_limit': self.time_limit, 'mip_rel_gap': 1.0}
+        )
+        if result.status == 2:
+            raise ValueError("Blueprint is infeasible for this candidate pool")
+        if result.x is None:
+            raise ValueError(f"Blueprint solve did not finish: {result.message}")
+
+        selected = []
+        for s_index, section in enumerate(sections):
+            for i, (c, s) in enumerate(pairs):
+                if s == s_index and result.x[i] > 0.5:
+                    selected.append(dict(candidates[c], section=section['name']))
+        return selected
+
+    def _normalise_sections(self, blueprint: Dict) -> List[Dict]:
+        sections = blueprint.get('sections')
+        if sections:
+            return [dict(section, name=section.get('name', f"Section {chr(ord('A') + i)}"))
+                    for i, section in enumerate(sections)]
+        if 'total_questions' not in blueprint:
+            raise ValueError("Blueprint needs either sections or total_questions")
+        return [{'name': 'Section A', 'questions': blueprint['total_questions']}]
+
+    def _fits_section(self, question: Dict, section: Dict) -> bool:
+        types = section.get('question_types')
+        if types and question.get('type') not in types:
+            return False
+        per_question = section.get('marks_per_question')
+        if per_question is not None and question.get('marks', 1) != per_question:
+            return False
+        return True
+
+    def _unit_of(self, question: Dict, unit_key: str):
+        return question.get(unit_key, question.get('topic'))
+
+    def _band(self, band) -> Tuple[float, float]:
+        if isinstance(band, (list, tuple)):
+            return band[0], band[1]
+        return band, band
@@ -0,0 +1,232 @@
+import os
+import re
+import sys
+import json
+import hashlib
+from typing import List, Dict, Optional, Callable, Iterable, Tuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .advanced_generator import AdvancedQuestionGenerator, variant_label
+
+DEFAULT_OUTPUT_DIR = 'bulk_papers'
+
+# One generator per worker process; building templates once per unit would dominate small papers
+_worker_generator = None
+
+
+def normalise_catalogue(catalogue: Dict) -> Dict[Tuple[str, str], List[str]]:
+    """
+    Flatten a subject catalogue to {(branch, subject): topics}
+
+    Accepts both shapes used in the apps: SYLLABUS_TOPICS ({subject: [topics]}, branch '')
+    and QuestVibeAIDatabase.engineering_subjects ({branch: {'subjects', 'exam_topics'}}).
+    Subjects without topics are left out.
+    """
+    flat = {}
+    for key, value in catalogue.items():
+        if isinstance(value, dict):
+            for subject, topics in value.get('exam_topics', {}).items():
+                if topics:
+                    flat[(key, subject)] = list(topics)
+        elif value:
+            flat[('', key)] = list(value)
+    return flat
+
+
+def unit_seed(base_seed: int, branch: str, subject: str, variant: int, attempt: int = 0) -> int:
+    """Seed for one attempt at a work unit, stable across runs, processes and Python hash randomisation"""
+    # The first attempt keeps the attempt out of the hash, so its seed matches earlier runs
+    suffix = f"|retry{attempt}" if attempt else ""
+    digest = hashlib.sha256(f"{base_seed}|{branch}|{subject}|{variant}{suffix}".encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big')
+
+
+def _safe_name(name: str) -> str:
+    return re.sub(r'[^\w\-]+', '_', name).strip('_') or 'untitled'
+
+
+def paper_lines(paper: Dict) -> List[str]:
+    """Plain-text lines of a generated paper: title, summary, then one line per question"""
+    info = paper['paper_info']
+    lines = [
+        info['title'],
+        f"Total Marks: {info['total_marks']}    Duration: {info['duration']} minutes",
+    ]
+    for idx, q in enumerate(paper['questions'], 1):
+        lines.append(f"Q{idx} ({q['type']}, {q['bloom_level']}, {q['marks']} marks): {q['question']}")
+    return lines
+
+
+def _generate_unit(unit: Dict, topics: List[str], exam_config: Dict) -> Dict:
+    """Worker: generate the paper for one (branch, subject, variant) unit"""
+    global _worker_generator
+    if _worker_generator is None:
+        _worker_generator = AdvancedQuestionGenerator()
+    config = dict(exam_config, title=f"{unit['subject']} - Set {unit['label']}")
+    # Exported papers must not repeat questions, so a unit that cannot be filled fails instead
+    paper = _worker_generator.generate_question_paper(topics, config, seed=unit['seed'], allow_repeats=False)
+    paper['paper_info'].update({
+        'branch': unit['branch'],
+        'subject': unit['subject'],
+        'variant': unit['label'],
+        'seed': unit['seed'],
+        'attempt': unit.get('attempt', 0)
+    })
+    return paper
+
+
+class BulkGenerationJob:
+    """
+    Generate papers for every subject x variant of a catalogue across a process pool
+
+    Finished papers are written to disk (and exported) as they complete, so a large run
+    can be watched, interrupted and resumed. Every unit has a fixed seed, so re-running
+    a job reproduces the same papers. A failed unit is retried with a new seed derived
+    from its attempt number (a seed-dependent failure such as running out of distinct
+    questions would otherwise repeat); each paper records the seed and attempt it came from.
+    """
+
+    def __init__(self,
+                 catalogue: Dict,
+                 exam_config: Dict,
+                 num_variants: int = 1,
+                 base_seed: int = 0,
+                 output_dir: str = DEFAULT_OUTPUT_DIR,
+                 export_formats: Iterable[str] = ('txt',),
+                 max_workers: Optional[int] = None,
+                 max_retries: int = 2):
+        """
+        Args:
+            catalogue: SYLLABUS_TOPICS or engineering_subjects style catalogue (see normalise_catalogue)
+            exam_config: Exam parameters passed to AdvancedQuestionGenerator.generate_question_paper
+            num_variants: Sets (A, B, ...) per subject
+            base_seed: Seed the per-unit seeds are derived from
+            output_dir: Root directory; papers go to <branch>/<subject>/set_<label>.json
+            export_formats: Extra exports per paper: 'txt' and/or 'docx'
+            max_workers: Worker processes (defaults to the CPU count); 1 runs in-process
+            max_retries: Extra attempts, each with a new seed, for a failing unit before it is reported as failed
+        """
+        self.catalogue = normalise_catalogue(catalogue)
+        self.exam_config = exam_config
+        self.num_variants = num_variants
+        self.base_seed = base_seed
+        self.output_dir = output_dir
+        self.export_formats = tuple(export_formats)
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_retries = max_retries
+
+    def work_units(self) -> List[Dict]:
+        """Every (branch, subject, variant) unit with its deterministic seed and output path"""
+        units = []
+        for (branch, subject) in self.catalogue:
+            for variant in range(self.num_variants):
+                label = variant_label(variant)
+                units.append({
+                    'branch': branch,
+                    'subject': subject,
+                    'variant': variant,
+                    'label': label,
+                    'seed': unit_seed(self.base_seed, branch, subject, variant),
+                    'path': os.path.join(self.output_dir, _safe_name(branch or 'general'),
+                                         _safe_name(subject), f"set_{label}.json")
+                })
+        return units
+
+    def run(self, resume: bool = True, on_paper: Optional[Callable[[Dict, Dict], None]] = None) -> Dict:
+        """
+        Run every unit, writing each paper as soon as it is ready
+
+        Args:
+            resume: Skip units whose paper file already exists
+            on_paper: Called as on_paper(unit, paper) after each paper is stored
+
+        Returns:
+            Summary with 'completed', 'skipped' and 'failed' ({unit path: last error}) entries
+        """
+        units = self.work_units()
+        pending = [u for u in units if not (resume and os.path.exists(u['path']))]
+        summary = {'completed': [], 'skipped': len(units) - len(pending), 'failed': {}}
+
+        for attempt in range(self.max_retries + 1):
+            if not pending:
+                break
+            errors = {}
+            attempts = [dict(unit, attempt=attempt,
+                             seed=unit_seed(self.base_seed, unit['branch'], unit['subject'], unit['variant'], attempt))
+                        for unit in pending]
+            for unit, paper, error in self._run_round(attempts):
+                if error is not None:
+                    errors[unit['path']] = (unit, error)
+                    continue
+                self._store(unit, paper)
+                summary['completed'].append(unit['path'])
+                if on_paper:
+                    on_paper(unit, paper)
+            pending = [unit for unit, _ in errors.values()]
+            summary['failed'] = {path: str(error) for path, (_, error) in errors.items()}
+        return summary
+
+    def _run_round(self, units: List[Dict]):
+        """Yield (unit, paper, error) as units finish; a fresh pool per round survives worker crashes"""
+        workers = min(self.max_workers, len(units))
+        if workers <= 1:
+            for unit in units:
+                try:
+                    yield unit, _generate_unit(unit, self.catalogue[(unit['branch'], unit['subject'])], self.exam_config), None
+                except Exception as e:
+                    yield unit, None, e
+            return
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(_generate_unit, unit, self.catalogue[(unit['branch'], unit['subject'])],
+                                self.exam_config): unit
+                for unit in units
+            }
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result(), None
+                except Exception as e:
+                    yield futures[future], None, e
+
+    def _store(self, unit: Dict, paper: Dict):
+        """Write the paper JSON (atomically) and its exports next to it"""
+        os.makedirs(os.path.dirname(unit['path']), exist_ok=True)
+        base = os.path.splitext(unit['path'])[0]
+        lines = paper_lines(paper)
+        if 'txt' in self.export_formats:
+            with open(base + '.txt', 'w', encoding='utf-8') as f:
+                f.write('\n'.join(lines) + '\n')
+        if 'docx' in self.export_formats:
+            from docx import Document
+            doc = Document()
+            doc.add_heading(lines[0], 0)
+            for line in lines[1:]:
+                doc.add_paragraph(line)
+            doc.save(base + '.docx')
+        # The JSON goes last: its presence marks the unit as done for resume
+        tmp_path = unit['path'] + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(paper, f, indent=2)
+        os.replace(tmp_path, unit['path'])
+
+
+if __name__ == '__main__':
+    # Bulk run: python -m src.bulk_generator catalogue.json [num_variants] [base_seed] [output_dir]
+    # catalogue.json holds SYLLABUS_TOPICS or engineering_subjects style data
+    if len(sys.argv) < 2:
+        print("Usage: python -m src.bulk_generator catalogue.json [num_variants] [base_seed] [output_dir]")
+        sys.exit(1)
+    with open(sys.argv[1], 'r', encoding='utf-8') as f:
+        catalogue_data = json.load(f)
+    job = BulkGenerationJob(
+        catalogue_data,
+        {'total_questions': 20, 'question_types': ['MCQ', 'Short Answer', 'Long Answer']},
+        num_variants=int(sys.argv[2]) if len(sys.argv) > 2 else 1,
+        base_seed=int(sys.argv[3]) if len(sys.argv) > 3 else 0,
+        output_dir=sys.argv[4] if len(sys.argv) > 4 else DEFAULT_OUTPUT_DIR
+    )
+    result = job.run(on_paper=lambda unit, paper: print(f"Saved {unit['path']}"))
+    print(f"Completed {len(result['completed'])}, skipped {result['skipped']}, failed {len(result['failed'])}")
+    for path, error in result['failed'].items():
+        print(f"Error generating {path}: {error}")
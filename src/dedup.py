@@ -0,0 +1,172 @@
+import re
+import random
+import hashlib
+from typing import Callable, Dict, List, Optional
+
+_NON_WORD = re.compile(r'[^\w\s]')
+
+
+def normalise_question(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace so trivial variations hash alike"""
+    return ' '.join(_NON_WORD.sub(' ', str(text).lower()).split())
+
+
+def question_fingerprint(text: str) -> str:
+    """64-bit hash of the normalised question text"""
+    return hashlib.blake2b(normalise_question(text).encode('utf-8'), digest_size=8).hexdigest()
+
+
+class DuplicateFilter:
+    """
+    Tracks the questions already used and reports duplicates of a new one
+
+    Exact duplicates are caught by hashing the normalised text. With near_threshold set,
+    questions whose word-shingle Jaccard similarity reaches the threshold also count as
+    duplicates; an inverted shingle index keeps the comparison to questions sharing wording.
+    """
+
+    def __init__(self, near_threshold: Optional[float] = None, shingle_size: int = 3):
+        """
+        Args:
+            near_threshold: Jaccard similarity (0-1) at which two questions are near-duplicates; None for exact only
+            shingle_size: Words per shingle for the near-duplicate check
+        """
+        self.near_threshold = near_threshold
+        self.shingle_size = shingle_size
+        self.fingerprints = set()
+        self.shingles: Dict[str, frozenset] = {}
+        self.shingle_index: Dict[str, List[str]] = {}
+
+    def _shingles(self, text: str) -> frozenset:
+        words = normalise_question(text).split()
+        if len(words) <= self.shingle_size:
+            return frozenset([' '.join(words)])
+        return frozenset(' '.join(words[i:i + self.shingle_size]) for i in range(len(words) - self.shingle_size + 1))
+
+    def matches(self, text: str) -> List[str]:
+        """Fingerprints of the stored questions that text duplicates (exactly or nearly)"""
+        fingerprint = question_fingerprint(text)
+        found = [fingerprint] if fingerprint in self.fingerprints else []
+        if self.near_threshold is None:
+            return found
+
+        shingles = self._shingles(text)
+        candidates = set()
+        for shingle in shingles:
+            candidates.update(self.shingle_index.get(shingle, ()))
+        candidates.discard(fingerprint)
+        for candidate in candidates:
+            other = self.shingles[candidate]
+            similarity = len(shingles & other) / len(shingles | other)
+            if similarity >= self.near_threshold:
+                found.append(candidate)
+        return found
+
+    def is_duplicate(self, text: str) -> bool:
+        return bool(self.matches(text))
+
+    def add(self, text: str) -> str:
+        """Record a question and return its fingerprint"""
+        fingerprint = question_fingerprint(text)
+        if fingerprint in self.fingerprints:
+            return fingerprint
+        self.fingerprints.add(fingerprint)
+        if self.near_threshold is not None:
+            shingles = self._shingles(text)
+            self.shingles[fingerprint] = shingles
+            for shingle in shingles:
+                self.shingle_index.setdefault(shingle, []).append(fingerprint)
+        return fingerprint
+
+    def __contains__(self, text: str) -> bool:
+        return self.is_duplicate(text)
+
+    def __len__(self) -> int:
+        return len(self.fingerprints)
+
+
+def deduplicate_questions(questions: List[Dict],
+                          resample: Optional[Callable[[int, Dict], Dict]] = None,
+                          duplicate_filter: Optional[DuplicateFilter] = None,
+                          max_attempts: int = 20,
+                          keep_repeats: bool = False) -> List[Dict]:
+    """
+    Make the questions unique, redrawing only the slots that collide
+
+    Args:
+        questions: Question dicts with a 'question' text, in paper order
+        resample: Called as resample(slot_index, question) to draw a replacement for a colliding slot;
+                  None drops duplicates instead
+        duplicate_filter: Filter to check against and extend (share one across a batch of papers
+                          to keep the whole batch unique); a fresh exact filter by default
+        max_attempts: Redraws per slot before the slot is given up
+        keep_repeats: Keep a slot that could not be made unique, marked with 'repeat': True,
+                      instead of dropping it (the paper keeps its length)
+
+    Returns:
+        The unique questions; shorter than the input only when a slot could not be made
+        unique and keep_repeats is off
+    """
+    if duplicate_filter is None:
+        duplicate_filter = DuplicateFilter()
+    unique = []
+    for index, q in enumerate(questions):
+        attempts = 0
+        while q is not None and duplicate_filter.is_duplicate(q['question']):
+            if resample is None or attempts == max_attempts:
+                break
+            q = resample(index, q)
+            attempts += 1
+        else:
+            if q is not None:
+                duplicate_filter.add(q['question'])
+                unique.append(q)
+            continue
+        if keep_repeats:
+            unique.append(dict(q, repeat=True))
+    return unique
+
+
+def count_repeats(questions: List[Dict]) -> int:
+    """Number of questions deduplicate_questions had to keep as repeats"""
+    return sum(1 for q in questions if q.get('repeat'))
+
+
+def repeat_warning(questions: List[Dict]) -> Optional[str]:
+    """Message telling the user how many questions are kept repeats, or None when there are none"""
+    repeats = count_repeats(questions)
+    if not repeats:
+        return None
+    return (f"⚠️ {repeats} of {len(questions)} questions repeat an earlier question: the syllabus has too "
+            f"few distinct questions for this count. Add topics or lower the number of questions.")
+
+
+def padded_paper(topics: List[str],
+                 num_questions: int,
+                 question_types: List[str],
+                 make_question: Callable[[str, str], Dict],
+                 rng=random) -> List[Dict]:
+    """
+    num_questions questions spread evenly over the types, each type taking distinct topics first
+
+    A type needing more questions than there are topics draws extra topics at random. Padded
+    topics repeat, so only the repeated questions are redrawn, each with a fresh topic; a slot
+    that still cannot be made unique is kept as a marked repeat (see repeat_warning).
+
+    Args:
+        topics: Syllabus topics
+        num_questions: Questions in the paper
+        question_types: Types to spread the questions over
+        make_question: Renders one question as make_question(topic, question_type)
+    """
+    questions = []
+    questions_per_type, remaining = divmod(num_questions, len(question_types))
+    for qtype in question_types:
+        count = questions_per_type + (1 if remaining > 0 else 0)
+        remaining -= 1
+        selected_topics = rng.sample(topics, min(count, len(topics)))
+        if count > len(topics):
+            selected_topics.extend(rng.choices(topics, k=count - len(topics)))
+        questions.extend(make_question(topic, qtype) for topic in selected_topics[:count])
+    return deduplicate_questions(questions, lambda index, q: make_question(rng.choice(topics), q['type']),
+                                 keep_repeats=True)
@@ -1,6 +1,11 @@
 from typing import List, Dict
 import random
 
+try:
+    from .dedup import deduplicate_questions
+except ImportError:  # imported as a top-level module with src/ on sys.path
+    from dedup import deduplicate_questions
+
 def generate_questions(topics: List[str], question_types: List[str], num_questions: int = 10) -> List[Dict]:
     """
     Generate sample questions for each topic using templates.
@@ -8,23 +13,43 @@ def generate_questions(topics: List[str], question_types: List[str], num_questio
     """
     bloom_levels = ['Remember', 'Understand', 'Apply', 'Analyze', 'Evaluate', 'Create']
     templates = {
-        'MCQ': 'Which of the following best describes {topic}?',
-        'Short Answer': 'Explain the concept of {topic}.',
-        'Long Answer': 'Discuss {topic} in detail with examples.',
-        'Case Study': 'Given a scenario related to {topic}, analyze and provide solutions.'
+        'MCQ': [
+            'Which of the following best describes {topic}?',
+            'Which statement about {topic} is correct?',
+            'What is the main purpose of {topic}?'
+        ],
+        'Short Answer': [
+            'Explain the concept of {topic}.',
+            'Describe the key features of {topic}.',
+            'What are the advantages of {topic}?'
+        ],
+        'Long Answer': [
+            'Discuss {topic} in detail with examples.',
+            'Explain how {topic} works and where it is applied.',
+            'Compare different approaches to {topic}.'
+        ],
+        'Case Study': [
+            'Given a scenario related to {topic}, analyze and provide solutions.',
+            'Design a solution to a real-world problem using {topic}.',
+            'Evaluate how {topic} would be applied in a practical system.'
+        ]
     }
+
+    def make_question(topic, qtype):
+        return {
+            'question': random.choice(templates[qtype]).format(topic=topic),
+            'type': qtype,
+            'topic': topic,
+            'bloom_level': random.choice(bloom_levels)
+        }
+
     questions = []
     for topic in topics:
         for qtype in question_types:
             for _ in range(num_questions // (len(topics) * len(question_types)) + 1):
-                bloom = random.choice(bloom_levels)
-                q = templates[qtype].format(topic=topic)
-                questions.append({
-                    'question': q,
-                    'type': qtype,
-                    'topic': topic,
-                    'bloom_level': bloom
-                })
+                questions.append(make_question(topic, qtype))
+    # Repeats of a (topic, type) pair can render the same text; redraw only those slots
+    questions = deduplicate_questions(questions, lambda index, q: make_question(q['topic'], q['type']))
     return questions[:num_questions]
 
 def generate_model_answer(question_dict):
@@ -42,6 +67,12 @@ def generate_model_answer(question_dict):
     else:
         return "Model answer not available."
 
+def get_model_answer(question_dict):
+    """Model answer of a question, generated on first use and kept on the question dict."""
+    if 'model_answer' not in question_dict:
+        question_dict['model_answer'] = generate_model_answer(question_dict)
+    return question_dict['model_answer']
+
 def assign_marks(question_dict):
     qtype = question_dict['type']
     if qtype == 'MCQ':
@@ -55,19 +86,20 @@ def assign_marks(question_dict):
     else:
         return 2
 
-def format_export_text(questions):
+def format_export_text(questions, include_answers=True):
     lines = []
     total_marks = 0
     for idx, q in enumerate(questions, 1):
         marks = assign_marks(q)
         total_marks += marks
         lines.append(f"Q{idx} ({q['type']}, {q['bloom_level']}, {q['topic']}, {marks} marks): {q['question']}")
-        lines.append(f"Model Answer: {generate_model_answer(q)}\n")
+        if include_answers:
+            lines.append(f"Model Answer: {get_model_answer(q)}\n")
     lines.append(f"Total Assigned Marks: {total_marks}")
     return '\n'.join(lines)
 
 # DOCX export
-def format_export_docx(questions, filename='Question_Paper.docx'):
+def format_export_docx(questions, filename='Question_Paper.docx', include_answers=True):
     from docx import Document
     doc = Document()
     doc.add_heading('Generated Question Paper', 0)
@@ -76,7 +108,8 @@ def format_export_docx(questions, filename='Question_Paper.docx'):
         marks = assign_marks(q)
         total_marks += marks
         doc.add_paragraph(f"Q{idx} ({q['type']}, {q['bloom_level']}, {q['topic']}, {marks} marks): {q['question']}", style='List Number')
-        doc.add_paragraph(f"Model Answer: {generate_model_answer(q)}")
+        if include_answers:
+            doc.add_paragraph(f"Model Answer: {get_model_answer(q)}")
     # Add total marks as bold text
     p = doc.add_paragraph()
     run = p.add_run(f"Total Assigned Marks: {total_marks}")
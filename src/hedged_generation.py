@@ -0,0 +1,128 @@
+import time
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+
+class HedgedPaper:
+    """
+    Questions that are usable at once and upgraded in the background
+
+    The paper starts as the template questions. The LLM call runs in a daemon thread and
+    each question it yields replaces a template question, preferring one of the same
+    type, so the paper keeps its length throughout. Fields that depend on the type (marks)
+    come from a template question of the LLM question's own type, never from a replaced
+    question of another type. latency_budget seconds after
+    the start the paper is final and later LLM questions are dropped; an LLM failure
+    simply leaves the remaining template questions in place.
+    """
+
+    def __init__(self,
+                 template_questions: List[Dict],
+                 llm_questions: Optional[Callable[[], Iterable[Dict]]] = None,
+                 latency_budget: float = 20.0,
+                 keep_fields: Sequence[str] = ('id',),
+                 type_fields: Sequence[str] = ('marks',)):
+        """
+        Args:
+            template_questions: The paper served immediately
+            llm_questions: Produces the LLM questions, ideally as they arrive; None for no upgrade
+            latency_budget: Seconds after which the current questions are final
+            keep_fields: Fields of the replaced template question copied onto an LLM question that lacks them
+            type_fields: Fields copied likewise from a template question of the same type (the replaced
+                         one when the types match); left unset when the template has no such type
+        """
+        self.questions = list(template_questions)
+        self.templates = list(template_questions)
+        self.upgraded_slots = [False] * len(self.questions)
+        self.latency_budget = latency_budget
+        self.keep_fields = keep_fields
+        self.type_fields = type_fields
+        self.deadline = time.monotonic() + latency_budget
+        self.version = 0
+        self.error = None
+        self.llm_done = llm_questions is None
+        self.lock = threading.Lock()
+        self.changed = threading.Condition(self.lock)
+        self.thread = None
+        if llm_questions is not None:
+            self.thread = threading.Thread(target=self._upgrade, args=(llm_questions,), daemon=True)
+            self.thread.start()
+
+    @property
+    def final(self) -> bool:
+        """Whether the questions can no longer change"""
+        with self.lock:
+            return self._final()
+
+    def _final(self) -> bool:
+        return self.llm_done or all(self.upgraded_slots) or time.monotonic() >= self.deadline
+
+    @property
+    def upgraded(self) -> int:
+        """Number of template questions replaced so far"""
+        with self.lock:
+            return sum(self.upgraded_slots)
+
+    @property
+    def source(self) -> str:
+        """'template', 'mixed' or 'llm'"""
+        upgraded = self.upgraded
+        if upgraded == 0:
+            return 'template'
+        return 'llm' if upgraded == len(self.questions) else 'mixed'
+
+    def current(self) -> List[Dict]:
+        """The questions as they stand now"""
+        with self.lock:
+            return list(self.questions)
+
+    def wait_for_change(self, version: int, timeout: Optional[float] = None) -> int:
+        """Block until the questions change from version, the paper is final or timeout passes; returns the version"""
+        with self.lock:
+            end = self.deadline if timeout is None else min(self.deadline, time.monotonic() + timeout)
+            while self.version == version and not self._final():
+                remaining = end - time.monotonic()
+                if remaining <= 0:
+                    break
+                self.changed.wait(remaining)
+            return self.version
+
+    def result(self) -> List[Dict]:
+        """The final questions, waiting at most until the latency budget runs out"""
+        version = self.version
+        while not self.final:
+            version = self.wait_for_change(version)
+        return self.current()
+
+    def _slot_for(self, question: Dict) -> Optional[int]:
+        free = [i for i, upgraded in enumerate(self.upgraded_slots) if not upgraded]
+        same_type = [i for i in free if self.questions[i].get('type') == question.get('type')]
+        return (same_type or free or [None])[0]
+
+    def _fields_for(self, question: Dict, replaced: Dict) -> Dict:
+        fields = {field: replaced[field] for field in self.keep_fields if field in replaced}
+        if replaced.get('type') == question.get('type'):
+            same_type = replaced
+        else:
+            same_type = next((q for q in self.templates if q.get('type') == question.get('type')), {})
+        fields.update((field, same_type[field]) for field in self.type_fields if field in same_type)
+        return fields
+
+    def _upgrade(self, llm_questions: Callable[[], Iterable[Dict]]):
+        try:
+            for question in llm_questions():
+                with self.lock:
+                    if self._final():
+                        break
+                    slot = self._slot_for(question)
+                    question = dict(self._fields_for(question, self.questions[slot]), **question)
+                    self.questions[slot] = question
+                    self.upgraded_slots[slot] = True
+                    self.version += 1
+                    self.changed.notify_all()
+        except Exception as e:
+            self.error = e
+        finally:
+            with self.lock:
+                self.llm_done = True
+                self.changed.notify_all()
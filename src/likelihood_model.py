@@ -0,0 +1,335 @@
+import os
+import sys
+import json
+import math
+import pickle
+from typing import List, Dict, Optional, Tuple
+from collections import Counter, defaultdict
+from datetime import datetime
+
+import numpy as np
+from sklearn.linear_model import SGDClassifier
+
+from .nlp_models import load_shared
+
+DEFAULT_MODEL_PATH = os.environ.get('QUESTION_LIKELIHOOD_MODEL', 'question_likelihood_model.pkl')
+
+FEATURE_NAMES = [
+    'question_share',       # share of all past questions asked on the topic
+    'year_coverage',        # fraction of past exam years in which the topic appeared
+    'recency_weight',       # exponentially decayed appearance count
+    'years_since_seen',     # years since the topic last appeared (normalised)
+    'seen_last_year',       # 1 if the topic appeared in the previous exam year
+    'log_frequency',        # log(1 + past question count)
+    'long_form_share',      # share of the topic's questions that are Long Answer / Case Study
+    'marks_share',          # share of all past marks carried by the topic
+]
+
+LONG_FORM_TYPES = {'Long Answer', 'Case Study'}
+DEFAULT_MARKS = {'MCQ': 1, 'Short Answer': 3, 'Long Answer': 8, 'Case Study': 10}
+
+
+def _normalise_topic(topic: str) -> str:
+    return ' '.join(str(topic).lower().split())
+
+
+def _wilson_interval(p: np.ndarray, n, z: float = 1.96) -> Tuple[np.ndarray, np.ndarray]:
+    """Wilson score interval for probabilities p estimated from n observations each (0-1 without evidence)"""
+    p = np.asarray(p, dtype=float)
+    n = np.broadcast_to(np.asarray(n, dtype=float), p.shape)
+    observed = np.maximum(n, 1)
+    denominator = 1 + z * z / observed
+    centre = (p + z * z / (2 * observed)) / denominator
+    half_width = z * np.sqrt(p * (1 - p) / observed + z * z / (4 * observed * observed)) / denominator
+    low = np.where(n > 0, np.clip(centre - half_width, 0, 1), 0.0)
+    high = np.where(n > 0, np.clip(centre + half_width, 0, 1), 1.0)
+    return low, high
+
+
+class QuestionLikelihoodModel:
+    """Logistic model of the chance a syllabus topic is asked in the next exam"""
+
+    def __init__(self, decay: float = 0.5):
+        self.decay = decay
+        self._reset()
+
+    def _reset(self):
+        self._reset_classifier()
+        # Compact per-year corpus summary: year -> topic -> [questions, marks, long_form]
+        self.year_stats = defaultdict(dict)
+        self.topic_names = {}
+        self.topic_types = defaultdict(Counter)
+        self.type_marks = defaultdict(lambda: [0, 0])
+        self.trained_years = set()
+
+    def _reset_classifier(self):
+        self.classifier = SGDClassifier(loss='log_loss', alpha=1e-3, random_state=0)
+        self.is_trained = False
+
+    # ----- corpus summary -----
+
+    def _add_papers(self, papers: List[Dict]) -> set:
+        """Fold papers into the per-year summary and return the years touched"""
+        touched = set()
+        current_year = datetime.now().year
+        for paper in papers:
+            year = int(paper.get('metadata', {}).get('year', current_year))
+            touched.add(year)
+            stats = self.year_stats[year]
+            for q in paper.get('questions', []):
+                key = _normalise_topic(q.get('topic', 'Unknown'))
+                self.topic_names.setdefault(key, q.get('topic', 'Unknown'))
+                qtype = q.get('type', 'Unknown')
+                marks = q.get('marks', 1)
+                entry = stats.setdefault(key, [0, 0, 0])
+                entry[0] += 1
+                entry[1] += marks
+                entry[2] += 1 if qtype in LONG_FORM_TYPES else 0
+                self.topic_types[key][qtype] += 1
+                self.type_marks[qtype][0] += marks
+                self.type_marks[qtype][1] += 1
+        return touched
+
+    def _features(self, topic_keys: List[str], target_year: int) -> np.ndarray:
+        """Build the feature matrix for topics using only years before target_year"""
+        past_years = sorted(y for y in self.year_stats if y < target_year)
+        matrix = np.zeros((len(topic_keys), len(FEATURE_NAMES)))
+        if not past_years:
+            return matrix
+
+        totals = [0, 0]
+        topic_totals = defaultdict(lambda: [0, 0, 0, 0, 0.0, None])  # questions, marks, long, years, recency, last
+        for year in past_years:
+            age = target_year - year
+            for key, (count, marks, long_form) in self.year_stats[year].items():
+                t = topic_totals[key]
+                t[0] += count
+                t[1] += marks
+                t[2] += long_form
+                t[3] += 1
+                t[4] += self.decay ** (age - 1)
+                t[5] = year
+                totals[0] += count
+                totals[1] += marks
+
+        span = target_year - past_years[0]
+        last_year = past_years[-1]
+        for row, key in enumerate(topic_keys):
+            if key not in topic_totals:
+                matrix[row, 3] = 1.0
+                continue
+            count, marks, long_form, years_seen, recency, last_seen = topic_totals[key]
+            matrix[row] = [
+                count / totals[0] if totals[0] else 0.0,
+                years_seen / len(past_years),
+                recency,
+                (target_year - last_seen) / (span + 1),
+                1.0 if last_seen == last_year else 0.0,
+                math.log1p(count),
+                long_form / count,
+                marks / totals[1] if totals[1] else 0.0,
+            ]
+        return matrix
+
+    def _topic_trials(self, topic_keys: List[str], target_year: int) -> np.ndarray:
+        """Past exam years since each topic first appeared: the trials behind its probability"""
+        past_years = sorted(y for y in self.year_stats if y < target_year)
+        trials = np.zeros(len(topic_keys))
+        for row, key in enumerate(topic_keys):
+            first_seen = next((y for y in past_years if key in self.year_stats[y]), None)
+            if first_seen is not None:
+                trials[row] = sum(1 for y in past_years if y >= first_seen)
+        return trials
+
+    def _training_set(self, years: List[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """Label every known topic for each year: did it appear that year?"""
+        features, labels = [], []
+        for year in sorted(years):
+            candidates = [k for k in self.topic_names
+                          if any(k in self.year_stats[y] for y in self.year_stats if y < year)]
+            if not candidates:
+                continue
+            features.append(self._features(candidates, year))
+            labels.append(np.array([1 if k in self.year_stats[year] else 0 for k in candidates]))
+        if not features:
+            return np.zeros((0, len(FEATURE_NAMES))), np.zeros(0)
+        return np.vstack(features), np.concatenate(labels)
+
+    # ----- training -----
+
+    def fit(self, papers: List[Dict], epochs: int = 20) -> 'QuestionLikelihoodModel':
+        """Train offline on an analyzer corpus (AdvancedExamAnalyzer.question_database)"""
+        self._reset()
+        self._add_papers(papers)
+        return self._refit(epochs)
+
+    def update(self, papers: List[Dict], epochs: int = 5,
+               refit_epochs: int = 20) -> 'QuestionLikelihoodModel':
+        """
+        Retrain on newly arrived papers
+
+        Papers for exam years after every trained year are learned incrementally: those years'
+        examples depend only on earlier years. A late paper for a year already trained on
+        changes that year's examples and the features of every later year, so the model is
+        then refit from the corpus summary rather than learning those years twice.
+        """
+        touched = self._add_papers(papers)
+        if not touched:
+            return self
+        if self.trained_years and min(touched) <= max(self.trained_years):
+            return self._refit(refit_epochs)
+        X, y = self._training_set(sorted(touched))
+        for _ in range(epochs):
+            self._partial_fit(X, y)
+        self.trained_years |= touched
+        return self
+
+    def _refit(self, epochs: int) -> 'QuestionLikelihoodModel':
+        """Train a fresh classifier on every year of the corpus summary"""
+        self._reset_classifier()
+        years = sorted(self.year_stats)
+        X, y = self._training_set(years)
+        for _ in range(epochs):
+            self._partial_fit(X, y)
+        self.trained_years = set(years)
+        return self
+
+    def _partial_fit(self, X: np.ndarray, y: np.ndarray):
+        if len(y) == 0 or (not self.is_trained and len(set(y.tolist())) < 2):
+            return
+        self.classifier.partial_fit(X, y, classes=np.array([0, 1]))
+        self.is_trained = True
+
+    # ----- scoring -----
+
+    def score_topics(self, topics: List[str], target_year: Optional[int] = None) -> np.ndarray:
+        """Return the appearance probability (0-1) for every topic in one vectorised call"""
+        keys = [_normalise_topic(t) for t in topics]
+        if target_year is None:
+            target_year = self._next_year()
+        X = self._features(keys, target_year)
+        if self.is_trained:
+            return self.classifier.predict_proba(X)[:, 1]
+        # Untrained (single exam year or one label only): Laplace-smoothed year coverage
+        n_years = len([y for y in self.year_stats if y < target_year])
+        return (X[:, 1] * n_years + 1) / (n_years + 2)
+
+    def _next_year(self) -> int:
+        return (max(self.year_stats) + 1) if self.year_stats else datetime.now().year
+
+    def predict_likely_questions(self, syllabus_topics: List[str], num_predictions: int = 10) -> List[Dict]:
+        """
+        Rank syllabus topics in the same shape as AdvancedExamAnalyzer.predict_likely_questions
+
+        'probability' is the model's chance (0-100) that the topic is asked. 'probability_low'
+        and 'probability_high' bound it with a 95% Wilson score interval over the exam years
+        since the topic first appeared, so the band narrows as years of evidence on that topic
+        accumulate (an unseen topic spans 0-100). 'confidence' is the lower bound: how likely
+        the topic is at least, given the evidence (never above 'probability').
+        """
+        target_year = self._next_year()
+        probabilities = self.score_topics(syllabus_topics, target_year)
+        trials = self._topic_trials([_normalise_topic(t) for t in syllabus_topics], target_year)
+        low, high = _wilson_interval(probabilities, trials)
+        predictions = []
+        for topic, p, p_low, p_high in zip(syllabus_topics, probabilities, low, high):
+            key = _normalise_topic(topic)
+            type_counts = self.topic_types.get(key)
+            question_type = type_counts.most_common(1)[0][0] if type_counts else 'Short Answer'
+            predictions.append({
+                'topic': topic,
+                'question_type': question_type,
+                'probability': float(p) * 100,
+                'probability_low': float(p_low) * 100,
+                'probability_high': float(p_high) * 100,
+                'confidence': float(p_low) * 100,
+                'historical_frequency': sum(self.year_stats[y].get(key, (0,))[0] for y in self.year_stats),
+                'recommended_marks': self._get_recommended_marks(question_type)
+            })
+        predictions.sort(key=lambda x: x['probability'], reverse=True)
+        return predictions[:num_predictions]
+
+    def _get_recommended_marks(self, question_type: str) -> int:
+        total, count = self.type_marks.get(question_type, (0, 0))
+        if count:
+            return int(total / count)
+        return DEFAULT_MARKS.get(question_type, 2)
+
+    # ----- persistence -----
+
+    def save(self, path: str = DEFAULT_MODEL_PATH) -> str:
+        """Serialise the model and its corpus summary to disk"""
+        state = {
+            'decay': self.decay,
+            'classifier': self.classifier,
+            'is_trained': self.is_trained,
+            'year_stats': dict(self.year_stats),
+            'topic_names': self.topic_names,
+            'topic_types': dict(self.topic_types),
+            'type_marks': dict(self.type_marks),
+            'trained_years': self.trained_years,
+        }
+        with open(path, 'wb') as f:
+            pickle.dump(state, f)
+        return path
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_MODEL_PATH) -> 'QuestionLikelihoodModel':
+        """Load a model saved with save()"""
+        with open(path, 'rb') as f:
+            state = pickle.load(f)
+        model = cls(decay=state['decay'])
+        model.classifier = state['classifier']
+        model.is_trained = state['is_trained']
+        model.year_stats.update(state['year_stats'])
+        model.topic_names = state['topic_names']
+        model.topic_types.update(state['topic_types'])
+        model.type_marks.update(state['type_marks'])
+        model.trained_years = state['trained_years']
+        return model
+
+
+def load_model_if_available(path: str = DEFAULT_MODEL_PATH) -> Optional[QuestionLikelihoodModel]:
+    """Load the trained model, or None when it has not been trained yet"""
+    if not os.path.exists(path):
+        return None
+    try:
+        return QuestionLikelihoodModel.load(path)
+    except Exception as e:
+        print(f"Error loading likelihood model: {e}")
+        return None
+
+
+def get_likelihood_model(path: str = DEFAULT_MODEL_PATH) -> Optional[QuestionLikelihoodModel]:
+    """The trained model at path, loaded once per process (None until one has been trained)"""
+    return load_shared(('likelihood-model', path), lambda: load_model_if_available(path))
+
+
+def score_syllabus_topics(syllabus_topics: List[str],
+                          model: Optional[QuestionLikelihoodModel] = None) -> Dict[str, float]:
+    """
+    Probability (0-100) of every syllabus topic, scored in one call
+
+    Args:
+        syllabus_topics: Topics to score
+        model: Model to score with (the shared trained model by default); without a trained
+               model every topic gets the untrained model's even prior, never a made-up number
+    """
+    if not syllabus_topics:
+        return {}
+    if model is None:
+        model = get_likelihood_model() or QuestionLikelihoodModel()
+    return {topic: float(p) * 100 for topic, p in zip(syllabus_topics, model.score_topics(syllabus_topics))}
+
+
+if __name__ == '__main__':
+    # Offline training: python -m src.likelihood_model papers.json [model.pkl]
+    # papers.json holds a list of {"questions": [...], "metadata": {"year": ...}}
+    if len(sys.argv) < 2:
+        print("Usage: python -m src.likelihood_model papers.json [model.pkl]")
+        sys.exit(1)
+    with open(sys.argv[1], 'r', encoding='utf-8') as f:
+        corpus = json.load(f)
+    output_path = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_MODEL_PATH
+    QuestionLikelihoodModel().fit(corpus).save(output_path)
+    print(f"Saved likelihood model to {output_path}")
@@ -0,0 +1,152 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+from typing import Callable, Dict, Optional
+
+DEFAULT_CACHE_PATH = os.environ.get('LLM_CACHE_PATH', 'llm_cache.db')
+
+
+def normalise_prompt(prompt: str) -> str:
+    """Collapse whitespace so prompts differing only in indentation or line breaks share a key"""
+    return ' '.join(str(prompt).split())
+
+
+def cache_key(prompt: str, params: Optional[Dict] = None) -> str:
+    """Hash of the normalised prompt together with the model parameters that shape the response"""
+    payload = json.dumps({'prompt': normalise_prompt(prompt), 'params': params or {}}, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    Persistent completion cache shared by every worker process on the host
+
+    Entries live in a SQLite file (WAL mode, so readers and a writer do not block each
+    other). An entry expires ttl seconds after it was stored; once the table holds more
+    than max_entries, the least recently used entries are evicted.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, ttl: Optional[float] = 7 * 24 * 3600,
+                 max_entries: Optional[int] = 5000):
+        """
+        Args:
+            path: SQLite file (':memory:' is not shared and only suits single-connection use)
+            ttl: Seconds an entry stays valid; None never expires
+            max_entries: Entries kept before least-recently-used eviction; None for unbounded
+        """
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self.get_connection()
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS llm_responses (
+                key TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_llm_responses_last_used ON llm_responses (last_used)')
+        conn.commit()
+        conn.close()
+
+    def get_connection(self):
+        # A generous busy timeout lets concurrent writers from other processes queue instead of failing
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get(self, key: str) -> Optional[str]:
+        """Cached response for key, or None if absent or expired"""
+        now = time.time()
+        conn = self.get_connection()
+        try:
+            row = conn.execute('SELECT response, created_at FROM llm_responses WHERE key = ?', (key,)).fetchone()
+            if row is not None and self.ttl is not None and now - row[1] > self.ttl:
+                conn.execute('DELETE FROM llm_responses WHERE key = ?', (key,))
+                conn.commit()
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            conn.execute('UPDATE llm_responses SET last_used = ? WHERE key = ?', (now, key))
+            conn.commit()
+            self.hits += 1
+            return row[0]
+        finally:
+            conn.close()
+
+    def put(self, key: str, response: str):
+        """Store a response and evict past max_entries"""
+        now = time.time()
+        conn = self.get_connection()
+        try:
+            conn.execute('''
+                INSERT OR REPLACE INTO llm_responses (key, response, created_at, last_used)
+                VALUES (?, ?, ?, ?)
+            ''', (key, response, now, now))
+            if self.max_entries is not None:
+                conn.execute('''
+                    DELETE FROM llm_responses WHERE key IN (
+                        SELECT key FROM llm_responses ORDER BY last_used DESC LIMIT -1 OFFSET ?
+                    )
+                ''', (self.max_entries,))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def get_or_call(self, prompt: str, params: Optional[Dict], call: Callable[[], str], fresh: bool = False,
+                    validate: Optional[Callable[[str], bool]] = None) -> str:
+        """
+        Serve prompt from the cache, calling the model on a miss
+
+        Args:
+            prompt: Prompt text (normalised for the key)
+            params: Model parameters that change the response (model, temperature, ...)
+            call: Produces the response on a miss; exceptions propagate and nothing is stored
+            fresh: Skip the lookup and store the new response in place of any cached one
+            validate: Whether a response is usable; one that is not (a truncated or unparseable
+                      completion) is returned but never stored, and a stored one counts as a miss
+        """
+        key = cache_key(prompt, params)
+        if not fresh:
+            cached = self.get(key)
+            if cached is not None and (validate is None or validate(cached)):
+                return cached
+        response = call()
+        if response and (validate is None or validate(response)):
+            self.put(key, response)
+        return response
+
+    def purge_expired(self) -> int:
+        """Delete every expired entry and return how many were removed"""
+        if self.ttl is None:
+            return 0
+        conn = self.get_connection()
+        try:
+            cursor = conn.execute('DELETE FROM llm_responses WHERE created_at < ?', (time.time() - self.ttl,))
+            conn.commit()
+            return cursor.rowcount
+        finally:
+            conn.close()
+
+    def clear(self):
+        conn = self.get_connection()
+        try:
+            conn.execute('DELETE FROM llm_responses')
+            conn.commit()
+        finally:
+            conn.close()
+
+    def __len__(self) -> int:
+        conn = self.get_connection()
+        try:
+            return conn.execute('SELECT COUNT(*) FROM llm_responses').fetchone()[0]
+        finally:
+            conn.close()
@@ -0,0 +1,301 @@
+import time
+import random
+import threading
+from collections import Counter, deque
+from typing import Dict, Iterator, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .llm_stream import iter_sse_content
+
+DEFAULT_API_URL = 'https://api.openai.com/v1/chat/completions'
+
+# Worth retrying: rate limiting and server-side failures. Other 4xx responses are the caller's fault.
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class APIError(Exception):
+    """A chat-completions request failed"""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+class CircuitOpenError(APIError):
+    """Raised without calling the endpoint while the circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """
+    Fails fast after repeated upstream failures
+
+    After failure_threshold consecutive failures the circuit opens and every call is
+    refused for reset_timeout seconds. Then one trial call is let through (half-open):
+    success closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self.lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self.lock:
+            if self.opened_at is None:
+                return 'closed'
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                return 'half-open'
+            return 'open'
+
+    def allow(self) -> bool:
+        """Whether a call may go out now"""
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.reset_timeout or self.trial_in_flight:
+                return False
+            self.trial_in_flight = True
+            return True
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.trial_in_flight or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self.trial_in_flight = False
+
+    def release_trial(self):
+        """End a trial call that gave no verdict on upstream health, so the next call can try"""
+        with self.lock:
+            self.trial_in_flight = False
+
+
+class ClientMetrics:
+    """
+    Call and attempt counters with attempt latencies, safe to update from worker threads
+
+    A call is one post() by a caller; its attempts are the HTTP requests it made, retries
+    included. The error rate counts calls that failed for good, not failed attempts.
+    """
+
+    def __init__(self, window: int = 1000):
+        """
+        Args:
+            window: Most recent attempt latencies kept for the percentiles
+        """
+        self.lock = threading.Lock()
+        self.latencies = deque(maxlen=window)
+        self.calls = 0
+        self.failures = 0
+        self.attempts = 0
+        self.attempt_failures = 0
+        self.retries = 0
+        self.short_circuited = 0
+        self.statuses = Counter()
+        self.errors = Counter()
+        self.last_error = None
+
+    def record_attempt(self, latency: float, status: Optional[int] = None, error: Optional[Exception] = None):
+        with self.lock:
+            self.attempts += 1
+            self.latencies.append(latency)
+            if status is not None:
+                self.statuses[status] += 1
+            if error is not None:
+                self.attempt_failures += 1
+                self.errors[type(error).__name__] += 1
+                self.last_error = str(error)
+
+    def record_call(self, error: Optional[BaseException] = None):
+        with self.lock:
+            self.calls += 1
+            if error is not None:
+                self.failures += 1
+
+    def record_retry(self):
+        with self.lock:
+            self.retries += 1
+
+    def record_short_circuit(self):
+        with self.lock:
+            self.short_circuited += 1
+
+    def snapshot(self) -> Dict:
+        """Counts, error rate and latency percentiles (seconds) over the recent window"""
+        with self.lock:
+            latencies = sorted(self.latencies)
+            calls = self.calls
+
+            def percentile(p):
+                if not latencies:
+                    return 0.0
+                return latencies[min(len(latencies) - 1, int(p * len(latencies)))]
+
+            return {
+                'calls': calls,
+                'failures': self.failures,
+                'error_rate': self.failures / calls if calls else 0.0,
+                'attempts': self.attempts,
+                'attempt_failures': self.attempt_failures,
+                'retries': self.retries,
+                'short_circuited': self.short_circuited,
+                'statuses': dict(self.statuses),
+                'errors': dict(self.errors),
+                'last_error': self.last_error,
+                'latency_mean': sum(latencies) / len(latencies) if latencies else 0.0,
+                'latency_p50': percentile(0.5),
+                'latency_p95': percentile(0.95)
+            }
+
+
+class ChatCompletionsClient:
+    """
+    Pooled chat-completions client with timeouts, retries and a circuit breaker
+
+    One requests.Session keeps connections alive across calls (and threads). Each attempt
+    is bounded by connect and read timeouts; 429/5xx responses and connection errors are
+    retried with full-jitter exponential backoff (honouring Retry-After). Consecutive
+    failures open the circuit breaker, so callers fail fast to their fallback.
+    """
+
+    def __init__(self,
+                 api_url: str = DEFAULT_API_URL,
+                 connect_timeout: float = 5.0,
+                 read_timeout: float = 60.0,
+                 max_retries: int = 3,
+                 backoff_base: float = 0.5,
+                 backoff_max: float = 8.0,
+                 pool_size: int = 16,
+                 breaker: Optional[CircuitBreaker] = None,
+                 sleep=time.sleep):
+        """
+        Args:
+            api_url: Chat-completions endpoint
+            connect_timeout: Seconds to establish a connection
+            read_timeout: Seconds to wait between bytes of the response
+            max_retries: Extra attempts after a retryable failure
+            backoff_base: First backoff ceiling in seconds, doubled on each retry
+            backoff_max: Largest backoff ceiling in seconds
+            pool_size: Connections kept alive to the endpoint
+            breaker: Circuit breaker (a fresh one by default)
+            sleep: Sleep function for the backoff (replaceable in tests)
+        """
+        self.api_url = api_url
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker()
+        self.metrics = ClientMetrics()
+        self.sleep = sleep
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Delay before retry number attempt (0-based): Retry-After if given, else full jitter"""
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def post(self, payload: Dict, api_key: str, stream: bool = False) -> requests.Response:
+        """
+        POST a request, retrying transient failures
+
+        Raises:
+            CircuitOpenError: If the breaker is open (no request is sent)
+            APIError: If the request fails for good
+        """
+        if not self.breaker.allow():
+            self.metrics.record_short_circuit()
+            raise CircuitOpenError("ChatGPT API circuit is open after repeated failures")
+        try:
+            response = self._send(payload, api_key, stream)
+        except APIError as e:
+            self.metrics.record_call(e)
+            if e.status is not None and e.status not in RETRY_STATUSES:
+                # A rejected request says nothing about upstream health
+                self.breaker.record_success()
+            else:
+                self.breaker.record_failure()
+            raise
+        except BaseException as e:
+            # Anything else (a bug, an interrupted script) is no verdict on the upstream, but a
+            # half-open trial must still end or the circuit would never close again
+            self.metrics.record_call(e)
+            self.breaker.release_trial()
+            raise
+        self.metrics.record_call()
+        self.breaker.record_success()
+        return response
+
+    def _send(self, payload: Dict, api_key: str, stream: bool) -> requests.Response:
+        """Attempt the request until it succeeds, fails for good or runs out of retries"""
+        headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json"
+        }
+        for attempt in range(self.max_retries + 1):
+            start = time.perf_counter()
+            retry_after = None
+            try:
+                response = self.session.post(self.api_url, headers=headers, json=payload,
+                                             timeout=self.timeout, stream=stream)
+            except requests.RequestException as e:
+                error = APIError(f"API call failed: {e}")
+                self.metrics.record_attempt(time.perf_counter() - start, error=error)
+            else:
+                status = response.status_code
+                if status == 200:
+                    self.metrics.record_attempt(time.perf_counter() - start, status)
+                    return response
+                error = APIError(f"API call failed: {status}", status)
+                self.metrics.record_attempt(time.perf_counter() - start, status, error)
+                retry_after = response.headers.get('Retry-After')
+                response.close()
+                if status not in RETRY_STATUSES:
+                    raise error
+            if attempt == self.max_retries:
+                break
+            self.metrics.record_retry()
+            self.sleep(self.backoff(attempt, retry_after))
+        raise error
+
+    def complete(self, payload: Dict, api_key: str) -> str:
+        """Completion text of a non-streamed request"""
+        response = self.post(payload, api_key)
+        return response.json()["choices"][0]["message"]["content"]
+
+    def stream(self, payload: Dict, api_key: str) -> Iterator[str]:
+        """Completion text fragments of a streamed request, as they arrive"""
+        with self.post(dict(payload, stream=True), api_key, stream=True) as response:
+            yield from iter_sse_content(response.iter_lines())
+
+
+_shared_clients: Dict[str, ChatCompletionsClient] = {}
+_shared_lock = threading.Lock()
+
+
+def shared_client(api_url: str = DEFAULT_API_URL) -> ChatCompletionsClient:
+    """Process-wide client per endpoint, so sessions share connections, breaker and metrics"""
+    with _shared_lock:
+        client = _shared_clients.get(api_url)
+        if client is None:
+            client = _shared_clients[api_url] = ChatCompletionsClient(api_url)
+        return client
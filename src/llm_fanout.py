@@ -0,0 +1,43 @@
+from typing import Callable, Dict, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+
+from .dedup import DuplicateFilter, deduplicate_questions
+
+# (topics, number of questions) for one request
+Chunk = Tuple[List[str], int]
+
+
+def fan_out(chunks: List[Chunk],
+            generate_chunk: Callable[[List[str], int], List[Dict]],
+            max_concurrency: int = 4,
+            fallback: Optional[Callable[[List[str], int], List[Dict]]] = None,
+            near_duplicate_threshold: Optional[float] = None) -> List[Dict]:
+    """
+    Run one generation request per chunk in parallel and merge the results
+
+    Args:
+        chunks: (topics, count) requests, e.g. from TokenBudget.plan
+        generate_chunk: Called as generate_chunk(topics, count) from a worker thread; must not touch the UI
+        max_concurrency: Requests in flight at once
+        fallback: Called as fallback(topics, count) for a chunk whose request raised; None skips the chunk
+        near_duplicate_threshold: Also drop near-duplicates across chunks (see DuplicateFilter)
+
+    Returns:
+        The questions of every chunk, in chunk order, with duplicates removed
+    """
+    if not chunks:
+        return []
+
+    def run(chunk: Chunk) -> List[Dict]:
+        topics, count = chunk
+        try:
+            return generate_chunk(topics, count) or []
+        except Exception as e:
+            print(f"Error generating questions for {', '.join(topics)}: {e}")
+            return fallback(topics, count) if fallback else []
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(chunks)))) as executor:
+        results = list(executor.map(run, chunks))
+
+    merged = [q for questions in results for q in questions if q.get('question')]
+    return deduplicate_questions(merged, duplicate_filter=DuplicateFilter(near_duplicate_threshold))
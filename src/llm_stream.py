@@ -0,0 +1,120 @@
+import re
+import json
+from typing import Dict, Iterable, Iterator, List, Union
+
+_TRAILING_COMMA = re.compile(r',\s*([}\]])')
+
+
+def iter_sse_content(lines: Iterable[Union[str, bytes]]) -> Iterator[str]:
+    """
+    Yield the text deltas of a streamed chat-completions response
+
+    Consumes the server-sent event lines ('data: {...}', ending with 'data: [DONE]')
+    and yields each choices[0].delta.content fragment as it arrives.
+    """
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        line = line.strip()
+        if not line.startswith('data:'):
+            continue
+        data = line[len('data:'):].strip()
+        if data == '[DONE]':
+            return
+        try:
+            event = json.loads(data)
+        except ValueError:
+            continue
+        for choice in event.get('choices', []):
+            content = (choice.get('delta') or {}).get('content')
+            if content:
+                yield content
+
+
+class QuestionStreamParser:
+    """
+    Incrementally pull complete question objects out of a streamed JSON completion
+
+    Feed text fragments in arrival order; every object that sits directly in an array
+    (e.g. each entry of {"questions": [...]}) is returned as soon as its closing brace
+    arrives, however deeply the array is nested. Text before the first '{' or '[' (prose,
+    code fences) is ignored, and so is a bracketed aside that closes without yielding a
+    question: scanning resumes after it. A truncated stream loses only the unfinished object.
+    """
+
+    def __init__(self):
+        self.buffer = []
+        # (opening bracket, buffer offset) for every open container
+        self.stack = []
+        self.started = False
+        self.in_string = False
+        self.escape = False
+
+    def feed(self, chunk: str) -> List[Dict]:
+        """Consume a fragment and return the question objects it completed"""
+        found = []
+        buffer = self.buffer
+        for ch in chunk:
+            if not self.started:
+                if ch not in '{[':
+                    continue
+                self.started = True
+                buffer.clear()
+
+            buffer.append(ch)
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif ch == '\\':
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+                continue
+
+            if ch == '"':
+                self.in_string = True
+            elif ch == '{' or ch == '[':
+                self.stack.append((ch, len(buffer) - 1))
+            elif ch == '}' or ch == ']':
+                if not self.stack:
+                    continue
+                opening, start = self.stack.pop()
+                if ch == '}' and opening == '{' and self.stack and self.stack[-1][0] == '[':
+                    question = self._decode(''.join(buffer[start:]))
+                    if question is not None:
+                        found.append(question)
+                if not self.stack:
+                    # A complete top-level value; look for the next one
+                    self.started = False
+        return found
+
+    def _decode(self, text: str):
+        try:
+            obj = json.loads(text)
+        except ValueError:
+            # Trailing commas are the most common slip in model-written JSON
+            try:
+                obj = json.loads(_TRAILING_COMMA.sub(r'\1', text))
+            except ValueError:
+                return None
+        if isinstance(obj, dict) and obj.get('question'):
+            return obj
+        return None
+
+
+def iter_streamed_questions(fragments: Iterable[str]) -> Iterator[Dict]:
+    """Yield each question object from a stream of completion text fragments as it completes"""
+    parser = QuestionStreamParser()
+    for fragment in fragments:
+        yield from parser.feed(fragment)
+
+
+def parse_questions(text: str) -> List[Dict]:
+    """Every complete question object in a (possibly truncated or prose-wrapped) completion"""
+    return QuestionStreamParser().feed(text)
+
+
+def is_complete_response(text: str) -> bool:
+    """Whether a completion holds at least one question and was not cut off mid-JSON (worth caching)"""
+    parser = QuestionStreamParser()
+    return bool(parser.feed(text)) and not parser.stack
@@ -0,0 +1,219 @@
+import os
+import sys
+import json
+import time
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+from typing import Dict, List, Optional
+
+# A Hugging Face model id or a local checkpoint directory (e.g. a small or quantised CPU model)
+DEFAULT_LOCAL_MODEL = os.environ.get('LOCAL_LLM_MODEL', 'mistralai/Mistral-7B-Instruct-v0.2')
+
+
+class LocalLLMServer:
+    """
+    One text-generation pipeline per process, serving concurrent prompts in micro-batches
+
+    The model is loaded on first use (or by warmup()) and kept for the life of the process.
+    Prompts submitted from different threads within max_wait of each other are run as one
+    batched pipeline call, grouped by generation settings. On CPU, quantize=True applies
+    dynamic int8 quantisation to the linear layers after loading.
+    """
+
+    def __init__(self,
+                 model: str = DEFAULT_LOCAL_MODEL,
+                 max_batch_size: int = 8,
+                 max_wait: float = 0.02,
+                 device: Optional[int] = None,
+                 quantize: bool = False,
+                 generation_defaults: Optional[Dict] = None):
+        """
+        Args:
+            model: Model id or local checkpoint path
+            max_batch_size: Most prompts per pipeline call
+            max_wait: Seconds to wait for more prompts before running a batch
+            device: Pipeline device; defaults to the first GPU, or CPU
+            quantize: Dynamic int8 quantisation of linear layers (CPU only)
+            generation_defaults: Generation settings used unless a call overrides them
+        """
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.device = device
+        self.quantize = quantize
+        self.generation_defaults = generation_defaults or {'max_new_tokens': 512, 'do_sample': True, 'temperature': 0.7}
+        self.pipe = None
+        self.load_lock = threading.Lock()
+        self.requests = queue.Queue()
+        self.worker = None
+        self.warmup_thread = None
+        self.stats = {'requests': 0, 'batches': 0, 'largest_batch': 0, 'load_seconds': 0.0}
+
+    def load(self):
+        """Load the pipeline once; later calls return the loaded one"""
+        if self.pipe is not None:
+            return self.pipe
+        with self.load_lock:
+            if self.pipe is None:
+                import torch
+                from transformers import pipeline
+
+                start = time.perf_counter()
+                device = self.device
+                if device is None:
+                    device = 0 if torch.cuda.is_available() else -1
+                pipe = pipeline("text-generation", model=self.model, device=device,
+                                torch_dtype=torch.float16 if device != -1 else torch.float32)
+                # Batched decoder-only generation needs left padding and a pad token
+                pipe.tokenizer.padding_side = 'left'
+                if pipe.tokenizer.pad_token is None:
+                    pipe.tokenizer.pad_token = pipe.tokenizer.eos_token
+                if self.quantize and device == -1:
+                    pipe.model = torch.quantization.quantize_dynamic(pipe.model, {torch.nn.Linear}, dtype=torch.qint8)
+                self.stats['load_seconds'] = time.perf_counter() - start
+                self.pipe = pipe
+        return self.pipe
+
+    def warmup(self, prompt: str = "Generate one question about databases."):
+        """Load the model and run one short generation so the first real request is not slow"""
+        # Through the batching worker: the pipeline is only ever called from that one thread
+        self.generate(prompt, max_new_tokens=4, do_sample=False)
+
+    def start_warmup(self) -> threading.Thread:
+        """Warm up in a background thread (once); returns the thread"""
+        with self.load_lock:
+            if self.warmup_thread is None:
+                self.warmup_thread = threading.Thread(target=self.warmup, daemon=True)
+                self.warmup_thread.start()
+            return self.warmup_thread
+
+    def submit(self, prompt: str, **generation_kwargs) -> Future:
+        """Queue a prompt for the next batch; the future resolves to the generated text"""
+        self._ensure_worker()
+        future = Future()
+        settings = dict(self.generation_defaults, **generation_kwargs)
+        self.requests.put((prompt, settings, future))
+        return future
+
+    def generate(self, prompt: str, timeout: Optional[float] = None, **generation_kwargs) -> str:
+        """
+        Generate text for one prompt (batched with any concurrent callers)
+
+        Raises:
+            concurrent.futures.TimeoutError: If no text arrives within timeout seconds (the prompt
+                is then dropped unless its batch has already started)
+        """
+        future = self.submit(prompt, **generation_kwargs)
+        try:
+            return future.result(timeout)
+        except FuturesTimeoutError:
+            future.cancel()
+            raise
+
+    def _ensure_worker(self):
+        if self.worker is None:
+            with self.load_lock:
+                if self.worker is None:
+                    self.worker = threading.Thread(target=self._serve, daemon=True)
+                    self.worker.start()
+
+    def _serve(self):
+        while True:
+            batch = [self.requests.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.requests.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                self._run_batch(batch)
+            except Exception as e:
+                # The worker serves every later request, so it must outlive a failed batch
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _run_batch(self, batch: List):
+        groups = {}
+        for prompt, settings, future in batch:
+            # Drop prompts whose callers cancelled; the rest can no longer be cancelled
+            if not future.set_running_or_notify_cancel():
+                continue
+            key = json.dumps(settings, sort_keys=True, default=str)
+            groups.setdefault(key, (settings, []))[1].append((prompt, future))
+        for settings, items in groups.values():
+            try:
+                pipe = self.load()
+                outputs = pipe([prompt for prompt, _ in items], batch_size=len(items), **settings)
+            except Exception as e:
+                for _, future in items:
+                    future.set_exception(e)
+                continue
+            self.stats['requests'] += len(items)
+            self.stats['batches'] += 1
+            self.stats['largest_batch'] = max(self.stats['largest_batch'], len(items))
+            for (_, future), output in zip(items, outputs):
+                future.set_result(output[0]['generated_text'])
+
+
+_servers: Dict[str, LocalLLMServer] = {}
+_servers_lock = threading.Lock()
+
+
+def get_local_llm(model: Optional[str] = None, **options) -> LocalLLMServer:
+    """Process-wide server per model; options apply only when the server is first created"""
+    model = model or DEFAULT_LOCAL_MODEL
+    with _servers_lock:
+        server = _servers.get(model)
+        if server is None:
+            server = _servers[model] = LocalLLMServer(model, **options)
+        return server
+
+
+def benchmark(server: LocalLLMServer, prompts: List[str], concurrency: int = 8, **generation_kwargs) -> Dict:
+    """
+    Measure latency and throughput with concurrency callers submitting prompts
+
+    Returns:
+        Load time, per-request latency (mean/p95, seconds), requests per second and batch counts
+    """
+    server.warmup()
+    server.stats.update(requests=0, batches=0, largest_batch=0)
+
+    def timed(prompt):
+        start = time.perf_counter()
+        server.generate(prompt, **generation_kwargs)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = sorted(executor.map(timed, prompts))
+    elapsed = time.perf_counter() - start
+    return {
+        'load_seconds': server.stats['load_seconds'],
+        'requests': len(prompts),
+        'throughput': len(prompts) / elapsed if elapsed else 0.0,
+        'latency_mean': sum(latencies) / len(latencies) if latencies else 0.0,
+        'latency_p95': latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))] if latencies else 0.0,
+        'batches': server.stats['batches'],
+        'largest_batch': server.stats['largest_batch']
+    }
+
+
+if __name__ == '__main__':
+    # CPU benchmark: python -m src.local_llm <model id or local path> [num_prompts] [concurrency]
+    if len(sys.argv) < 2:
+        print("Usage: python -m src.local_llm <model id or local path> [num_prompts] [concurrency]")
+        sys.exit(1)
+    num_prompts = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+    concurrency = int(sys.argv[3]) if len(sys.argv) > 3 else 8
+    prompts = [f"Generate a question about topic {i}." for i in range(num_prompts)]
+    for max_batch_size in (1, concurrency):
+        result = benchmark(LocalLLMServer(sys.argv[1], max_batch_size=max_batch_size, device=-1),
+                           prompts, concurrency, max_new_tokens=32)
+        print(f"max_batch_size={max_batch_size}: {json.dumps(result)}")
@@ -0,0 +1,395 @@
+import re
+import sys
+import json
+import math
+import time
+import random
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence
+
+from .llm_client import APIError, ChatCompletionsClient
+
+LATENCY_DISTRIBUTIONS = ('fixed', 'uniform', 'normal', 'lognormal', 'exponential')
+
+# A request shaped like the ones QuestVibeChatGPT sends (system instructions + per-request line)
+DEFAULT_PAYLOAD = {
+    'model': 'gpt-3.5-turbo',
+    'messages': [
+        {'role': 'system', 'content': 'You are an expert educator creating questions for Database Systems.\n'
+                                      'Question types needed: MCQ, Short Answer, Long Answer\n'
+                                      'Respond with JSON only.'},
+        {'role': 'user', 'content': 'Topics: SQL, Normalization, Transactions\nGenerate 5 questions.'}
+    ],
+    'temperature': 0.7
+}
+
+
+def mock_completion(messages: List[Dict]) -> str:
+    """
+    Completion text for a chat request
+
+    Prompts in QuestVibeChatGPT's format ("Topics: ...", "Generate N questions.",
+    "Question types needed: ...") get a {"questions": [...]} JSON answer covering the
+    topics in turn; anything else gets a short plain-text reply.
+    """
+    text = '\n'.join(str(message.get('content', '')) for message in messages)
+    topics_match = re.search(r'Topics:\s*(.+)', text)
+    count_match = re.search(r'Generate\s+(\d+)\s+questions', text)
+    if not topics_match and not count_match:
+        return "This is a mock completion."
+
+    topics = [t.strip() for t in topics_match.group(1).split(',') if t.strip()] if topics_match else ['General']
+    count = int(count_match.group(1)) if count_match else 5
+    types_match = re.search(r'Question types needed:\s*(.+)', text)
+    types = [t.strip() for t in types_match.group(1).split(',') if t.strip()] if types_match else ['Short Answer']
+    levels = ['Remember', 'Understand', 'Apply', 'Analyze', 'Evaluate', 'Create']
+
+    questions = []
+    for i in range(count):
+        topic = topics[i % len(topics)]
+        question_type = types[i % len(types)]
+        question = {
+            'type': question_type,
+            'question': f"Question {i + 1} on {topic}: explain the role of {topic} in practice.",
+            'difficulty': ['Easy', 'Medium', 'Hard'][i % 3],
+            'bloom_level': levels[i % len(levels)],
+            'topic': topic
+        }
+        if question_type == 'MCQ':
+            question['options'] = [f"{topic} option {letter}" for letter in 'ABCD']
+            question['correct_answer'] = 'A'
+        questions.append(question)
+    return json.dumps({'questions': questions})
+
+
+class _MockHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        mock = self.server.mock
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        mock.begin_request()
+        try:
+            try:
+                request = json.loads(body or b'{}')
+            except ValueError:
+                self.send_json(400, {'error': {'message': 'Invalid JSON body', 'type': 'invalid_request_error'}})
+                return
+
+            retry_after = mock.acquire()
+            if retry_after is not None:
+                mock.count('rate_limited')
+                self.send_json(429, {'error': {'message': 'Rate limit reached', 'type': 'rate_limit_error'}},
+                               {'Retry-After': f"{retry_after:.3f}"})
+                return
+
+            fault = mock.sample_fault()
+            time.sleep(mock.sample_latency() + (mock.hang_seconds if fault == 'hang' else 0))
+            if isinstance(fault, int):
+                mock.count('injected_errors')
+                self.send_json(fault, {'error': {'message': 'Injected failure', 'type': 'server_error'}})
+                return
+
+            content = mock_completion(request.get('messages', []))
+            if request.get('stream'):
+                self.send_stream(content)
+            else:
+                self.send_json(200, {
+                    'id': 'chatcmpl-mock',
+                    'object': 'chat.completion',
+                    'model': request.get('model', 'mock'),
+                    'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content},
+                                 'finish_reason': 'stop'}]
+                })
+        finally:
+            mock.end_request()
+
+    def send_json(self, status: int, body: Dict, headers: Optional[Dict] = None):
+        payload = json.dumps(body).encode('utf-8')
+        self.server.mock.count(status)
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def send_stream(self, content: str):
+        mock = self.server.mock
+        mock.count(200)
+        mock.count('streamed')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        size = max(1, mock.stream_chunk_chars)
+        for i in range(0, len(content), size):
+            event = {'choices': [{'index': 0, 'delta': {'content': content[i:i + size]}}]}
+            self.write_chunk(f"data: {json.dumps(event)}\n\n".encode('utf-8'))
+            time.sleep(mock.stream_interval)
+        self.write_chunk(b'data: [DONE]\n\n')
+        self.wfile.write(b'0\r\n\r\n')
+
+    def write_chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):X}\r\n".encode('ascii') + data + b'\r\n')
+        self.wfile.flush()
+
+    def log_message(self, *args):
+        pass
+
+
+class _MockHTTPServer(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        # Clients dropping pooled keep-alive connections is routine under load
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class MockOpenAIServer:
+    """
+    Offline stand-in for a chat-completions endpoint, for load and latency testing
+
+    Each request waits a latency drawn from the configured distribution. A share of
+    requests can fail with injected 5xx responses or hang past any sensible read
+    timeout, and a token-bucket rate limit answers excess requests with 429 and
+    Retry-After. Streamed requests are answered as server-sent events in small chunks.
+    Point the app at it with OPENAI_API_URL=<server.url>.
+    """
+
+    def __init__(self,
+                 host: str = '127.0.0.1',
+                 port: int = 0,
+                 latency: str = 'lognormal',
+                 latency_mean: float = 0.3,
+                 latency_spread: float = 0.5,
+                 error_rate: float = 0.0,
+                 error_statuses: Sequence[int] = (500, 503),
+                 hang_rate: float = 0.0,
+                 hang_seconds: float = 30.0,
+                 rate_limit: Optional[float] = None,
+                 burst: Optional[int] = None,
+                 stream_chunk_chars: int = 16,
+                 stream_interval: float = 0.01,
+                 seed: Optional[int] = None):
+        """
+        Args:
+            host / port: Address to listen on (port 0 picks a free port)
+            latency: One of LATENCY_DISTRIBUTIONS
+            latency_mean: Mean seconds before responding (the median for 'lognormal')
+            latency_spread: Half-width for 'uniform', standard deviation for 'normal', sigma for 'lognormal'
+            error_rate: Share of requests answered with one of error_statuses
+            error_statuses: Statuses to inject
+            hang_rate: Share of requests that wait an extra hang_seconds
+            hang_seconds: Extra delay of a hung request
+            rate_limit: Requests per second allowed; None for no limit
+            burst: Requests allowed at once before the rate limit applies (defaults to rate_limit)
+            stream_chunk_chars: Characters of completion per streamed event
+            stream_interval: Seconds between streamed events
+            seed: Seed for reproducible latencies and faults
+
+        Raises:
+            ValueError: If latency is not a known distribution
+        """
+        if latency not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution '{latency}'; expected one of {LATENCY_DISTRIBUTIONS}")
+        self.latency = latency
+        self.latency_mean = latency_mean
+        self.latency_spread = latency_spread
+        self.error_rate = error_rate
+        self.error_statuses = list(error_statuses)
+        self.hang_rate = hang_rate
+        self.hang_seconds = hang_seconds
+        self.rate_limit = rate_limit
+        self.burst = burst if burst is not None else max(1, math.ceil(rate_limit or 1))
+        self.stream_chunk_chars = stream_chunk_chars
+        self.stream_interval = stream_interval
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.tokens = float(self.burst)
+        self.refilled_at = time.monotonic()
+        self.active = 0
+        self.counts = Counter()
+        self.peak_concurrency = 0
+
+        self.httpd = _MockHTTPServer((host, port), _MockHandler)
+        self.httpd.mock = self
+        self.thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1/chat/completions"
+
+    def start(self) -> 'MockOpenAIServer':
+        """Serve in a background thread"""
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+            self.thread.start()
+        return self
+
+    def stop(self):
+        if self.thread is not None:
+            self.httpd.shutdown()
+            self.thread = None
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def sample_latency(self) -> float:
+        """Seconds to wait before answering one request"""
+        with self.lock:
+            if self.latency == 'fixed':
+                value = self.latency_mean
+            elif self.latency == 'uniform':
+                value = self.rng.uniform(self.latency_mean - self.latency_spread, self.latency_mean + self.latency_spread)
+            elif self.latency == 'normal':
+                value = self.rng.gauss(self.latency_mean, self.latency_spread)
+            elif self.latency == 'lognormal':
+                value = self.latency_mean * self.rng.lognormvariate(0, self.latency_spread) if self.latency_mean > 0 else 0.0
+            else:
+                value = self.rng.expovariate(1 / self.latency_mean) if self.latency_mean > 0 else 0.0
+        return max(0.0, value)
+
+    def sample_fault(self):
+        """None for a normal answer, an HTTP status to inject, or 'hang'"""
+        with self.lock:
+            roll = self.rng.random()
+            if roll < self.error_rate and self.error_statuses:
+                return self.rng.choice(self.error_statuses)
+            if roll < self.error_rate + self.hang_rate:
+                self.counts['hangs'] += 1
+                return 'hang'
+        return None
+
+    def acquire(self) -> Optional[float]:
+        """Take a rate-limit token: None if the request may proceed, else seconds until one is free"""
+        if self.rate_limit is None:
+            return None
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.refilled_at) * self.rate_limit)
+            self.refilled_at = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return None
+            return (1 - self.tokens) / self.rate_limit
+
+    def begin_request(self):
+        with self.lock:
+            self.counts['requests'] += 1
+            self.active += 1
+            self.peak_concurrency = max(self.peak_concurrency, self.active)
+
+    def end_request(self):
+        with self.lock:
+            self.active -= 1
+
+    def count(self, name):
+        with self.lock:
+            self.counts[name] += 1
+
+    @property
+    def stats(self) -> Dict:
+        """Requests served, per-status counts, injected faults and peak concurrency"""
+        with self.lock:
+            return {
+                'requests': self.counts['requests'],
+                'statuses': {k: v for k, v in self.counts.items() if isinstance(k, int)},
+                'rate_limited': self.counts['rate_limited'],
+                'injected_errors': self.counts['injected_errors'],
+                'hangs': self.counts['hangs'],
+                'streamed': self.counts['streamed'],
+                'peak_concurrency': self.peak_concurrency
+            }
+
+
+def load_test(client: ChatCompletionsClient,
+              num_requests: int = 100,
+              concurrency: int = 10,
+              payload: Optional[Dict] = None,
+              api_key: str = 'mock-key',
+              stream: bool = False) -> Dict:
+    """
+    Drive a client with concurrency callers and measure what they experience
+
+    Latencies are end to end per call, so they include the client's retries and backoff.
+
+    Returns:
+        Successes, failures by error type, throughput, latency mean/p50/p95/p99 (seconds)
+        and the client's own metrics snapshot
+    """
+    payload = payload or DEFAULT_PAYLOAD
+
+    def call(_):
+        start = time.perf_counter()
+        try:
+            if stream:
+                ''.join(client.stream(payload, api_key))
+            else:
+                client.complete(payload, api_key)
+            error = None
+        except APIError as e:
+            error = type(e).__name__ if e.status is None else f"{type(e).__name__} {e.status}"
+        return time.perf_counter() - start, error
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(call, range(num_requests)))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for latency, _ in results)
+    errors = Counter(error for _, error in results if error)
+
+    def percentile(p):
+        if not latencies:
+            return 0.0
+        return latencies[min(len(latencies) - 1, int(p * len(latencies)))]
+
+    return {
+        'requests': num_requests,
+        'succeeded': num_requests - sum(errors.values()),
+        'failed': sum(errors.values()),
+        'errors': dict(errors),
+        'elapsed': elapsed,
+        'throughput': num_requests / elapsed if elapsed else 0.0,
+        'latency_mean': sum(latencies) / len(latencies) if latencies else 0.0,
+        'latency_p50': percentile(0.5),
+        'latency_p95': percentile(0.95),
+        'latency_p99': percentile(0.99),
+        'client': client.metrics.snapshot()
+    }
+
+
+if __name__ == '__main__':
+    # Serve for the app:   python -m src.mock_openai_server serve [port]
+    # Load test offline:   python -m src.mock_openai_server load [num_requests] [concurrency] [error_rate]
+    mode = sys.argv[1] if len(sys.argv) > 1 else 'load'
+    if mode == 'serve':
+        server = MockOpenAIServer(port=int(sys.argv[2]) if len(sys.argv) > 2 else 8099)
+        print(f"Mock chat-completions endpoint at {server.url}")
+        print(f"Run the app with OPENAI_API_URL={server.url}")
+        try:
+            server.httpd.serve_forever()
+        except KeyboardInterrupt:
+            server.stop()
+    elif mode == 'load':
+        num_requests = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+        concurrency = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+        error_rate = float(sys.argv[4]) if len(sys.argv) > 4 else 0.05
+        with MockOpenAIServer(latency_mean=0.1, error_rate=error_rate, rate_limit=100, seed=0) as server:
+            for stream in (False, True):
+                client = ChatCompletionsClient(server.url, read_timeout=5, pool_size=concurrency)
+                result = load_test(client, num_requests, concurrency, stream=stream)
+                print(f"stream={stream}: {json.dumps(result)}")
+            print(f"server: {json.dumps(server.stats)}")
+    else:
+        print("Usage: python -m src.mock_openai_server [serve [port] | load [num_requests] [concurrency] [error_rate]]")
+        sys.exit(1)
@@ -1,12 +1,67 @@
 import random
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 import re
 
+from .template_engine import CompiledTemplate, compile_templates
+from .lru_cache import LRUCache
+
 class ModelAnswerGenerator:
-    def __init__(self):
+    def __init__(self, cache_size: Optional[int] = 1024):
+        """
+        Args:
+            cache_size: Entries kept per answer component cache; None for unbounded, 0 disables caching
+        """
         self.answer_templates = self._load_answer_templates()
         self.marking_schemes = self._load_marking_schemes()
         self.alternative_approaches = self._load_alternative_approaches()
+        # Templates are parsed once; each render resolves only the placeholders it uses
+        self.compiled_templates = compile_templates(self.answer_templates)
+        self.fallback_template = CompiledTemplate('Provide a comprehensive answer about {topic}.')
+        self.placeholder_resolvers = {
+            'correct_option': self._get_correct_option,
+            'definition': self._get_definition,
+            'explanation': self._get_explanation,
+            'application_logic': self._get_application_logic,
+            'analysis_reasoning': self._get_analysis_reasoning,
+            'evaluation_criteria': self._get_evaluation_criteria,
+            'creative_solution': self._get_creative_solution,
+            'key_points': self._get_key_points_text,
+            'significance': self._get_significance,
+            'application_steps': self._get_application_steps,
+            'expected_result': self._get_expected_result,
+            'analysis_points': self._get_analysis_points,
+            'related_factor': self._get_related_factor,
+            'relationship_insight': self._get_relationship_insight,
+            'evaluation_points': self._get_evaluation_points,
+            'effectiveness_assessment': self._get_effectiveness_assessment,
+            'creative_elements': self._get_creative_elements,
+            'addressed_challenges': self._get_addressed_challenges,
+            # Additional placeholders for long answers
+            'scope_description': self._get_scope_description,
+            'historical_phases': self._get_historical_phases,
+            'component_1': lambda topic: self._get_component(topic, 1),
+            'component_2': lambda topic: self._get_component(topic, 2),
+            'component_3': lambda topic: self._get_component(topic, 3),
+            'principle_1': lambda topic: self._get_principle(topic, 1),
+            'principle_2': lambda topic: self._get_principle(topic, 2),
+            'principle_3': lambda topic: self._get_principle(topic, 3),
+            'current_applications': self._get_current_applications,
+            'case_background': self._get_case_background,
+            'issue_1': lambda topic: self._get_issue(topic, 1),
+            'issue_2': lambda topic: self._get_issue(topic, 2),
+            'issue_3': lambda topic: self._get_issue(topic, 3)
+        }
+        # Every answer component is deterministic, so each is memoised on exactly the
+        # inputs it reads: a new topic re-renders the topic-dependent parts only
+        self.caches = {
+            'main_answer': LRUCache(cache_size),        # (topic, type, Bloom)
+            'marking_scheme': LRUCache(cache_size),     # (type, marks)
+            'alternative_approaches': LRUCache(cache_size),  # (topic key, Bloom)
+            'key_points': LRUCache(cache_size),         # (topic, Bloom)
+            'expected_length': LRUCache(cache_size),    # type
+            'common_mistakes': LRUCache(cache_size),    # (topic, type)
+            'examiner_notes': LRUCache(cache_size)      # (topic, Bloom)
+        }
         
     def _load_answer_templates(self) -> Dict:
         """Load answer templates for different question types and cognitive levels"""
@@ -269,79 +324,94 @@ Analysis Approach:
         }
     
     def generate_model_answer(self, question: Dict) -> Dict:
-        """Generate comprehensive model answer for a question"""
+        """
+        Generate comprehensive model answer for a question
+
+        Components are served from the per-component caches; they are shared between
+        answers, so treat the returned lists and dicts as read-only.
+        """
         qtype = question.get('type', 'Short Answer')
         bloom_level = question.get('bloom_level', 'Understand')
         topic = question.get('topic', 'general topic')
         difficulty = question.get('difficulty', 'Medium')
-        
-        # Generate main answer
-        main_answer = self._generate_main_answer(topic, qtype, bloom_level, difficulty)
-        
-        # Generate marking scheme
-        marking_scheme = self._generate_marking_scheme(qtype, question.get('marks', 5))
-        
-        # Generate alternative approaches
-        alternative_approaches = self._generate_alternative_approaches(topic, qtype, bloom_level)
-        
-        # Generate key points
-        key_points = self._generate_key_points(topic, qtype, bloom_level)
+        marks = question.get('marks', 5)
+        caches = self.caches
         
         return {
-            'main_answer': main_answer,
-            'marking_scheme': marking_scheme,
-            'alternative_approaches': alternative_approaches,
-            'key_points': key_points,
-            'expected_length': self._get_expected_length(qtype, bloom_level),
-            'common_mistakes': self._get_common_mistakes(topic, qtype),
-            'examiner_notes': self._get_examiner_notes(topic, qtype, bloom_level)
+            'main_answer': caches['main_answer'].get_or_compute(
+                (topic, qtype, bloom_level),
+                lambda: self._generate_main_answer(topic, qtype, bloom_level, difficulty)),
+            'marking_scheme': caches['marking_scheme'].get_or_compute(
+                (qtype, marks),
+                lambda: self._generate_marking_scheme(qtype, marks)),
+            'alternative_approaches': caches['alternative_approaches'].get_or_compute(
+                (self._get_topic_key(topic), bloom_level),
+                lambda: self._generate_alternative_approaches(topic, qtype, bloom_level)),
+            'key_points': caches['key_points'].get_or_compute(
+                (topic, bloom_level),
+                lambda: self._generate_key_points(topic, qtype, bloom_level)),
+            'expected_length': caches['expected_length'].get_or_compute(
+                qtype,
+                lambda: self._get_expected_length(qtype, bloom_level)),
+            'common_mistakes': caches['common_mistakes'].get_or_compute(
+                (topic, qtype),
+                lambda: self._get_common_mistakes(topic, qtype)),
+            'examiner_notes': caches['examiner_notes'].get_or_compute(
+                (topic, bloom_level),
+                lambda: self._get_examiner_notes(topic, qtype, bloom_level))
         }
     
+    def generate_model_answers(self, questions: List[Dict]) -> List[Dict]:
+        """
+        Generate the model answers for a whole paper, in question order
+
+        Questions with the same topic, type, Bloom level and marks share one answer dict.
+        """
+        answers = []
+        seen = {}
+        for question in questions:
+            key = (question.get('topic', 'general topic'), question.get('type', 'Short Answer'),
+                   question.get('bloom_level', 'Understand'), question.get('marks', 5))
+            answer = seen.get(key)
+            if answer is None:
+                answer = seen[key] = self.generate_model_answer(question)
+            answers.append(answer)
+        return answers
+    
+    def answer_for(self, question: Dict) -> Dict:
+        """Model answer of a question, generated on first use and kept on the question as 'model_answer'"""
+        answer = question.get('model_answer')
+        if answer is None:
+            answer = question['model_answer'] = self.generate_model_answer(question)
+        return answer
+    
+    def answer_key(self, question_paper: Dict) -> List[Dict]:
+        """Model answers of every question in a paper, generating only those not yet on the paper"""
+        return [self.answer_for(question) for question in question_paper.get('questions', [])]
+    
+    def clear_caches(self):
+        """Drop every cached answer component (e.g. after editing the templates)"""
+        for cache in self.caches.values():
+            cache.clear()
+    
     def _generate_main_answer(self, topic: str, qtype: str, bloom_level: str, difficulty: str) -> str:
         """Generate the main model answer"""
-        template = self.answer_templates.get(qtype, {}).get(bloom_level, '')
+        template = self.compiled_templates.get(qtype, {}).get(bloom_level)
         
-        if not template:
-            template = f"Provide a comprehensive answer about {topic}."
+        if template is None:
+            template = self.fallback_template
         
-        # Replace placeholders
-        answer = template.format(
-            topic=topic,
-            correct_option=self._get_correct_option(topic),
-            definition=self._get_definition(topic),
-            explanation=self._get_explanation(topic),
-            application_logic=self._get_application_logic(topic),
-            analysis_reasoning=self._get_analysis_reasoning(topic),
-            evaluation_criteria=self._get_evaluation_criteria(topic),
-            creative_solution=self._get_creative_solution(topic),
-            key_points=self._get_key_points_text(topic),
-            significance=self._get_significance(topic),
-            application_steps=self._get_application_steps(topic),
-            expected_result=self._get_expected_result(topic),
-            analysis_points=self._get_analysis_points(topic),
-            related_factor=self._get_related_factor(topic),
-            relationship_insight=self._get_relationship_insight(topic),
-            evaluation_points=self._get_evaluation_points(topic),
-            effectiveness_assessment=self._get_effectiveness_assessment(topic),
-            creative_elements=self._get_creative_elements(topic),
-            addressed_challenges=self._get_addressed_challenges(topic),
-            # Additional placeholders for long answers
-            scope_description=self._get_scope_description(topic),
-            historical_phases=self._get_historical_phases(topic),
-            component_1=self._get_component(topic, 1),
-            component_2=self._get_component(topic, 2),
-            component_3=self._get_component(topic, 3),
-            principle_1=self._get_principle(topic, 1),
-            principle_2=self._get_principle(topic, 2),
-            principle_3=self._get_principle(topic, 3),
-            current_applications=self._get_current_applications(topic),
-            case_background=self._get_case_background(topic),
-            issue_1=self._get_issue(topic, 1),
-            issue_2=self._get_issue(topic, 2),
-            issue_3=self._get_issue(topic, 3)
-        )
+        # Replace only the placeholders this template uses
+        resolvers = self.placeholder_resolvers
         
-        return answer
+        def resolve(field):
+            if field == 'topic':
+                return topic
+            if field in resolvers:
+                return resolvers[field](topic)
+            return self._get_generic_placeholder(topic, field)
+        
+        return template.render(resolve)
     
     def _generate_marking_scheme(self, qtype: str, total_marks: int) -> Dict:
         """Generate detailed marking scheme"""
@@ -534,6 +604,11 @@ Analysis Approach:
         issues = [f"implementation challenges with {topic}", f"performance issues related to {topic}", f"integration problems with {topic}"]
         return issues[num - 1] if num <= len(issues) else f"{topic} issue {num}"
     
+    def _get_generic_placeholder(self, topic: str, field: str) -> str:
+        """Fill template fields that have no dedicated helper (e.g. mechanism_1)"""
+        name = re.sub(r'_\d+$', '', field).replace('_', ' ')
+        return f"{name} of {topic}"
+    
     def _get_topic_key(self, topic: str) -> str:
         """Extract key topic for approach matching"""
         topic_lower = topic.lower()
@@ -0,0 +1,64 @@
+import os
+import time
+import threading
+from typing import Any, Callable, Dict, Tuple
+
+# Sentence-transformers model behind KeyBERT and the question/topic embeddings
+DEFAULT_EMBEDDING_MODEL = os.environ.get('EMBEDDING_MODEL', 'all-MiniLM-L6-v2')
+DEFAULT_SPACY_MODEL = os.environ.get('SPACY_MODEL', 'en_core_web_sm')
+
+_models: Dict[Tuple, Any] = {}
+_load_seconds: Dict[Tuple, float] = {}
+_key_locks: Dict[Tuple, threading.Lock] = {}
+_registry_lock = threading.Lock()
+
+
+def load_shared(key: Tuple, loader: Callable[[], Any]) -> Any:
+    """
+    Process-wide instance for key, created by loader on first use
+
+    Each key has its own lock, so one slow load does not hold up another model, and
+    concurrent first callers for the same key wait for a single load.
+    """
+    model = _models.get(key)
+    if model is not None:
+        return model
+    with _registry_lock:
+        lock = _key_locks.setdefault(key, threading.Lock())
+    with lock:
+        model = _models.get(key)
+        if model is None:
+            start = time.perf_counter()
+            model = loader()
+            _load_seconds[key] = time.perf_counter() - start
+            _models[key] = model
+    return model
+
+
+def get_sentence_model(name: str = DEFAULT_EMBEDDING_MODEL):
+    """Shared SentenceTransformer"""
+    def load():
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(name)
+    return load_shared(('sentence-transformers', name), load)
+
+
+def get_keybert(name: str = DEFAULT_EMBEDDING_MODEL):
+    """Shared KeyBERT, built on the shared SentenceTransformer so the weights are held once"""
+    def load():
+        from keybert import KeyBERT
+        return KeyBERT(model=get_sentence_model(name))
+    return load_shared(('keybert', name), load)
+
+
+def get_spacy(name: str = DEFAULT_SPACY_MODEL):
+    """Shared spaCy pipeline (callers disable components per call with select_pipes/disable)"""
+    def load():
+        import spacy
+        return spacy.load(name)
+    return load_shared(('spacy', name), load)
+
+
+def loaded_models() -> Dict[str, float]:
+    """Models loaded in this process, with the seconds each took to load"""
+    return {':'.join(key): seconds for key, seconds in _load_seconds.items()}
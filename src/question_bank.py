@@ -0,0 +1,231 @@
+import os
+import gzip
+import json
+import random
+import hashlib
+import threading
+from typing import List, Dict, Optional, Tuple
+
+DEFAULT_BANK_DIR = os.environ.get('QUESTION_BANK_DIR', 'question_bank')
+
+# (subject, topic, question type, Bloom level, difficulty); flat template sets leave the last two as None
+StratumKey = Tuple[str, str, str, Optional[str], Optional[str]]
+
+
+def default_bank_path(name: str) -> str:
+    """Path of the bank file for one template set (one file per app, since template sets differ)"""
+    return os.path.join(DEFAULT_BANK_DIR, f"{name}.json.gz")
+
+
+def templates_fingerprint(templates: Dict) -> str:
+    """Stable hash of a template set; a change invalidates every pre-rendered question"""
+    return hashlib.sha1(json.dumps(templates, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class QuestionBank:
+    """
+    Pre-rendered question texts per (subject, topic, type, Bloom, difficulty), with an
+    in-memory index so that drawing a question is a dictionary lookup instead of a render
+
+    Two template shapes are supported:
+        flat:   {type: [template, ...]} using {topic} and {subject}; Bloom and difficulty are None
+        nested: {type: {bloom: [template, ...]}} rendered through an AdvancedQuestionGenerator,
+                which fills the extra placeholders; every difficulty level of the generator
+                gets a stratum, sharing one text list because difficulty does not change the wording
+
+    The bank is stored as gzipped JSON and refreshed incrementally by sync().
+    """
+
+    def __init__(self, templates: Dict, path: Optional[str] = None, generator=None, per_stratum: int = 6):
+        """
+        Args:
+            templates: Template set to pre-render (flat or nested, see above)
+            path: Bank file; None keeps the bank in memory only
+            generator: AdvancedQuestionGenerator used to render nested templates
+            per_stratum: Distinct renders to keep per stratum for nested templates
+        """
+        self.templates = templates
+        self.path = path
+        self.generator = generator
+        self.per_stratum = per_stratum
+        self.fingerprint = templates_fingerprint(templates)
+        self.strata: Dict[StratumKey, List[str]] = {}
+        # Partial keys (Bloom and/or difficulty replaced by None) -> full stratum keys
+        self.index: Dict[StratumKey, List[StratumKey]] = {}
+        self.subject_topics: Dict[str, set] = {}
+        if path and os.path.exists(path):
+            self.load()
+
+    # ----- building -----
+
+    def sync(self, subject: str, topics: List[str], seed: int = 0) -> Dict[str, int]:
+        """
+        Bring one subject in line with its syllabus, rendering only what is missing
+
+        Topics no longer in the syllabus are dropped. A changed template set drops the
+        whole bank first (detected on load). The file is rewritten only when something changed.
+
+        Returns:
+            Counts of topics added and removed
+        """
+        current = self.subject_topics.get(subject, set())
+        wanted = list(dict.fromkeys(topics))
+        removed = [topic for topic in current if topic not in set(wanted)]
+        added = [topic for topic in wanted if topic not in current]
+
+        for topic in removed:
+            self._remove_topic(subject, topic)
+        rng = random.Random(seed)
+        for topic in added:
+            for key, texts in self._render_topic(subject, topic, rng):
+                self._add_stratum(key, texts)
+
+        if (added or removed) and self.path:
+            self.save()
+        return {'added': len(added), 'removed': len(removed)}
+
+    def _render_topic(self, subject: str, topic: str, rng):
+        for qtype, templates in self.templates.items():
+            if isinstance(templates, list):
+                texts = [template.format(topic=topic, subject=subject) for template in templates]
+                yield (subject, topic, qtype, None, None), list(dict.fromkeys(texts))
+                continue
+            for bloom_level in templates:
+                texts = self._render_nested(topic, qtype, bloom_level, rng)
+                for difficulty in self.generator.difficulty_markers:
+                    yield (subject, topic, qtype, bloom_level, difficulty), texts
+
+    def _render_nested(self, topic: str, qtype: str, bloom_level: str, rng) -> List[str]:
+        texts = []
+        for _ in range(self.per_stratum * 3):
+            text = self.generator._generate_question_text(topic, qtype, bloom_level, None, rng)
+            if text not in texts:
+                texts.append(text)
+                if len(texts) == self.per_stratum:
+                    break
+        return texts
+
+    def _add_stratum(self, key: StratumKey, texts: List[str]):
+        if not texts:
+            return
+        self.strata[key] = texts
+        subject, topic, qtype, bloom_level, difficulty = key
+        self.subject_topics.setdefault(subject, set()).add(topic)
+        for partial_bloom in {bloom_level, None}:
+            for partial_difficulty in {difficulty, None}:
+                self.index.setdefault((subject, topic, qtype, partial_bloom, partial_difficulty), []).append(key)
+
+    def _remove_topic(self, subject: str, topic: str):
+        for key in [k for k in self.strata if k[0] == subject and k[1] == topic]:
+            del self.strata[key]
+        for key in [k for k in self.index if k[0] == subject and k[1] == topic]:
+            del self.index[key]
+        self.subject_topics[subject].discard(topic)
+
+    # ----- sampling -----
+
+    def sample(self,
+               subject: str,
+               topic: str,
+               qtype: str,
+               bloom_level: Optional[str] = None,
+               difficulty: Optional[str] = None,
+               rng=random,
+               exclude=None) -> Optional[Dict]:
+        """
+        Draw one pre-rendered question in O(1)
+
+        Bloom level and difficulty narrow the draw when given; otherwise a stratum is picked
+        uniformly. Returns None when the bank has nothing for the request, so callers can
+        fall back to rendering. exclude holds the texts already used (anything supporting
+        `in`, such as a DuplicateFilter); once every text of the drawn stratum is excluded,
+        None is returned too, so a live render replaces what would be a repeat.
+        """
+        keys = self.index.get((subject, topic, qtype, bloom_level, difficulty))
+        if not keys:
+            return None
+        key = keys[0] if len(keys) == 1 else rng.choice(keys)
+        texts = self.strata[key]
+        if exclude is not None:
+            texts = [text for text in texts if text not in exclude]
+            if not texts:
+                return None
+        return {
+            'question': rng.choice(texts),
+            'type': qtype,
+            'topic': topic,
+            'bloom_level': key[3],
+            'difficulty': key[4]
+        }
+
+    def __len__(self) -> int:
+        """Number of distinct pre-rendered texts (lists shared across difficulties count once)"""
+        unique = {id(texts): len(texts) for texts in self.strata.values()}
+        return sum(unique.values())
+
+    # ----- persistence -----
+
+    def save(self, path: Optional[str] = None) -> str:
+        """Write the bank as gzipped JSON, grouped by subject and topic, storing shared text lists once"""
+        path = path or self.path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        subjects = {}
+        shared = {}
+        for (subject, topic, qtype, bloom_level, difficulty), texts in self.strata.items():
+            entry = shared.get((subject, topic, id(texts)))
+            if entry is None:
+                entry = shared[(subject, topic, id(texts))] = [qtype, bloom_level, [], texts]
+                subjects.setdefault(subject, {}).setdefault(topic, []).append(entry)
+            entry[2].append(difficulty)
+        state = {'fingerprint': self.fingerprint, 'per_stratum': self.per_stratum, 'subjects': subjects}
+        tmp_path = path + '.tmp'
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+            json.dump(state, f, separators=(',', ':'))
+        os.replace(tmp_path, path)
+        return path
+
+    def load(self, path: Optional[str] = None) -> bool:
+        """Load a saved bank; a bank built from other templates is discarded. Returns True if loaded"""
+        path = path or self.path
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                state = json.load(f)
+        except Exception as e:
+            print(f"Error loading question bank: {e}")
+            return False
+        if state.get('fingerprint') != self.fingerprint or state.get('per_stratum') != self.per_stratum:
+            return False
+        for subject, topics in state['subjects'].items():
+            for topic, strata in topics.items():
+                for qtype, bloom_level, difficulties, texts in strata:
+                    for difficulty in difficulties:
+                        self._add_stratum((subject, topic, qtype, bloom_level, difficulty), texts)
+        return True
+
+
+_banks: Dict[str, QuestionBank] = {}
+_banks_lock = threading.Lock()
+
+
+def get_question_bank(name: str, templates: Dict, syllabus: Dict[str, List[str]]) -> QuestionBank:
+    """
+    Process-wide bank for one app's template set, synced with its syllabus on first use
+
+    The bank lives at default_bank_path(name), so papers are drawn by index lookup from
+    the first request on and later processes only render what changed.
+
+    Args:
+        name: App name, used for the bank file
+        templates: The app's flat template set
+        syllabus: Subject -> topics to pre-render
+    """
+    with _banks_lock:
+        bank = _banks.get(name)
+        if bank is None:
+            bank = QuestionBank(templates, path=default_bank_path(name))
+            for subject, topics in syllabus.items():
+                bank.sync(subject, topics)
+            _banks[name] = bank
+        return bank
@@ -0,0 +1,154 @@
+import os
+from typing import List, Dict, Optional, Union, Callable
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from .advanced_analyzer import AdvancedExamAnalyzer
+
+
+def _analyze_shard(papers: List[Dict], syllabus_topics: Optional[List[str]] = None,
+                   num_predictions: int = 10) -> Dict:
+    """Run the per-shard analytics in a worker process"""
+    analyzer = AdvancedExamAnalyzer()
+    analyzer.question_database = papers
+    result = {'report': analyzer.generate_analytics_report()}
+    if syllabus_topics is not None:
+        result['predictions'] = analyzer.predict_likely_questions(syllabus_topics, num_predictions)
+    return result
+
+
+def merge_analytics_reports(shard_reports: Dict[str, Dict]) -> Dict:
+    """Merge per-shard analytics reports into one department-wide report"""
+    topic_frequency = Counter()
+    topic_marks = defaultdict(int)
+    type_counts = Counter()
+    type_marks = Counter()
+    bloom_counts = Counter()
+    bloom_marks = Counter()
+    temporal = defaultdict(lambda: {'questions': 0, 'topics': Counter(), 'types': Counter()})
+    total_papers = 0
+
+    for report in shard_reports.values():
+        topic_analysis = report['topic_analysis']
+        topic_frequency.update(topic_analysis['topic_frequency'])
+        for topic, marks in topic_analysis.get('topic_marks', {}).items():
+            topic_marks[topic] += marks
+        type_counts.update(report['type_analysis']['type_distribution'])
+        type_marks.update(report['type_analysis']['type_marks_distribution'])
+        bloom_counts.update(report['bloom_analysis']['bloom_distribution'])
+        bloom_marks.update(report['bloom_analysis']['bloom_marks_distribution'])
+        for year, data in report['temporal_trends'].items():
+            temporal[year]['questions'] += data['questions']
+            temporal[year]['topics'].update(data['topics'])
+            temporal[year]['types'].update(data['types'])
+        total_papers += report['total_papers_analyzed']
+
+    total_marks = sum(topic_marks.values())
+    topic_analysis = {
+        'topic_frequency': dict(topic_frequency),
+        'topic_weightage': {topic: (marks/total_marks)*100 for topic, marks in topic_marks.items()},
+        'topic_marks': dict(topic_marks),
+        'total_questions': sum(topic_frequency.values()),
+        'unique_topics': len(topic_frequency)
+    }
+    temporal_trends = dict(temporal)
+
+    # Reuse the single-analyzer rules on the merged aggregates
+    analyzer = AdvancedExamAnalyzer()
+    return {
+        'topic_analysis': topic_analysis,
+        'type_analysis': {
+            'type_distribution': dict(type_counts),
+            'type_marks_distribution': dict(type_marks)
+        },
+        'bloom_analysis': {
+            'bloom_distribution': dict(bloom_counts),
+            'bloom_marks_distribution': dict(bloom_marks)
+        },
+        'temporal_trends': temporal_trends,
+        'hot_topics': analyzer.identify_hot_topics(topic_analysis=topic_analysis),
+        'declining_topics': analyzer.identify_declining_topics(temporal_data=temporal_trends),
+        'total_papers_analyzed': total_papers
+    }
+
+
+class ShardedExamAnalyzer:
+    """Partition the paper corpus by subject or branch and analyse shards in parallel"""
+
+    def __init__(self, shard_by: str = 'subject', max_workers: Optional[int] = None):
+        self.shard_by = shard_by
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.shards = {}
+
+    def add_question_paper(self, questions: List[Dict], paper_metadata: Dict = None):
+        """Add a question paper to the shard selected by its metadata"""
+        metadata = paper_metadata or {}
+        key = metadata.get(self.shard_by, 'Unknown')
+        if key not in self.shards:
+            self.shards[key] = AdvancedExamAnalyzer()
+        self.shards[key].add_question_paper(questions, metadata)
+
+    def get_shard(self, key: str) -> Optional[AdvancedExamAnalyzer]:
+        """Get the analyzer holding a single shard"""
+        return self.shards.get(key)
+
+    def shard_keys(self) -> List[str]:
+        """List the shard keys currently held"""
+        return list(self.shards.keys())
+
+    def generate_analytics_report(self, parallel: bool = True) -> Dict:
+        """Generate per-shard reports and a merged department-wide report"""
+        results = self._run_shards(lambda key: (), parallel)
+        shard_reports = {key: result['report'] for key, result in results.items()}
+        return {
+            'shards': shard_reports,
+            'department': merge_analytics_reports(shard_reports),
+            'total_shards': len(shard_reports)
+        }
+
+    def predict_likely_questions(self,
+                                 syllabus_topics: Union[List[str], Dict[str, List[str]]],
+                                 num_predictions: int = 10,
+                                 parallel: bool = True) -> Dict:
+        """
+        Predict likely questions per shard and merge them into one ranking
+
+        Args:
+            syllabus_topics: One topic list for every shard, or a dict of topic lists per shard key
+            num_predictions: Number of predictions kept per shard and in the merged ranking
+            parallel: Run shards across a process pool
+        """
+        def shard_args(key):
+            if isinstance(syllabus_topics, dict):
+                return (syllabus_topics.get(key, []), num_predictions)
+            return (syllabus_topics, num_predictions)
+
+        results = self._run_shards(shard_args, parallel)
+        shard_predictions = {key: result['predictions'] for key, result in results.items()}
+
+        merged = []
+        for key, predictions in shard_predictions.items():
+            for prediction in predictions:
+                merged.append(dict(prediction, shard=key))
+        merged.sort(key=lambda x: x['probability'], reverse=True)
+
+        return {
+            'shards': shard_predictions,
+            'department': merged[:num_predictions]
+        }
+
+    def _run_shards(self, shard_args: Callable[[str], tuple], parallel: bool) -> Dict[str, Dict]:
+        """Run _analyze_shard for every shard, across a process pool when worthwhile"""
+        keys = list(self.shards.keys())
+        workers = min(self.max_workers, len(keys))
+
+        if not parallel or workers <= 1:
+            return {key: _analyze_shard(self.shards[key].question_database, *shard_args(key))
+                    for key in keys}
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                key: executor.submit(_analyze_shard, self.shards[key].question_database, *shard_args(key))
+                for key in keys
+            }
+            return {key: future.result() for key, future in futures.items()}
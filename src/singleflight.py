@@ -0,0 +1,155 @@
+import copy
+import json
+import time
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, Optional, Tuple
+
+
+def request_key(*parts) -> str:
+    """
+    Normalised key for a generation request
+
+    Strings are lowercased with whitespace collapsed; dicts are key-sorted. List order is
+    kept, since topic order shapes the paper.
+    """
+    def normalise(value):
+        if isinstance(value, str):
+            return ' '.join(value.lower().split())
+        if isinstance(value, dict):
+            return {str(k): normalise(v) for k, v in sorted(value.items(), key=lambda item: str(item[0]))}
+        if isinstance(value, (list, tuple)):
+            return [normalise(v) for v in value]
+        return value
+    return json.dumps([normalise(part) for part in parts], sort_keys=True, default=str)
+
+
+class _LeaderAbandoned(Exception):
+    """Set on a call's future when its leader stopped with a BaseException"""
+
+
+class SingleFlight:
+    """
+    Runs one call per key at a time and hands its result to every concurrent caller
+
+    The first caller for a key (the leader) runs the work in its own thread, so any
+    Streamlit output it produces lands in its own session. Callers arriving while it is
+    in flight wait for the same result, each up to its own timeout; a waiter that times
+    out gets a TimeoutError and the leader carries on. Once the call finishes the key is
+    released, so later requests run afresh. Waiters receive deep copies, since callers
+    often annotate the questions they get back. stream() does the same for a call that
+    produces its items one at a time.
+    """
+
+    def __init__(self, copy_results: bool = True):
+        self.copy_results = copy_results
+        self.lock = threading.Lock()
+        self.in_flight: Dict[Hashable, Future] = {}
+        self.stats = {'calls': 0, 'shared': 0}
+
+    def do(self, key: Hashable, fn: Callable[[], Any], timeout: Optional[float] = None) -> Any:
+        """
+        Return fn()'s result, running it only if no identical call is already in flight
+
+        Args:
+            key: Request identity (see request_key)
+            fn: The work; an Exception reaches the leader and every waiter, while any other
+                BaseException is raised in the leader only and the waiters retry
+            timeout: Seconds this caller waits for someone else's call (across retries); None waits indefinitely
+
+        Raises:
+            concurrent.futures.TimeoutError: If the shared call outlasts timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            future, leader = self._join(key)
+            if leader:
+                break
+            try:
+                return self._shared_result(future, deadline)
+            except _LeaderAbandoned:
+                # The leader's session was stopped or rerun; try again (possibly as the leader)
+                continue
+
+        try:
+            result = fn()
+        except Exception as e:
+            self._finish(key, future, error=e)
+            raise
+        except BaseException:
+            # Control-flow exceptions (Streamlit's RerunException/StopException, KeyboardInterrupt)
+            # belong to the leader alone; waiters are released to retry instead of receiving them
+            self._finish(key, future, error=_LeaderAbandoned())
+            raise
+        self._finish(key, future, result=result)
+        return result
+
+    def stream(self, key: Hashable, produce: Callable[[], Iterable], timeout: Optional[float] = None) -> Iterator:
+        """
+        Yield the items of produce(), running it only if no identical stream is already in flight
+
+        The leader sees each item as produce() makes it; waiters receive the leader's items
+        all at once when its stream ends. Errors are shared as in do(). A leader whose
+        consumer stops early (or is stopped) abandons the stream, and its waiters retry.
+
+        Raises:
+            concurrent.futures.TimeoutError: If the shared stream outlasts timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            future, leader = self._join(key)
+            if leader:
+                break
+            try:
+                yield from self._shared_result(future, deadline)
+                return
+            except _LeaderAbandoned:
+                continue
+
+        items = []
+        try:
+            for item in produce():
+                items.append(item)
+                yield item
+        except Exception as e:
+            self._finish(key, future, error=e)
+            raise
+        except BaseException:
+            self._finish(key, future, error=_LeaderAbandoned())
+            raise
+        self._finish(key, future, result=items)
+
+    def _join(self, key: Hashable) -> Tuple[Future, bool]:
+        """The call in flight for key and False, or a new call led by this caller and True"""
+        with self.lock:
+            future = self.in_flight.get(key)
+            if future is not None:
+                self.stats['shared'] += 1
+                return future, False
+            future = self.in_flight[key] = Future()
+            self.stats['calls'] += 1
+            return future, True
+
+    def _shared_result(self, future: Future, deadline: Optional[float]) -> Any:
+        result = future.result(None if deadline is None else max(0.0, deadline - time.monotonic()))
+        return copy.deepcopy(result) if self.copy_results else result
+
+    def _finish(self, key: Hashable, future: Future, result: Any = None, error: Optional[BaseException] = None):
+        # Release the key first, so a waiter retrying after an abandoned call can lead a new one
+        with self.lock:
+            if self.in_flight.get(key) is future:
+                del self.in_flight[key]
+        if error is not None:
+            future.set_exception(error)
+        else:
+            # Waiters copy from a snapshot, so the leader is free to modify its own result
+            future.set_result(copy.deepcopy(result) if self.copy_results else result)
+
+    def waiting(self, key: Hashable) -> bool:
+        """Whether a call for key is in flight (a new caller would wait rather than run)"""
+        with self.lock:
+            return key in self.in_flight
+
+
+# Shared by every session in the process: identical requests from many users run once
+generation_flight = SingleFlight()
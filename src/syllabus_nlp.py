@@ -0,0 +1,177 @@
+import os
+import re
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+import numpy as np
+
+# What doc.noun_chunks reads: POS tags (tagger/morphologizer mapped by attribute_ruler) and the
+# dependency parse. Everything else (NER, lemmatizer, ...) is disabled while chunking.
+NOUN_CHUNK_COMPONENTS = ('tok2vec', 'transformer', 'tagger', 'morphologizer', 'attribute_ruler', 'parser')
+
+# Worker processes for nlp.pipe; worth raising on hosts that extract topics from long syllabi
+DEFAULT_NLP_PROCESSES = int(os.environ.get('SYLLABUS_NLP_PROCESSES', '1'))
+
+UNIT_HEADING = re.compile(r'^[ \t]*(?:unit|module|chapter|part)\b[ \t]*[-:.]?[ \t]*(?:\d+|[ivxlc]+)\b',
+                          re.IGNORECASE | re.MULTILINE)
+
+
+def split_units(text: str, max_chars: int = 2000) -> List[str]:
+    """
+    Split a syllabus into unit-sized chunks for batched processing
+
+    Text is cut at unit/module/chapter headings; a unit longer than max_chars is cut
+    further at line breaks (a single longer line is kept whole).
+    """
+    bounds = sorted({0, *(match.start() for match in UNIT_HEADING.finditer(text))})
+    chunks = []
+    for start, end in zip(bounds, bounds[1:] + [len(text)]):
+        current = ''
+        for line in text[start:end].splitlines(keepends=True):
+            if current and len(current) + len(line) > max_chars:
+                chunks.append(current)
+                current = ''
+            current += line
+        chunks.append(current)
+    return [chunk.strip() for chunk in chunks if chunk.strip()]
+
+
+def pipe_for_noun_chunks(nlp, texts: Iterable[str], batch_size: int = 32, n_process: int = 1) -> Iterator:
+    """
+    Docs for texts with only the components noun chunking needs
+
+    Args:
+        nlp: Loaded spaCy pipeline (not modified)
+        texts: Chunks from split_units
+        batch_size: Texts per nlp.pipe batch
+        n_process: Worker processes; more than 1 only pays off for long syllabi
+    """
+    disable = [name for name in nlp.pipe_names if name not in NOUN_CHUNK_COMPONENTS]
+    return nlp.pipe(texts, batch_size=batch_size, n_process=n_process, disable=disable)
+
+
+def noun_phrases(docs: Iterable, max_words: int = 8) -> List[str]:
+    """Distinct noun chunks shorter than max_words, in order of first appearance"""
+    phrases = {}
+    for doc in docs:
+        for chunk in doc.noun_chunks:
+            text = chunk.text.strip()
+            if text and len(text.split()) < max_words:
+                phrases.setdefault(text, None)
+    return list(phrases)
+
+
+def embed_syllabus(text: str,
+                   kw_model,
+                   nlp,
+                   keyphrase_ngram_range: Tuple[int, int] = (1, 4),
+                   batch_size: int = 32,
+                   n_process: int = 1,
+                   max_chars: int = 2000) -> Dict:
+    """
+    Everything topic selection needs, computed once per syllabus
+
+    The syllabus is embedded once; that document embedding scores KeyBERT's n-gram
+    candidates and the spaCy noun phrases alike. Noun phrases that are also n-gram
+    candidates reuse the candidate embedding, so only the rest are embedded.
+
+    Returns:
+        {'phrases', 'words', 'doc_embedding', 'word_embeddings', 'phrase_embeddings'}
+    """
+    phrases = noun_phrases(pipe_for_noun_chunks(nlp, split_units(text, max_chars), batch_size, n_process))
+    words = _candidate_words(text, keyphrase_ngram_range)
+    row_of = {word: i for i, word in enumerate(words)}
+    missing = [phrase for phrase in phrases if phrase.lower() not in row_of]
+
+    # One embedding pass for the document, then one for the n-grams and remaining noun phrases
+    doc_embedding = np.asarray(kw_model.model.embed([text])).reshape(1, -1)
+    vectors = np.asarray(kw_model.model.embed(words + missing)).reshape(-1, doc_embedding.shape[1]) \
+        if words or missing else np.empty((0, doc_embedding.shape[1]))
+    word_embeddings = vectors[:len(words)]
+    extra = dict(zip(missing, vectors[len(words):]))
+    phrase_embeddings = np.array([word_embeddings[row_of[phrase.lower()]] if phrase.lower() in row_of
+                                  else extra[phrase] for phrase in phrases])
+    phrase_embeddings = phrase_embeddings.reshape(len(phrases), doc_embedding.shape[1])
+    return {
+        'phrases': phrases,
+        'words': words,
+        'doc_embedding': doc_embedding,
+        'word_embeddings': word_embeddings,
+        'phrase_embeddings': phrase_embeddings
+    }
+
+
+def _candidate_words(text: str, keyphrase_ngram_range: Tuple[int, int]) -> List[str]:
+    # The same vocabulary KeyBERT builds for its candidates (and the row order of word_embeddings)
+    from sklearn.feature_extraction.text import CountVectorizer
+    try:
+        return list(CountVectorizer(ngram_range=keyphrase_ngram_range, stop_words='english').fit([text])
+                    .get_feature_names_out())
+    except ValueError:
+        return []
+
+
+def select_topics(embeddings: Dict,
+                  max_keywords: int = 20,
+                  dedup_threshold: float = 0.9) -> List[str]:
+    """
+    Topics from the output of embed_syllabus (no model calls)
+
+    The max_keywords n-grams closest to the syllabus come first (KeyBERT's scoring),
+    then the noun phrases by similarity to the syllabus. A topic whose embedding is
+    within dedup_threshold cosine similarity of one already kept is dropped as a
+    near-duplicate.
+    """
+    doc_embedding = embeddings['doc_embedding']
+    word_embeddings = embeddings['word_embeddings']
+    candidates = []
+    if len(word_embeddings):
+        order = np.argsort(-_cosine(word_embeddings, doc_embedding)[:, 0], kind='stable')[:max_keywords]
+        candidates += [(embeddings['words'][i], word_embeddings[i]) for i in order]
+    phrase_embeddings = embeddings['phrase_embeddings']
+    if len(phrase_embeddings):
+        order = np.argsort(-_cosine(phrase_embeddings, doc_embedding)[:, 0], kind='stable')
+        candidates += [(embeddings['phrases'][i], phrase_embeddings[i]) for i in order]
+
+    topics, kept = [], []
+    seen = set()
+    for topic, vector in candidates:
+        if len(topic) <= 2 or topic.isdigit() or topic.lower() in seen:
+            continue
+        if kept and _cosine(np.array([vector]), np.array(kept)).max() >= dedup_threshold:
+            continue
+        seen.add(topic.lower())
+        topics.append(topic)
+        kept.append(vector)
+    return topics
+
+
+def _cosine(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    a = a / np.maximum(np.linalg.norm(a, axis=1, keepdims=True), 1e-12)
+    b = b / np.maximum(np.linalg.norm(b, axis=1, keepdims=True), 1e-12)
+    return a @ b.T
+
+
+def extract_syllabus_topics(text: str,
+                            kw_model,
+                            nlp,
+                            max_keywords: int = 20,
+                            keyphrase_ngram_range: Tuple[int, int] = (1, 4),
+                            dedup_threshold: float = 0.9,
+                            batch_size: int = 32,
+                            n_process: int = DEFAULT_NLP_PROCESSES) -> List[str]:
+    """
+    Syllabus topics from KeyBERT keyphrases and spaCy noun phrases
+
+    Args:
+        text: Syllabus text
+        kw_model: KeyBERT model
+        nlp: spaCy pipeline with a parser (e.g. en_core_web_sm)
+        max_keywords: KeyBERT keyphrases to include
+        keyphrase_ngram_range: Word lengths of KeyBERT candidates
+        dedup_threshold: Cosine similarity at which two topics count as duplicates
+        batch_size / n_process: nlp.pipe batching and worker processes
+    """
+    if not text or not text.strip():
+        return []
+    embeddings = embed_syllabus(text, kw_model, nlp, keyphrase_ngram_range, batch_size, n_process)
+    return select_topics(embeddings, max_keywords, dedup_threshold)
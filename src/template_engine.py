@@ -0,0 +1,45 @@
+from string import Formatter
+from typing import Callable, Dict, List, Union
+
+_formatter = Formatter()
+
+
+class CompiledTemplate:
+    """A format-string template parsed once, recording the placeholders it needs"""
+
+    __slots__ = ('source', 'parts', 'fields')
+
+    def __init__(self, source: str):
+        self.source = source
+        self.parts = []
+        fields = []
+        for literal, field, format_spec, conversion in _formatter.parse(source):
+            self.parts.append((literal, field, format_spec or '', conversion))
+            if field is not None and field not in fields:
+                fields.append(field)
+        self.fields = tuple(fields)
+
+    def render(self, resolve: Callable[[str], str]) -> str:
+        """Render the template, calling resolve(field) once for each placeholder it uses"""
+        values = {field: resolve(field) for field in self.fields}
+        out = []
+        for literal, field, format_spec, conversion in self.parts:
+            out.append(literal)
+            if field is not None:
+                value = values[field]
+                if conversion:
+                    value = _formatter.convert_field(value, conversion)
+                out.append(format(value, format_spec))
+        return ''.join(out)
+
+    def __repr__(self) -> str:
+        return f"CompiledTemplate({self.source!r})"
+
+
+def compile_templates(templates: Union[str, List, Dict]) -> Union[CompiledTemplate, List, Dict]:
+    """Compile every template string in a nested dict/list structure, keeping its shape"""
+    if isinstance(templates, str):
+        return CompiledTemplate(templates)
+    if isinstance(templates, dict):
+        return {key: compile_templates(value) for key, value in templates.items()}
+    return [compile_templates(value) for value in templates]
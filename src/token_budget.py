@@ -0,0 +1,159 @@
+import math
+from typing import Dict, List, Optional
+
+from .apportionment import apportion
+
+# Typical completion tokens for one question as a JSON object (MCQs carry options and an answer)
+COMPLETION_TOKENS_PER_QUESTION = {
+    'MCQ': 110,
+    'Short Answer': 60,
+    'Long Answer': 70,
+    'Case Study': 130
+}
+DEFAULT_QUESTION_TOKENS = 80
+# The {"questions": [...]} wrapper and any preamble the model adds
+RESPONSE_OVERHEAD_TOKENS = 30
+# Context window, USD per 1000 prompt/completion tokens and generation speed of the chat models used
+MODEL_LIMITS = {
+    'gpt-3.5-turbo': {'context_window': 16385, 'prompt_price_per_1k': 0.0005,
+                      'completion_price_per_1k': 0.0015, 'tokens_per_second': 60.0},
+    'gpt-4': {'context_window': 8192, 'prompt_price_per_1k': 0.03,
+              'completion_price_per_1k': 0.06, 'tokens_per_second': 20.0}
+}
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding('cl100k_base')
+except Exception:  # tiktoken is optional; the character heuristic is close enough for planning
+    _encoding = None
+
+
+def estimate_tokens(text: str) -> int:
+    """Token count of text: exact with tiktoken installed, otherwise about four characters per token"""
+    if not text:
+        return 0
+    if _encoding is not None:
+        return len(_encoding.encode(text))
+    return max(math.ceil(len(text) / 4), math.ceil(len(text.split()) * 4 / 3))
+
+
+def compact_prompt(text: str) -> str:
+    """Strip indentation, trailing spaces and blank lines (triple-quoted prompts waste tokens on them)"""
+    return '\n'.join(line.strip() for line in text.splitlines() if line.strip())
+
+
+class TokenBudget:
+    """
+    Plans LLM requests so that each one fits the model's limits
+
+    The completion a request needs is estimated from the question types asked for; a
+    paper is split into as few requests as keep every completion under
+    max_completion_tokens and every prompt + completion inside the context window.
+    The same estimates give the expected cost and latency of a paper up front.
+    """
+
+    def __init__(self,
+                 context_window: int = 16385,
+                 max_completion_tokens: int = 1000,
+                 safety_margin: float = 0.15,
+                 prompt_price_per_1k: float = 0.0005,
+                 completion_price_per_1k: float = 0.0015,
+                 tokens_per_second: float = 60.0,
+                 request_overhead_seconds: float = 0.8):
+        """
+        Args:
+            context_window: Prompt + completion tokens the model accepts
+            max_completion_tokens: Largest completion to ask for in one request
+            safety_margin: Fractional headroom on completion estimates
+            prompt_price_per_1k / completion_price_per_1k: USD per 1000 tokens
+            tokens_per_second: Completion generation speed, for latency estimates
+            request_overhead_seconds: Fixed latency per request (connection, queueing, first token)
+        """
+        self.context_window = context_window
+        self.max_completion_tokens = max_completion_tokens
+        self.safety_margin = safety_margin
+        self.prompt_price_per_1k = prompt_price_per_1k
+        self.completion_price_per_1k = completion_price_per_1k
+        self.tokens_per_second = tokens_per_second
+        self.request_overhead_seconds = request_overhead_seconds
+
+    @classmethod
+    def for_model(cls, model: str, **kwargs) -> 'TokenBudget':
+        """Budget with the limits and prices of model (the defaults for one not in MODEL_LIMITS)"""
+        return cls(**dict(MODEL_LIMITS.get(model, {}), **kwargs))
+
+    def tokens_per_question(self, question_types: List[str]) -> float:
+        """Expected completion tokens per question for an even mix of question_types"""
+        if not question_types:
+            return DEFAULT_QUESTION_TOKENS
+        per_type = [COMPLETION_TOKENS_PER_QUESTION.get(t, DEFAULT_QUESTION_TOKENS) for t in question_types]
+        return sum(per_type) / len(per_type) * (1 + self.safety_margin)
+
+    def completion_tokens(self, question_types: List[str], count: int) -> int:
+        """max_tokens to request for count questions"""
+        return math.ceil(RESPONSE_OVERHEAD_TOKENS + count * self.tokens_per_question(question_types))
+
+    def questions_per_request(self, question_types: List[str], prompt_tokens: int) -> int:
+        """Most questions one request can return given its prompt size"""
+        room = min(self.max_completion_tokens, self.context_window - prompt_tokens) - RESPONSE_OVERHEAD_TOKENS
+        return max(1, int(room // self.tokens_per_question(question_types)))
+
+    def plan(self,
+             topics: List[str],
+             num_questions: int,
+             question_types: List[str],
+             prompt_tokens: int,
+             max_topics_per_request: Optional[int] = None) -> List[Dict]:
+        """
+        Split a paper into requests that each fit the budget
+
+        Args:
+            topics: Syllabus topics (each request covers a contiguous run of them)
+            num_questions: Questions in the paper
+            question_types: Types asked for in every request
+            prompt_tokens: Prompt size of one request (shared instructions + request line)
+            max_topics_per_request: Also cap the topics per request (for parallelism or focus)
+
+        Returns:
+            One {'topics', 'count', 'max_tokens'} entry per request
+        """
+        topics = list(dict.fromkeys(topics))
+        if not topics or num_questions <= 0:
+            return []
+        per_request = self.questions_per_request(question_types, prompt_tokens)
+        per_topic = apportion(num_questions, {topic: 1 for topic in topics})
+
+        # Fill each request up to its capacity, in syllabus order; a topic that does not
+        # fit in the rest of a request carries over to the next one
+        planned = []
+        current_topics, current_count = [], 0
+        for topic in topics:
+            remaining = per_topic[topic]
+            while remaining > 0:
+                take = min(remaining, per_request - current_count)
+                current_topics.append(topic)
+                current_count += take
+                remaining -= take
+                if current_count == per_request or len(current_topics) == max_topics_per_request:
+                    planned.append(self._request(current_topics, current_count, question_types))
+                    current_topics, current_count = [], 0
+        if current_count:
+            planned.append(self._request(current_topics, current_count, question_types))
+        return planned
+
+    def _request(self, topics: List[str], count: int, question_types: List[str]) -> Dict:
+        return {'topics': topics, 'count': count, 'max_tokens': self.completion_tokens(question_types, count)}
+
+    def estimate(self, plan: List[Dict], prompt_tokens: int, concurrency: int = 1) -> Dict:
+        """Tokens, cost (USD) and wall-clock seconds of a plan run with concurrency requests in flight"""
+        completion = sum(request['max_tokens'] for request in plan)
+        prompt = prompt_tokens * len(plan)
+        slowest = max((request['max_tokens'] for request in plan), default=0)
+        waves = math.ceil(len(plan) / max(1, concurrency))
+        return {
+            'requests': len(plan),
+            'prompt_tokens': prompt,
+            'completion_tokens': completion,
+            'cost': prompt / 1000 * self.prompt_price_per_1k + completion / 1000 * self.completion_price_per_1k,
+            'seconds': waves * (self.request_overhead_seconds + slowest / self.tokens_per_second)
+        }
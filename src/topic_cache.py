@@ -0,0 +1,247 @@
+import io
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .syllabus_nlp import DEFAULT_NLP_PROCESSES, embed_syllabus, select_topics
+
+DEFAULT_TOPIC_CACHE_PATH = os.environ.get('TOPIC_CACHE_PATH', 'topic_cache.db')
+
+
+def content_key(text: str, extractor: str, settings: Optional[Dict] = None) -> str:
+    """Hash of the syllabus text (line endings normalised) with the extractor and its settings"""
+    payload = json.dumps({
+        'text': text.replace('\r\n', '\n'),
+        'extractor': extractor,
+        'settings': settings or {}
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class TopicCache:
+    """
+    Extracted topics and syllabus embeddings, shared by every worker process on the host
+
+    Topics and embeddings are kept in separate SQLite tables (WAL mode), each with its
+    own least-recently-used limit, since an embedding entry is far larger than a topic
+    list. Entries expire ttl seconds after they were stored.
+    """
+
+    def __init__(self, path: str = DEFAULT_TOPIC_CACHE_PATH, ttl: Optional[float] = 30 * 24 * 3600,
+                 max_entries: Optional[int] = 2000, max_embedding_entries: Optional[int] = 200):
+        """
+        Args:
+            path: SQLite file
+            ttl: Seconds an entry stays valid; None never expires
+            max_entries: Topic lists kept before least-recently-used eviction; None for unbounded
+            max_embedding_entries: Embedding sets kept likewise
+        """
+        self.path = path
+        self.ttl = ttl
+        self.limits = {'topics': max_entries, 'embeddings': max_embedding_entries}
+        self.hits = 0
+        self.misses = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self.get_connection()
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS topics (
+                key TEXT PRIMARY KEY,
+                topics TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                meta TEXT NOT NULL,
+                arrays BLOB NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_topics_last_used ON topics (last_used)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings (last_used)')
+        conn.commit()
+        conn.close()
+
+    def get_connection(self):
+        # A generous busy timeout lets concurrent writers from other processes queue instead of failing
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _get(self, table: str, columns: str, key: str):
+        now = time.time()
+        conn = self.get_connection()
+        try:
+            row = conn.execute(f'SELECT {columns}, created_at FROM {table} WHERE key = ?', (key,)).fetchone()
+            if row is not None and self.ttl is not None and now - row[-1] > self.ttl:
+                conn.execute(f'DELETE FROM {table} WHERE key = ?', (key,))
+                conn.commit()
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            conn.execute(f'UPDATE {table} SET last_used = ? WHERE key = ?', (now, key))
+            conn.commit()
+            self.hits += 1
+            return row[:-1]
+        finally:
+            conn.close()
+
+    def _put(self, table: str, columns: Tuple[str, ...], key: str, values: Tuple):
+        now = time.time()
+        conn = self.get_connection()
+        try:
+            names = ', '.join(('key',) + columns + ('created_at', 'last_used'))
+            marks = ', '.join('?' * (len(columns) + 3))
+            conn.execute(f'INSERT OR REPLACE INTO {table} ({names}) VALUES ({marks})', (key,) + values + (now, now))
+            if self.limits[table] is not None:
+                conn.execute(f'''
+                    DELETE FROM {table} WHERE key IN (
+                        SELECT key FROM {table} ORDER BY last_used DESC LIMIT -1 OFFSET ?
+                    )
+                ''', (self.limits[table],))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def get_topics(self, key: str) -> Optional[List[str]]:
+        """Cached topics for key, or None if absent or expired"""
+        row = self._get('topics', 'topics', key)
+        return json.loads(row[0]) if row is not None else None
+
+    def put_topics(self, key: str, topics: List[str]):
+        self._put('topics', ('topics',), key, (json.dumps(topics),))
+
+    def get_embeddings(self, key: str) -> Optional[Dict]:
+        """Cached embed_syllabus result for key, or None if absent or expired"""
+        row = self._get('embeddings', 'meta, arrays', key)
+        if row is None:
+            return None
+        embeddings = json.loads(row[0])
+        with np.load(io.BytesIO(row[1]), allow_pickle=False) as arrays:
+            embeddings.update({name: arrays[name] for name in arrays.files})
+        return embeddings
+
+    def put_embeddings(self, key: str, embeddings: Dict):
+        arrays = {name: value for name, value in embeddings.items() if isinstance(value, np.ndarray)}
+        meta = {name: value for name, value in embeddings.items() if name not in arrays}
+        buffer = io.BytesIO()
+        np.savez_compressed(buffer, **arrays)
+        self._put('embeddings', ('meta', 'arrays'), key, (json.dumps(meta), buffer.getvalue()))
+
+    def get_or_extract(self, text: str, extractor: str, settings: Optional[Dict],
+                       extract: Callable[[], List[str]]) -> List[str]:
+        """
+        Serve a syllabus's topics from the cache, running extract on a miss
+
+        Args:
+            text: Syllabus text (hashed for the key)
+            extractor: Name of the extraction method (bump it when the method changes)
+            settings: Options that change the result
+            extract: Produces the topics on a miss
+        """
+        key = content_key(text, extractor, settings)
+        topics = self.get_topics(key)
+        if topics is None:
+            topics = extract()
+            self.put_topics(key, topics)
+        return topics
+
+    def purge_expired(self) -> int:
+        """Delete every expired entry and return how many were removed"""
+        if self.ttl is None:
+            return 0
+        conn = self.get_connection()
+        try:
+            cutoff = time.time() - self.ttl
+            removed = sum(conn.execute(f'DELETE FROM {table} WHERE created_at < ?', (cutoff,)).rowcount
+                          for table in self.limits)
+            conn.commit()
+            return removed
+        finally:
+            conn.close()
+
+    def clear(self):
+        conn = self.get_connection()
+        try:
+            for table in self.limits:
+                conn.execute(f'DELETE FROM {table}')
+            conn.commit()
+        finally:
+            conn.close()
+
+    def __len__(self) -> int:
+        """Number of cached topic lists"""
+        conn = self.get_connection()
+        try:
+            return conn.execute('SELECT COUNT(*) FROM topics').fetchone()[0]
+        finally:
+            conn.close()
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def get_topic_cache() -> TopicCache:
+    """The process-wide cache at DEFAULT_TOPIC_CACHE_PATH (created on first use)"""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = TopicCache()
+        return _default_cache
+
+
+def cached_syllabus_topics(text: str,
+                           load_models: Callable[[], Tuple],
+                           max_keywords: int = 20,
+                           models: Tuple[str, str] = ('', ''),
+                           keyphrase_ngram_range: Tuple[int, int] = (1, 4),
+                           dedup_threshold: float = 0.9,
+                           cache: Optional[TopicCache] = None,
+                           n_process: int = DEFAULT_NLP_PROCESSES) -> List[str]:
+    """
+    KeyBERT + spaCy syllabus topics with the topics and the embeddings behind them cached
+
+    A repeat request is answered from the topic list without touching a model. A new
+    max_keywords or dedup_threshold reuses the stored embeddings, so only the cheap
+    selection step runs; the models are loaded only when the syllabus is embedded.
+
+    Args:
+        text: Syllabus text
+        load_models: Returns (kw_model, nlp); called only when embeddings must be computed
+        max_keywords / keyphrase_ngram_range / dedup_threshold: As for extract_syllabus_topics
+        models: Names of the embedding and spaCy models, so a model change misses the cache
+        cache: TopicCache to use (the shared default otherwise)
+        n_process: nlp.pipe worker processes when the syllabus is embedded
+    """
+    if not text or not text.strip():
+        return []
+    if cache is None:
+        cache = get_topic_cache()
+    embedding_settings = {'models': list(models), 'keyphrase_ngram_range': list(keyphrase_ngram_range)}
+    topics_key = content_key(text, 'keybert-topics', dict(embedding_settings, max_keywords=max_keywords,
+                                                           dedup_threshold=dedup_threshold))
+    topics = cache.get_topics(topics_key)
+    if topics is not None:
+        return topics
+
+    embeddings_key = content_key(text, 'keybert-embeddings', embedding_settings)
+    embeddings = cache.get_embeddings(embeddings_key)
+    if embeddings is None:
+        kw_model, nlp = load_models()
+        embeddings = embed_syllabus(text, kw_model, nlp, keyphrase_ngram_range, n_process=n_process)
+        cache.put_embeddings(embeddings_key, embeddings)
+    topics = select_topics(embeddings, max_keywords, dedup_threshold)
+    cache.put_topics(topics_key, topics)
+    return topics
@@ -2,6 +2,7 @@
 "import streamlit as st" 
 
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 import pandas as pd
 import plotly.express as px
 import random
@@ -11,8 +12,11 @@ import re
 import sqlite3
 import os
 import requests
+import threading
+from contextlib import nullcontext
+from concurrent.futures import TimeoutError as FuturesTimeoutError
 import openai
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Optional
 # from advanced_analytics import advanced_analytics_dashboard
 from collaboration_system import collaboration_dashboard
 from streamlit_option_menu import option_menu
@@ -20,9 +24,20 @@ from streamlit_option_menu import option_menu
 #     create_connection,
 #     create_tables,
 # )
-from transformers import pipeline
-import torch
 import streamlit_authenticator as stauth
+from src.bulk_generator import BulkGenerationJob
+from src.llm_stream import is_complete_response, iter_streamed_questions, parse_questions
+from src.llm_fanout import fan_out
+from src.llm_cache import LLMResponseCache, cache_key
+from src.llm_client import CircuitOpenError, DEFAULT_API_URL, shared_client
+from src.token_budget import TokenBudget, compact_prompt, estimate_tokens
+from src.singleflight import generation_flight, request_key
+from src.local_llm import get_local_llm
+from src.advanced_generator import AdvancedQuestionGenerator
+from src.hedged_generation import HedgedPaper
+from src.nlp_models import (DEFAULT_EMBEDDING_MODEL, DEFAULT_SPACY_MODEL, get_keybert, get_sentence_model, get_spacy,
+                            loaded_models)
+from src.topic_cache import cached_syllabus_topics, get_topic_cache
 
 # Page configuration
 st.set_page_config(
@@ -459,6 +474,34 @@ def super_admin_dashboard():
         else:
             st.metric("Avg Questions/Gen", "0", "❓")
     
+    # Bulk generation across every branch and subject
+    st.markdown("### 🏭 Bulk Paper Generation")
+    with st.expander("Generate papers for every subject"):
+        bulk_variants = st.number_input("Sets per subject", min_value=1, max_value=10, value=2)
+        bulk_questions = st.number_input("Questions per paper", min_value=5, max_value=200, value=20)
+        bulk_seed = st.number_input("Seed", min_value=0, value=0)
+        if st.button("🚀 Run Bulk Generation"):
+            job = BulkGenerationJob(
+                QuestVibeAIDatabase().engineering_subjects,
+                {'total_questions': int(bulk_questions), 'question_types': ['MCQ', 'Short Answer', 'Long Answer']},
+                num_variants=int(bulk_variants),
+                base_seed=int(bulk_seed),
+                export_formats=('txt', 'docx')
+            )
+            total_units = len(job.work_units())
+            progress = st.progress(0.0)
+            finished = []
+            
+            def report_paper(unit, paper):
+                finished.append(unit['path'])
+                progress.progress(len(finished) / total_units, text=f"{unit['subject']} - Set {unit['label']}")
+            
+            summary = job.run(on_paper=report_paper)
+            st.success(f"✅ Generated {len(summary['completed'])} papers in {job.output_dir}/ "
+                       f"({summary['skipped']} already present)")
+            for path, error in summary['failed'].items():
+                st.error(f"❌ {path}: {error}")
+    
     # Charts
     if not generations_df.empty:
         st.markdown("### 📊 Analytics Charts")
@@ -603,6 +646,23 @@ def super_admin_dashboard():
     with col3:
         st.metric("Max Tokens", st.session_state.questvibe_chatgpt.max_tokens, "📝")
     
+    # Latency and error metrics of the shared API client (all sessions in this process)
+    client = st.session_state.questvibe_chatgpt.client
+    metrics = client.metrics.snapshot()
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("API Calls", metrics['calls'], f"{metrics['retries']} retries")
+    with col2:
+        st.metric("Error Rate", f"{metrics['error_rate']:.1%}", metrics['last_error'] or "No errors", delta_color="off")
+    with col3:
+        st.metric("Latency p50 / p95", f"{metrics['latency_p50']:.2f}s / {metrics['latency_p95']:.2f}s")
+    with col4:
+        st.metric("Circuit", client.breaker.state.title(), f"{metrics['short_circuited']} short-circuited", delta_color="off")
+    models = loaded_models()
+    if models:
+        st.caption("Shared NLP models (loaded once per process): " +
+                   ", ".join(f"{name} ({seconds:.1f}s)" for name, seconds in models.items()))
+    
     # ChatGPT Features
     st.markdown("**✨ ChatGPT Features:**")
     features = [
@@ -1052,111 +1112,278 @@ if 'questvibe_ai_db' not in st.session_state:
 
 # ChatGPT Integration
 class QuestVibeChatGPT:
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, model="gpt-3.5-turbo"):
         self.api_key = api_key or st.secrets.get("OPENAI_API_KEY", "")
-        self.model = "gpt-3.5-turbo"
+        self.model = model
         self.max_tokens = 1000
+        self.api_url = os.environ.get("OPENAI_API_URL", DEFAULT_API_URL)
+        # Pooled connections, timeouts, retries and the circuit breaker are shared process-wide
+        self.client = shared_client(self.api_url)
+        # Papers spanning more topics than this are split into parallel per-topic-group requests
+        self.topics_per_request = 2
+        self.max_concurrency = 4
+        self.temperature = 0.7
+        # Requests are sized so each completion fits max_tokens and the model's context window
+        self.token_budget = TokenBudget.for_model(self.model, max_completion_tokens=self.max_tokens)
+        # Completions are shared across sessions and worker processes through a SQLite cache
+        self.response_cache = LLMResponseCache()
+        # Seconds a session waits on an identical request already running in another session
+        self.coalesce_timeout = 120
+        # Hybrid mode serves a template paper at once and upgrades it with LLM questions for this many seconds
+        self.hedge_budget = 20.0
+        self.template_generator = AdvancedQuestionGenerator()
         
-    def generate_questions(self, subject: str, topics: List[str], num_questions: int, question_types: List[str]) -> List[Dict]:
-        """Generate questions using ChatGPT with fallback"""
+    def generate_questions(self, subject: str, topics: List[str], num_questions: int, question_types: List[str],
+                           fresh: bool = False) -> List[Dict]:
+        """Generate questions using ChatGPT with fallback; fresh=True skips the response cache"""
+        if fresh:
+            return self._generate_questions(subject, topics, num_questions, question_types, fresh)
+        # Identical requests in flight from other sessions are run once and shared
+        key = request_key('chatgpt', self.model, subject, topics, num_questions, question_types)
+        try:
+            return generation_flight.do(
+                key, lambda: self._generate_questions(subject, topics, num_questions, question_types),
+                self.coalesce_timeout)
+        except FuturesTimeoutError:
+            return self.generate_fallback_questions(subject, topics, num_questions, question_types)
+    
+    def _generate_questions(self, subject: str, topics: List[str], num_questions: int, question_types: List[str],
+                            fresh: bool = False) -> List[Dict]:
+        plan = self.plan_requests(subject, topics, num_questions, question_types)
+        if len(plan) > 1:
+            return self.generate_questions_concurrent(subject, topics, num_questions, question_types, fresh, plan)
+        system = self.question_instructions(subject, question_types)
         prompt = self.create_question_prompt(subject, topics, num_questions, question_types)
-        response = self.call_chatgpt_api(prompt)
+        max_tokens = plan[0]['max_tokens'] if plan else None
+        response = self.call_chatgpt_api(prompt, fresh, system, max_tokens)
         
         if response:
             return self.parse_chatgpt_response(response, question_types)
         else:
             return self.generate_fallback_questions(subject, topics, num_questions, question_types)
     
-    def create_question_prompt(self, subject: str, topics: List[str], num_questions: int, question_types: List[str]) -> str:
-        """Create a detailed prompt for ChatGPT"""
-        topics_text = ", ".join(topics)
-        types_text = ", ".join(question_types)
+    def generate_questions_concurrent(self, subject: str, topics: List[str], num_questions: int, question_types: List[str],
+                                      fresh: bool = False, plan: Optional[List[Dict]] = None) -> List[Dict]:
+        """Generate questions with one request per planned topic group, at most max_concurrency in flight"""
+        if not self.api_key:
+            return self.generate_fallback_questions(subject, topics, num_questions, question_types)
         
-        prompt = f"""
-        You are an expert educator creating questions for {subject}. 
+        system = self.question_instructions(subject, question_types)
+        # Worker threads share this run's context so parse warnings still reach the page
+        ctx = get_script_run_ctx()
         
-        Available topics: {topics_text}
-        Question types needed: {types_text}
-        Number of questions: {num_questions}
+        def generate_chunk(chunk_topics, count):
+            add_script_run_ctx(threading.current_thread(), ctx)
+            prompt = self.create_question_prompt(subject, chunk_topics, count, question_types)
+            max_tokens = self.token_budget.completion_tokens(question_types, count)
+            return self.parse_chatgpt_response(self.request_completion(prompt, fresh, system, max_tokens), question_types)
+        
+        def fallback(chunk_topics, count):
+            return self.generate_fallback_questions(subject, chunk_topics, count, question_types)
         
-        Please generate {num_questions} questions with the following requirements:
+        if plan is None:
+            plan = self.plan_requests(subject, topics, num_questions, question_types)
+        chunks = [(request['topics'], request['count']) for request in plan]
+        questions = fan_out(chunks, generate_chunk, self.max_concurrency, fallback)
+        return questions[:num_questions]
+    
+    def stream_questions(self, subject: str, topics: List[str], num_questions: int, question_types: List[str],
+                         fresh: bool = False) -> Iterator[Dict]:
+        """Yield questions as the streamed completions produce them, with the same fallback as generate_questions"""
+        streamed = 0
+        try:
+            for question in self.shared_llm_questions(subject, topics, num_questions, question_types, fresh):
+                streamed += 1
+                yield question
+        except FuturesTimeoutError:
+            st.warning("An identical request from another session is taking too long; using template questions.")
+        except Exception as e:
+            st.error(f"An error occurred while streaming from ChatGPT API: {e}")
+        
+        if not streamed:
+            yield from self.generate_fallback_questions(subject, topics, num_questions, question_types)
+    
+    def stream_key(self, subject: str, topics: List[str], num_questions: int, question_types: List[str]) -> str:
+        """Identity of a streamed request, shared by the streaming and instant-paper paths"""
+        return request_key('chatgpt-stream', self.model, subject, topics, num_questions, question_types)
+    
+    def shared_llm_questions(self, subject: str, topics: List[str], num_questions: int, question_types: List[str],
+                             fresh: bool = False) -> Iterator[Dict]:
+        """
+        stream_llm_questions, with identical requests in flight from other sessions sharing one stream
+        
+        The session that starts the request sees its questions as they arrive; sessions joining
+        it receive them all when it ends (or a TimeoutError after coalesce_timeout seconds).
+        """
+        def produce():
+            return self.stream_llm_questions(subject, topics, num_questions, question_types, fresh)
+        if fresh:
+            return produce()
+        return generation_flight.stream(self.stream_key(subject, topics, num_questions, question_types),
+                                        produce, self.coalesce_timeout)
+    
+    def stream_llm_questions(self, subject: str, topics: List[str], num_questions: int, question_types: List[str],
+                             fresh: bool = False) -> Iterator[Dict]:
+        """Yield streamed LLM questions only; errors propagate and there is no fallback"""
+        system = self.question_instructions(subject, question_types)
+        # Planned requests are streamed one after another, so questions keep flowing in order
+        for request in self.plan_requests(subject, topics, num_questions, question_types, parallel=False):
+            prompt = self.create_question_prompt(subject, request['topics'], request['count'], question_types)
+            key = cache_key(system + "\n" + prompt, self.cache_params(request['max_tokens']))
+            cached = None if fresh else self.response_cache.get(key)
+            if cached is not None and not is_complete_response(cached):
+                cached = None
+            if cached is not None:
+                fragments = [cached]
+            else:
+                received = []
+                fragments = (received.append(fragment) or fragment
+                             for fragment in self.stream_chatgpt_api(prompt, system, request['max_tokens']))
+            request_streamed = 0
+            for question in iter_streamed_questions(fragments):
+                request_streamed += 1
+                yield question
+            # A cut-off or malformed completion is not kept for the next session
+            if cached is None and request_streamed and is_complete_response(''.join(received)):
+                self.response_cache.put(key, ''.join(received))
+    
+    def template_questions(self, subject: str, topics: List[str], num_questions: int, question_types: List[str]) -> List[Dict]:
+        """Questions from the template engine (no network)"""
+        exam_config = {'title': subject, 'total_questions': num_questions, 'question_types': question_types}
+        try:
+            return self.template_generator.generate_question_paper(topics, exam_config)['questions']
+        except ValueError:
+            return self.generate_fallback_questions(subject, topics, num_questions, question_types)
+    
+    def generate_questions_hedged(self, subject: str, topics: List[str], num_questions: int, question_types: List[str],
+                                  latency_budget: Optional[float] = None, fresh: bool = False) -> HedgedPaper:
+        """
+        Serve a template paper immediately and upgrade it with streamed LLM questions in the background
         
+        Questions still arriving after latency_budget seconds (hedge_budget by default) are
+        dropped from this paper. Identical requests from other sessions share one LLM stream
+        (see shared_llm_questions).
+        """
+        template = self.template_questions(subject, topics, num_questions, question_types)
+        if not self.api_key:
+            return HedgedPaper(template)
+        # The background thread shares this run's context so the cache and client behave as in the page
+        ctx = get_script_run_ctx()
+        
+        def llm_questions():
+            add_script_run_ctx(threading.current_thread(), ctx)
+            yield from self.shared_llm_questions(subject, topics, num_questions, question_types, fresh)
+        
+        budget = self.hedge_budget if latency_budget is None else latency_budget
+        return HedgedPaper(template, llm_questions, budget)
+    
+    def question_instructions(self, subject: str, question_types: List[str]) -> str:
+        """Instructions and output format shared by every request of a paper (sent once per request as the system message)"""
+        types_text = ", ".join(question_types)
+        
+        instructions = f"""
+        You are an expert educator creating questions for {subject}.
+        Question types needed: {types_text}
+        
+        Requirements:
         1. Questions should be relevant to the topics provided
         2. Mix of question types: {types_text}
         3. For MCQs, provide 4 options (A, B, C, D) with one correct answer
         4. Questions should test different cognitive levels (Remember, Understand, Apply, Analyze, Evaluate, Create)
         5. Difficulty should vary from easy to hard
         6. Questions should be practical and industry-relevant
+        7. Make sure the questions are high-quality, educational, and suitable for engineering students
         
-        Format your response as JSON:
-        {{
-            "questions": [
-                {{
-                    "type": "MCQ/Short Answer/Long Answer/Case Study",
-                    "question": "Question text here",
-                    "options": ["A", "B", "C", "D"] (only for MCQ),
-                    "correct_answer": "A" (only for MCQ),
-                    "difficulty": "Easy/Medium/Hard",
-                    "bloom_level": "Remember/Understand/Apply/Analyze/Evaluate/Create",
-                    "topic": "specific topic from the list"
-                }}
-            ]
-        }}
-        
-        Make sure the questions are high-quality, educational, and suitable for engineering students.
+        Respond with JSON only:
+        {{"questions": [{{"type": "MCQ/Short Answer/Long Answer/Case Study", "question": "...", "options": ["A", "B", "C", "D"] (MCQ only), "correct_answer": "A" (MCQ only), "difficulty": "Easy/Medium/Hard", "bloom_level": "Remember/Understand/Apply/Analyze/Evaluate/Create", "topic": "one topic from the list"}}]}}
         """
         
-        return prompt
+        return compact_prompt(instructions)
     
-    def call_chatgpt_api(self, prompt: str) -> str:
+    def create_question_prompt(self, subject: str, topics: List[str], num_questions: int, question_types: List[str]) -> str:
+        """Create the per-request part of the prompt: which topics and how many questions"""
+        return f"Topics: {', '.join(topics)}\nGenerate {num_questions} questions."
+    
+    def plan_requests(self, subject: str, topics: List[str], num_questions: int, question_types: List[str],
+                      parallel: bool = True) -> List[Dict]:
+        """Split a paper into requests that fit the token budget ({'topics', 'count', 'max_tokens'} each)"""
+        self.token_budget.max_completion_tokens = self.max_tokens
+        return self.token_budget.plan(topics, num_questions, question_types,
+                                      self.prompt_tokens(subject, topics, num_questions, question_types),
+                                      self.topics_per_request if parallel else None)
+    
+    def prompt_tokens(self, subject: str, topics: List[str], num_questions: int, question_types: List[str]) -> int:
+        """Prompt size of a request covering every topic (an upper bound for each planned request)"""
+        return estimate_tokens(self.question_instructions(subject, question_types)) + \
+            estimate_tokens(self.create_question_prompt(subject, topics, num_questions, question_types))
+    
+    def estimate_paper(self, subject: str, topics: List[str], num_questions: int, question_types: List[str],
+                       parallel: bool = True) -> Dict:
+        """Expected requests, tokens, cost (USD) and seconds for generating a paper"""
+        plan = self.plan_requests(subject, topics, num_questions, question_types, parallel)
+        return self.token_budget.estimate(plan, self.prompt_tokens(subject, topics, num_questions, question_types),
+                                          self.max_concurrency if parallel else 1)
+    
+    def call_chatgpt_api(self, prompt: str, fresh: bool = False, system: Optional[str] = None,
+                         max_tokens: Optional[int] = None) -> str:
         """Call ChatGPT API using requests"""
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
-        data = {
-            "model": "gpt-3.5-turbo",
-            "messages": [{"role": "user", "content": prompt}],
-            "temperature": 0.7
-        }
-        
         try:
-            response = requests.post(
-                "https://api.openai.com/v1/chat/completions",
-                headers=headers,
-                json=data
-            )
-            
-            if response.status_code == 200:
-                return response.json()["choices"][0]["message"]["content"]
-            else:
-                raise Exception(f"API call failed: {response.status_code}")
+            return self.request_completion(prompt, fresh, system, max_tokens)
+        except CircuitOpenError:
+            st.info("ChatGPT is temporarily unavailable; using template questions.")
+            return ""
         except Exception as e:
             st.error(f"An error occurred while calling ChatGPT API: {e}")
             return ""
     
+    def cache_params(self, max_tokens: Optional[int] = None) -> Dict:
+        """Request parameters that change the completion, part of the response cache key"""
+        return {"model": self.model, "temperature": self.temperature, "api_url": self.client.api_url,
+                "max_tokens": max_tokens}
+    
+    def request_completion(self, prompt: str, fresh: bool = False, system: Optional[str] = None,
+                           max_tokens: Optional[int] = None) -> str:
+        """Return the completion text, from the response cache when possible; raises on failure"""
+        cache_prompt = prompt if system is None else system + "\n" + prompt
+        # Only complete question JSON is cached, so a truncated completion is not served for a week
+        return self.response_cache.get_or_call(cache_prompt, self.cache_params(max_tokens),
+                                               lambda: self._post_completion(prompt, system, max_tokens), fresh,
+                                               validate=is_complete_response)
+    
+    def _post_completion(self, prompt: str, system: Optional[str] = None, max_tokens: Optional[int] = None) -> str:
+        """Call ChatGPT API and return the completion text; raises on failure (safe off the script thread)"""
+        return self.client.complete(self.request_payload(prompt, system, max_tokens), self.api_key)
+    
+    def request_payload(self, prompt: str, system: Optional[str] = None, max_tokens: Optional[int] = None) -> Dict:
+        messages = [{"role": "user", "content": prompt}]
+        if system:
+            messages.insert(0, {"role": "system", "content": system})
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            "temperature": self.temperature
+        }
+        if max_tokens:
+            payload["max_tokens"] = max_tokens
+        return payload
+    
+    def stream_chatgpt_api(self, prompt: str, system: Optional[str] = None, max_tokens: Optional[int] = None) -> Iterator[str]:
+        """Call ChatGPT API with streaming and yield the completion text as it arrives"""
+        yield from self.client.stream(self.request_payload(prompt, system, max_tokens), self.api_key)
+    
     def parse_chatgpt_response(self, response: str, question_types: List[str]) -> List[Dict]:
         """Parse the response from ChatGPT API"""
-        try:
-            # Try to extract JSON from response
-            json_start = response.find('{')
-            json_end = response.rfind('}') + 1
-            
-            if json_start != -1 and json_end != 0:
-                json_str = response[json_start:json_end]
-                data = json.loads(json_str)
-                
-                if "questions" in data:
-                    return data["questions"]
-            
-            # Fallback: parse manually
-            return self.parse_manual_response(response, question_types)
-            
-        except Exception as e:
-            # Only show parsing error to super admins
-            if hasattr(st.session_state, 'current_user') and st.session_state.current_user and st.session_state.current_user.get('role') == 'super_admin':
-                st.warning(f"Failed to parse ChatGPT response: {str(e)}")
-            return self.parse_manual_response(response, question_types)
+        # Incremental parse: every complete question object is kept, even when the
+        # completion was cut off or wrapped in prose and code fences
+        questions = parse_questions(response)
+        if questions:
+            return questions
+        
+        # Only show parsing problems to super admins
+        if hasattr(st.session_state, 'current_user') and st.session_state.current_user and st.session_state.current_user.get('role') == 'super_admin':
+            st.warning("ChatGPT response contained no complete JSON questions; parsing it line by line")
+        # Fallback: parse manually
+        return self.parse_manual_response(response, question_types)
     
     def parse_manual_response(self, response: str, question_types: List[str]) -> List[Dict]:
         """Manually parse response if JSON parsing fails"""
@@ -1263,35 +1490,25 @@ class QuestVibeChatGPT:
 # Initialize ChatGPT
 if 'questvibe_chatgpt' not in st.session_state:
     st.session_state.questvibe_chatgpt = QuestVibeChatGPT()
+if 'questvibe_gpt4' not in st.session_state:
+    # The "GPT-4 (OpenAI API)" engine option
+    st.session_state.questvibe_gpt4 = QuestVibeChatGPT(model="gpt-4")
 
-# --- KeyBERT-powered topic extraction ---
-from keybert import KeyBERT
-import spacy
+# Deployments serving the offline engine can load the local model as soon as the process starts
+if os.environ.get("LOCAL_LLM_WARMUP"):
+    get_local_llm().start_warmup()
+
+# Seconds a page waits for the local model before reporting an error (the first call includes loading)
+LOCAL_LLM_TIMEOUT = float(os.environ.get("LOCAL_LLM_TIMEOUT", "300"))
 
-# Load models globally for efficiency
-if 'kw_model' not in st.session_state:
-    st.session_state.kw_model = KeyBERT(model='all-MiniLM-L6-v2')
-if 'spacy_nlp' not in st.session_state:
-    st.session_state.spacy_nlp = spacy.load("en_core_web_sm")
+# --- KeyBERT-powered topic extraction ---
+# Models are loaded once per process on first use and shared by every session
 
 def keybert_syllabus_parser(syllabus_text, max_keywords=20):
-    kw_model = st.session_state.kw_model
-    nlp = st.session_state.spacy_nlp
-    # 1. KeyBERT: semantic keyword/keyphrase extraction
-    keybert_keywords = kw_model.extract_keywords(
-        syllabus_text,
-        keyphrase_ngram_range=(1, 4),
-        stop_words='english',
-        top_n=max_keywords
-    )
-    keybert_phrases = set([kw for kw, score in keybert_keywords])
-    # 2. Noun phrase extraction (spaCy)
-    doc = nlp(syllabus_text)
-    noun_phrases = set(chunk.text.strip() for chunk in doc.noun_chunks if len(chunk.text.split()) < 8)
-    # 3. Combine and deduplicate
-    all_topics = keybert_phrases | noun_phrases
-    all_topics = [t for t in all_topics if len(t) > 2 and not t.isdigit()]
-    return list(all_topics)
+    # KeyBERT keyphrases plus spaCy noun phrases (batched per unit, parser-only), near-duplicates removed.
+    # Topics and embeddings are cached by syllabus hash; the models load only when a syllabus is new.
+    return cached_syllabus_topics(syllabus_text, lambda: (get_keybert(), get_spacy()), max_keywords,
+                                  (DEFAULT_EMBEDDING_MODEL, DEFAULT_SPACY_MODEL))
 
 def main_dashboard():
     """The main dashboard shown after the user logs in."""
@@ -1388,7 +1605,6 @@ def main_dashboard():
         import re
         import numpy as np
         import pandas as pd
-        from sentence_transformers import SentenceTransformer
         from sklearn.metrics.pairwise import cosine_similarity
         import nltk
         nltk.download('punkt', quiet=True)
@@ -1429,6 +1645,9 @@ def main_dashboard():
             ["Extract from Previous Paper", "GPT-4 (OpenAI API)", "Local LLM (offline)"],
             index=0 if prev_content else (1 if st.secrets.get("OPENAI_API_KEY") else 2)
         )
+        if engine == "Local LLM (offline)":
+            # Load the model while the user finishes the form
+            get_local_llm().start_warmup()
 
         if prev_content and syllabus_content:
             if st.button("🔬 Analyze", type="primary"):
@@ -1442,12 +1661,17 @@ def main_dashboard():
                         if engine == "GPT-4 (OpenAI API)" and st.secrets.get("OPENAI_API_KEY"):
                             questions_text = generate_questions_gpt4(prompt, st.secrets["OPENAI_API_KEY"])
                         else:
-                            questions_text = generate_questions_local(prompt)
+                            try:
+                                questions_text = generate_questions_local(prompt)
+                            except FuturesTimeoutError:
+                                st.error(f"❌ The local model did not answer within {LOCAL_LLM_TIMEOUT} seconds; "
+                                         f"analysing the questions of the previous paper instead.")
+                                questions_text = '\n'.join(extract_questions(prev_content))
                         questions = [q.strip() for q in questions_text.split('\n') if len(q.strip()) > 10]
                     # 2. Extract topics
                     topics = keybert_syllabus_parser(syllabus_content)
                     # 3. Embed questions and topics
-                    model = SentenceTransformer('all-MiniLM-L6-v2')
+                    model = get_sentence_model()
                     q_embeds = model.encode(questions)
                     t_embeds = model.encode(topics)
                     # 4. Map questions to topics
@@ -1540,17 +1764,74 @@ def main_dashboard():
                 ["GPT-4 (OpenAI API)", "Local LLM (offline)"],
                 index=0 if st.secrets.get("OPENAI_API_KEY") else 1
             )
+            if engine == "Local LLM (offline)":
+                get_local_llm().start_warmup()
+            fresh_sample = st.checkbox("🔄 Fresh sample", value=False,
+                                       help="Ask the model again instead of reusing an identical earlier request")
+            instant_paper = st.checkbox("⚡ Instant paper", value=True,
+                                        help="Show a template paper at once and swap in ChatGPT questions as they arrive")
+            upgrade_budget = st.slider("⏱️ Upgrade budget (seconds)", 5, 60, 20, disabled=not instant_paper)
         if st.button("🤖 Generate Questions", type="primary", use_container_width=True):
             if syllabus_text and subject_name and question_types:
                 topics = keybert_syllabus_parser(syllabus_text)
                 prompt = f"Generate {num_questions} {', '.join(question_types)} questions for the subject '{subject_name}' covering these topics: {', '.join(topics)}. Format as a list."
                 if engine == "GPT-4 (OpenAI API)" and st.secrets.get("OPENAI_API_KEY"):
-                    with st.spinner("Generating questions using GPT-4 API..."):
-                        questions_text = generate_questions_gpt4(prompt, st.secrets["OPENAI_API_KEY"])
+                    # Stream: each question is shown as soon as its JSON object is complete
+                    chatgpt = st.session_state.questvibe_gpt4
+                    # The key set on the settings page applies to both models
+                    chatgpt.api_key = st.session_state.questvibe_chatgpt.api_key or st.secrets["OPENAI_API_KEY"]
+                    estimate = chatgpt.estimate_paper(subject_name, topics, num_questions, question_types, parallel=False)
+                    st.caption(f"Planned {estimate['requests']} request(s), about "
+                               f"{estimate['prompt_tokens'] + estimate['completion_tokens']} tokens "
+                               f"(${estimate['cost']:.4f}) and {estimate['seconds']:.0f}s")
+                    
+                    def hedged_live():
+                        # The template paper is on screen at once; ChatGPT questions replace it as they arrive
+                        paper = chatgpt.generate_questions_hedged(subject_name, topics, num_questions, question_types,
+                                                                  upgrade_budget, fresh_sample)
+                        live = st.empty()
+                        version = -1
+                        while version != paper.version or not paper.final:
+                            version = paper.version
+                            with live.container():
+                                st.caption(f"⚡ {paper.upgraded} of {num_questions} questions upgraded by ChatGPT"
+                                           + ("" if paper.final else " (upgrading...)"))
+                                for i, question in enumerate(paper.current(), 1):
+                                    st.markdown(f"**Q{i}:** {question['question']}")
+                            paper.wait_for_change(version)
+                        live.empty()
+                        return [question['question'] for question in paper.current()]
+                    
+                    def stream_live():
+                        live = st.empty()
+                        streamed = []
+                        with live.container():
+                            st.markdown("### 📋 Generating Questions...")
+                            for question in chatgpt.stream_questions(subject_name, topics, num_questions, question_types, fresh_sample):
+                                streamed.append(question['question'])
+                                st.markdown(f"**Q{len(streamed)}:** {question['question']}")
+                        live.empty()
+                        return streamed
+                    
+                    if instant_paper:
+                        streamed = hedged_live()
+                    else:
+                        # Identical requests from other sessions share one stream
+                        key = chatgpt.stream_key(subject_name, topics, num_questions, question_types)
+                        waiting = st.spinner("An identical request is already running; sharing its questions...") \
+                            if not fresh_sample and generation_flight.waiting(key) else nullcontext()
+                        with waiting:
+                            streamed = stream_live()
+                    st.session_state.last_generated_questions = streamed
                 else:
-                    with st.spinner("Generating questions using Local LLM (Mistral-7B-Instruct)..."):
-                        questions_text = generate_questions_local(prompt)
-                st.session_state.last_generated_questions = [q.strip() for q in questions_text.split('\n') if len(q.strip()) > 10]
+                    try:
+                        with st.spinner("Generating questions using Local LLM (Mistral-7B-Instruct)..."):
+                            questions_text = generate_questions_local(prompt)
+                    except FuturesTimeoutError:
+                        st.error(f"❌ The local model did not answer within {LOCAL_LLM_TIMEOUT} seconds. "
+                                 f"Try again, or pick the OpenAI engine.")
+                        st.stop()
+                    st.session_state.last_generated_questions = [q.strip() for q in questions_text.split('\n') if len(q.strip()) > 10]
                 st.success(f"✅ Generated {len(st.session_state.last_generated_questions)} questions!")
             else:
                 st.error("❌ Please provide syllabus content, a subject name, and select question types.")
@@ -1631,7 +1912,11 @@ def main():
         main_dashboard()
 
 def extract_topics_from_content(content: str) -> List[str]:
-    """Extract topics from syllabus content using AI processing"""
+    """Extract topics from syllabus content using AI processing (cached by content hash across sessions)"""
+    return get_topic_cache().get_or_extract(content, 'content-lines-v1', None,
+                                            lambda: _extract_topics_from_content(content))
+
+def _extract_topics_from_content(content: str) -> List[str]:
     # Simple topic extraction (can be enhanced with NLP)
     lines = content.split('\n')
     topics = []
@@ -1681,10 +1966,11 @@ def generate_questions_gpt4(prompt, api_key):
     )
     return response.choices[0].message.content
 
-def generate_questions_local(prompt):
-    generator = pipeline("text-generation", model="mistralai/Mistral-7B-Instruct-v0.2", torch_dtype=torch.float16 if torch.cuda.is_available() else torch.float32, device=0 if torch.cuda.is_available() else -1)
-    result = generator(prompt, max_length=512, do_sample=True, temperature=0.7)
-    return result[0]['generated_text']
+def generate_questions_local(prompt, timeout=None):
+    # Process-wide model (LOCAL_LLM_MODEL picks the checkpoint); concurrent sessions are batched.
+    # Raises concurrent.futures.TimeoutError after timeout seconds (LOCAL_LLM_TIMEOUT by default).
+    return get_local_llm().generate(prompt, timeout=timeout or LOCAL_LLM_TIMEOUT,
+                                    max_new_tokens=512, do_sample=True, temperature=0.7)
 
 if __name__ == "__main__":
     main() 
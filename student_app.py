@@ -3,6 +3,7 @@ import pandas as pd
 import plotly.express as px
 from collections import Counter
 import random
+from src.likelihood_model import score_syllabus_topics
 
 # Page configuration
 st.set_page_config(
@@ -77,6 +78,7 @@ def find_question_probability(questions):
 def generate_sample_papers(syllabus_topics, past_questions, num_papers=3):
     """Generate sample question papers based on syllabus and past patterns"""
     sample_papers = []
+    topic_probability = score_syllabus_topics(syllabus_topics)
     
     for paper_num in range(num_papers):
         paper = {
@@ -99,7 +101,7 @@ def generate_sample_papers(syllabus_topics, past_questions, num_papers=3):
                 topic = random.choice(syllabus_topics)
                 question_text = f"Explain {topic} in detail."
                 marks = random.choice([3, 5, 8])
-                probability = random.randint(20, 60)
+                probability = topic_probability[topic]
             
             paper['questions'].append({
                 'question': question_text,
@@ -6,6 +6,7 @@ import random
 from PIL import Image
 import io
 import base64
+from src.likelihood_model import score_syllabus_topics
 
 # Page configuration
 st.set_page_config(
@@ -440,6 +441,7 @@ def generate_page():
                         
                         # Mix syllabus topics with high-probability past questions
                         high_prob_questions = [q for q in past_questions if q['probability'] >= 50]
+                        topic_probability = score_syllabus_topics(topics)
                         
                         # Generate questions
                         for i in range(questions_per_paper):
@@ -452,7 +454,7 @@ def generate_page():
                                 topic = random.choice(topics)
                                 question_text = f"Explain {topic} in detail."
                                 marks = random.choice([3, 5, 8])
-                                probability = random.randint(20, 60)
+                                probability = topic_probability[topic]
                             
                             paper['questions'].append({
                                 'question': question_text,
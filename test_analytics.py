@@ -0,0 +1,186 @@
+import unittest
+import os
+import sys
+import tempfile
+import numpy as np
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from src.advanced_analyzer import AdvancedExamAnalyzer
+from src.sharded_analyzer import ShardedExamAnalyzer
+from src.likelihood_model import QuestionLikelihoodModel, _wilson_interval, score_syllabus_topics
+
+
+def make_paper(subject, year, topics):
+    """Build a small paper with one short-answer question per topic"""
+    questions = [
+        {'topic': topic, 'type': 'Short Answer', 'bloom_level': 'Understand', 'marks': 3}
+        for topic in topics
+    ]
+    return questions, {'subject': subject, 'year': year}
+
+
+class TestShardedExamAnalyzer(unittest.TestCase):
+    """Test suite for the subject-sharded analyzer"""
+
+    def setUp(self):
+        self.papers = [
+            make_paper('DBMS', 2023, ['SQL', 'Normalization', 'SQL']),
+            make_paper('DBMS', 2024, ['SQL', 'Transactions']),
+            make_paper('Networks', 2024, ['Routing', 'TCP/IP']),
+        ]
+        self.sharded = ShardedExamAnalyzer(max_workers=2)
+        self.single = AdvancedExamAnalyzer()
+        for questions, metadata in self.papers:
+            self.sharded.add_question_paper(questions, metadata)
+            self.single.add_question_paper(questions, metadata)
+
+    def test_partitions_by_subject(self):
+        """Papers land in the shard named by their metadata"""
+        self.assertEqual(sorted(self.sharded.shard_keys()), ['DBMS', 'Networks'])
+        self.assertEqual(len(self.sharded.get_shard('DBMS').question_database), 2)
+
+    def test_department_report_matches_single_analyzer(self):
+        """Merged parallel report equals the unsharded analyzer's report"""
+        expected = self.single.generate_analytics_report()
+        report = self.sharded.generate_analytics_report(parallel=True)
+        department = report['department']
+
+        self.assertEqual(report['total_shards'], 2)
+        self.assertEqual(department['topic_analysis']['topic_frequency'],
+                         expected['topic_analysis']['topic_frequency'])
+        for topic, weight in expected['topic_analysis']['topic_weightage'].items():
+            self.assertAlmostEqual(department['topic_analysis']['topic_weightage'][topic], weight)
+        self.assertEqual(department['type_analysis'], expected['type_analysis'])
+        self.assertEqual(department['hot_topics'], expected['hot_topics'])
+        self.assertEqual(department['total_papers_analyzed'], 3)
+
+    def test_serial_and_parallel_agree(self):
+        """Running without the pool gives identical results"""
+        parallel = self.sharded.generate_analytics_report(parallel=True)
+        serial = self.sharded.generate_analytics_report(parallel=False)
+        self.assertEqual(parallel['shards'].keys(), serial['shards'].keys())
+        self.assertEqual(parallel['department']['topic_analysis'], serial['department']['topic_analysis'])
+
+    def test_predictions_per_shard(self):
+        """Per-shard syllabi are scored only against their own shard"""
+        result = self.sharded.predict_likely_questions(
+            {'DBMS': ['SQL', 'Transactions'], 'Networks': ['Routing']}, num_predictions=5
+        )
+        self.assertEqual([p['topic'] for p in result['shards']['DBMS']], ['SQL', 'Transactions'])
+        self.assertEqual(result['department'][0]['topic'], 'SQL')
+        self.assertEqual([p['shard'] for p in result['department']], ['DBMS', 'Networks', 'DBMS'])
+
+
+class TestQuestionLikelihoodModel(unittest.TestCase):
+    """Test suite for the offline question likelihood model"""
+
+    def setUp(self):
+        # 'SQL' is asked every year, 'Indexing' only once early on
+        self.papers = []
+        for year in range(2016, 2024):
+            topics = ['SQL', 'Normalization'] if year % 2 else ['SQL', 'Transactions']
+            if year == 2016:
+                topics.append('Indexing')
+            questions, metadata = make_paper('DBMS', year, topics)
+            self.papers.append({'questions': questions, 'metadata': metadata})
+        self.model = QuestionLikelihoodModel().fit(self.papers)
+
+    def test_ranks_recurring_topics_higher(self):
+        """Topics asked every year outrank rare and unseen topics"""
+        scores = self.model.score_topics(['SQL', 'Indexing', 'Cloud Computing'])
+        self.assertTrue(self.model.is_trained)
+        self.assertEqual(scores.shape, (3,))
+        self.assertGreater(scores[0], scores[1])
+        self.assertGreater(scores[0], scores[2])
+        self.assertTrue(((scores >= 0) & (scores <= 1)).all())
+
+    def test_prediction_shape_matches_analyzer(self):
+        """Predictions carry the same fields as AdvancedExamAnalyzer predictions"""
+        predictions = self.model.predict_likely_questions(['sql', 'Normalization'], num_predictions=1)
+        self.assertEqual(len(predictions), 1)
+        self.assertEqual(predictions[0]['topic'], 'sql')
+        for key in ['question_type', 'probability', 'confidence', 'historical_frequency', 'recommended_marks']:
+            self.assertIn(key, predictions[0])
+        self.assertEqual(predictions[0]['historical_frequency'], 8)
+
+    def test_confidence_is_a_lower_bound(self):
+        """A rarely asked topic gets low confidence, and the band narrows with more exam years"""
+        predictions = self.model.predict_likely_questions(['SQL', 'Cloud Computing'])
+        for prediction in predictions:
+            self.assertAlmostEqual(prediction['confidence'], prediction['probability_low'])
+            self.assertLessEqual(prediction['probability_low'], prediction['probability'])
+            self.assertLessEqual(prediction['probability'], prediction['probability_high'])
+        unseen = predictions[-1]
+        self.assertEqual(unseen['topic'], 'Cloud Computing')
+        self.assertLess(unseen['confidence'], 50)
+
+        few_low, few_high = _wilson_interval(np.array([0.3]), 3)
+        many_low, many_high = _wilson_interval(np.array([0.3]), 30)
+        self.assertLess(many_high - many_low, few_high - few_low)
+        self.assertEqual(_wilson_interval(np.array([0.3]), 0)[0].tolist(), [0.0])
+
+    def test_interval_uses_each_topics_trials(self):
+        """The band is sized by the years since each topic first appeared, not by the corpus span"""
+        predictions = {p['topic']: p for p in self.model.predict_likely_questions(['SQL', 'Normalization', 'Cloud'])}
+        for topic, trials in [('SQL', 8), ('Normalization', 7)]:
+            low, high = _wilson_interval(np.array([predictions[topic]['probability'] / 100]), trials)
+            self.assertAlmostEqual(predictions[topic]['probability_low'], low[0] * 100)
+            self.assertAlmostEqual(predictions[topic]['probability_high'], high[0] * 100)
+        self.assertEqual((predictions['Cloud']['probability_low'], predictions['Cloud']['probability_high']), (0, 100))
+
+    def test_syllabus_scores_are_consistent(self):
+        """Every topic is scored by the model as a plain float; an untrained model gives an even prior"""
+        scores = score_syllabus_topics(['SQL', 'Cloud Computing'], self.model)
+        self.assertEqual(list(scores), ['SQL', 'Cloud Computing'])
+        self.assertTrue(all(type(score) is float for score in scores.values()))
+        self.assertGreater(scores['SQL'], scores['Cloud Computing'])
+        self.assertEqual(score_syllabus_topics(['SQL', 'Joins'], QuestionLikelihoodModel()), {'SQL': 50.0, 'Joins': 50.0})
+        self.assertEqual(score_syllabus_topics([]), {})
+
+    def test_save_and_load_round_trip(self):
+        """A reloaded model scores identically"""
+        path = tempfile.mktemp(suffix='.pkl')
+        try:
+            self.model.save(path)
+            loaded = QuestionLikelihoodModel.load(path)
+            topics = ['SQL', 'Transactions', 'Indexing']
+            self.assertEqual(loaded.score_topics(topics).tolist(), self.model.score_topics(topics).tolist())
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_incremental_update(self):
+        """New papers extend the corpus summary without a full refit"""
+        questions, metadata = make_paper('DBMS', 2024, ['SQL', 'Cloud Computing'])
+        self.model.update([{'questions': questions, 'metadata': metadata}])
+        self.assertIn(2024, self.model.trained_years)
+        predictions = self.model.predict_likely_questions(['Cloud Computing'])
+        self.assertEqual(predictions[0]['historical_frequency'], 1)
+
+    def test_late_paper_is_not_learned_twice(self):
+        """A paper for an already trained year refits the model instead of repeating that year"""
+        questions, metadata = make_paper('DBMS', 2018, ['SQL', 'Indexing'])
+        late = {'questions': questions, 'metadata': metadata}
+        self.model.update([late])
+        refit = QuestionLikelihoodModel().fit(self.papers + [late])
+        topics = ['SQL', 'Transactions', 'Indexing']
+        np.testing.assert_allclose(self.model.score_topics(topics), refit.score_topics(topics))
+
+    def test_analyzer_predictions_come_from_the_model(self):
+        """The analyzer trains the model on its papers and keeps it in step as papers arrive"""
+        analyzer = AdvancedExamAnalyzer()
+        for paper in self.papers:
+            analyzer.add_question_paper(paper['questions'], paper['metadata'])
+        topics = ['SQL', 'Transactions', 'Cloud Computing']
+        self.assertEqual(analyzer.predict_likely_questions(topics), self.model.predict_likely_questions(topics))
+        questions, metadata = make_paper('DBMS', 2024, ['Cloud Computing'])
+        analyzer.add_question_paper(questions, metadata)
+        predictions = {p['topic']: p for p in analyzer.predict_likely_questions(topics)}
+        self.assertEqual(predictions['Cloud Computing']['historical_frequency'], 1)
+        self.assertEqual(predictions['SQL']['confidence'], predictions['SQL']['probability_low'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,536 @@
+import unittest
+import os
+import sys
+import time
+import random
+import tempfile
+import json
+from collections import Counter
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from src.advanced_generator import AdvancedQuestionGenerator
+from src.model_answer_generator import ModelAnswerGenerator
+from src.lru_cache import LRUCache
+from src.generate import generate_questions, format_export_text
+from src.template_engine import CompiledTemplate
+from src.apportionment import apportion
+from src.blueprint_solver import BlueprintSolver
+from src import question_bank
+from src.question_bank import QuestionBank, get_question_bank
+from src.dedup import DuplicateFilter, deduplicate_questions, padded_paper, repeat_warning
+from src.bulk_generator import BulkGenerationJob, unit_seed
+
+
+TOPICS = ['SQL Queries', 'Normalization', 'Transaction Management', 'Indexing', 'ER Model']
+
+
+class TestPaperVariants(unittest.TestCase):
+    """Test suite for batch paper-variant generation"""
+
+    def setUp(self):
+        self.generator = AdvancedQuestionGenerator()
+        self.exam_config = {
+            'title': 'DBMS End Semester',
+            'total_questions': 20,
+            'question_types': ['MCQ', 'Short Answer', 'Long Answer']
+        }
+
+    def test_same_seeds_reproduce_sets(self):
+        """Identical seeds give identical sets"""
+        first = self.generator.generate_question_paper_variants(TOPICS, self.exam_config, seeds=[1, 2, 3])
+        second = self.generator.generate_question_paper_variants(TOPICS, self.exam_config, seeds=[1, 2, 3])
+        self.assertEqual([p['questions'] for p in first], [p['questions'] for p in second])
+        self.assertEqual([p['paper_info']['variant'] for p in first], ['A', 'B', 'C'])
+
+    def test_sets_share_the_blueprint(self):
+        """Every set has the same topic and type in every slot"""
+        variants = self.generator.generate_question_paper_variants(TOPICS, self.exam_config, num_variants=5)
+        blueprints = {tuple((q['topic'], q['type']) for q in p['questions']) for p in variants}
+        self.assertEqual(len(blueprints), 1)
+        self.assertEqual(variants[0]['paper_info']['total_questions'], 20)
+
+    def test_overlap_limit(self):
+        """No two sets share more than the configured fraction of questions"""
+        variants = self.generator.generate_question_paper_variants(
+            TOPICS, self.exam_config, seeds=list(range(8)), max_overlap=0.25
+        )
+        texts = [[q['question'] for q in p['questions']] for p in variants]
+        for i in range(len(texts)):
+            for j in range(i + 1, len(texts)):
+                shared = sum(1 for t in texts[i] if t in set(texts[j]))
+                self.assertLessEqual(shared, 5)
+
+    def test_infeasible_overlap_raises(self):
+        """An unreachable overlap limit is reported instead of looping"""
+        config = dict(self.exam_config, total_questions=10, question_types=['Long Answer'])
+        with self.assertRaises(ValueError):
+            self.generator.generate_question_paper_variants(
+                ['SQL Queries'], config, seeds=list(range(20)), max_overlap=0.0, max_attempts=10
+            )
+
+
+class TestCompiledTemplates(unittest.TestCase):
+    """Test suite for precompiled templates"""
+
+    def test_records_fields_and_matches_format(self):
+        """Compiled rendering equals str.format and lists each field once"""
+        source = 'How does {topic} relate to {related_concept} in {topic}? {{literal}}'
+        template = CompiledTemplate(source)
+        values = {'topic': 'SQL', 'related_concept': 'indexing'}
+        self.assertEqual(template.fields, ('topic', 'related_concept'))
+        self.assertEqual(template.render(values.__getitem__), source.format(**values))
+
+    def test_resolves_only_needed_placeholders(self):
+        """Templates that use only {topic} never call the placeholder helpers"""
+        generator = AdvancedQuestionGenerator()
+        calls = []
+        generator.placeholder_resolvers = {
+            field: (lambda topic, rng, field=field: calls.append(field) or field)
+            for field in generator.placeholder_resolvers
+        }
+        text = generator._generate_question_text('SQL Queries', 'Long Answer', 'Remember', 'Easy')
+        self.assertIn('SQL Queries', text)
+        self.assertEqual(calls, [])
+
+    def test_model_answers_render_for_every_level(self):
+        """Every type and Bloom level renders, including fields without a dedicated helper"""
+        answer_generator = ModelAnswerGenerator()
+        for qtype in ['MCQ', 'Short Answer', 'Long Answer', 'Case Study']:
+            for bloom in ['Remember', 'Understand', 'Apply', 'Analyze', 'Evaluate', 'Create']:
+                answer = answer_generator.generate_model_answer({'type': qtype, 'bloom_level': bloom, 'topic': 'SQL'})
+                self.assertIn('SQL', answer['main_answer'])
+                self.assertNotIn('{', answer['main_answer'])
+
+
+class TestApportionment(unittest.TestCase):
+    """Test suite for the largest-remainder apportionment engine"""
+
+    def test_largest_remainder(self):
+        """Whole parts are kept and leftovers go to the largest remainders"""
+        self.assertEqual(apportion(10, {'a': 0.4, 'b': 0.35, 'c': 0.25}), {'a': 4, 'b': 4, 'c': 2})
+        self.assertEqual(apportion(7, {'a': 1, 'b': 1, 'c': 1}), {'a': 3, 'b': 2, 'c': 2})
+
+    def test_respects_bounds(self):
+        """Minimums and maximums hold and the total is exact"""
+        result = apportion(20, {'a': 10, 'b': 1, 'c': 1}, minimums=3, maximums={'a': 8})
+        self.assertEqual(sum(result.values()), 20)
+        self.assertEqual(result['a'], 8)
+        self.assertGreaterEqual(min(result.values()), 3)
+
+    def test_infeasible_bounds_raise(self):
+        """Unreachable bounds are reported instead of looping"""
+        with self.assertRaises(ValueError):
+            apportion(5, {'a': 1, 'b': 1}, minimums=3)
+        with self.assertRaises(ValueError):
+            apportion(10, {'a': 1, 'b': 1}, maximums=4)
+
+    def test_type_split_without_mcq_terminates(self):
+        """Type quotas no longer hang when MCQ is not among the requested types"""
+        generator = AdvancedQuestionGenerator()
+        distribution = generator._calculate_type_distribution(7, ['Short Answer', 'Long Answer'])
+        self.assertEqual(distribution, {'Short Answer': 4, 'Long Answer': 3})
+
+    def test_paper_has_exact_question_count(self):
+        """Papers contain exactly total_questions for any topic count"""
+        generator = AdvancedQuestionGenerator()
+        for total in [5, 13, 37]:
+            config = {'total_questions': total, 'question_types': ['Short Answer', 'Case Study']}
+            paper = generator.generate_question_paper(TOPICS[:3], config)
+            self.assertEqual(len(paper['questions']), total)
+
+    def test_paper_has_exact_difficulty_counts(self):
+        """Difficulty counts are apportioned, not sampled, and spread across question types"""
+        generator = AdvancedQuestionGenerator()
+        config = {'total_questions': 10, 'question_types': ['MCQ', 'Short Answer', 'Long Answer']}
+        distribution = {'Easy': 0.3, 'Medium': 0.5, 'Hard': 0.2}
+        for seed in range(20):
+            paper = generator.generate_question_paper(TOPICS[:3], config, distribution, seed=seed)
+            self.assertEqual(Counter(q['difficulty'] for q in paper['questions']), {'Easy': 3, 'Medium': 5, 'Hard': 2})
+        streamed = generator.iter_question_paper(TOPICS, dict(config, total_questions=37), distribution, seed=1)
+        self.assertEqual(Counter(q['difficulty'] for q in streamed), {'Easy': 11, 'Medium': 19, 'Hard': 7})
+        mcqs = [q for q in paper['questions'] if q['type'] == 'MCQ']
+        self.assertGreater(len({q['difficulty'] for q in mcqs}), 1)
+
+
+class TestBlueprintSolver(unittest.TestCase):
+    """Test suite for blueprint-constrained paper assembly"""
+
+    def setUp(self):
+        self.generator = AdvancedQuestionGenerator()
+        self.units = {f'Unit {u}': [f'Topic {u}.{i}' for i in range(3)] for u in range(1, 6)}
+        self.blueprint = {
+            'total_marks': 70,
+            'sections': [
+                {'name': 'Section A', 'questions': 10, 'question_types': ['MCQ']},
+                {'name': 'Section B', 'questions': 5, 'question_types': ['Short Answer']},
+                {'name': 'Section C', 'questions': 4, 'question_types': ['Long Answer']}
+            ],
+            'unit_marks': {unit: [10, 18] for unit in self.units},
+            'bloom_mix': {'Remember': 0.2, 'Understand': 0.3, 'Apply': 0.2, 'Analyze': 0.2, 'Evaluate': 0.1},
+            'difficulty_mix': {'Easy': 0.3, 'Medium': 0.5, 'Hard': 0.2}
+        }
+
+    def test_meets_every_constraint(self):
+        """Total marks, sections, unit bands and mixes hold together"""
+        paper = self.generator.generate_blueprint_paper(self.units, self.blueprint, seed=1)
+        questions = paper['questions']
+        self.assertEqual(sum(q['marks'] for q in questions), 70)
+        self.assertEqual(len(questions), 19)
+        for section in self.blueprint['sections']:
+            chosen = [q for q in questions if q['section'] == section['name']]
+            self.assertEqual(len(chosen), section['questions'])
+            self.assertTrue(all(q['type'] in section['question_types'] for q in chosen))
+        for unit, (low, high) in self.blueprint['unit_marks'].items():
+            unit_marks = sum(q['marks'] for q in questions if q['unit'] == unit)
+            self.assertTrue(low <= unit_marks <= high)
+        targets = apportion(19, self.blueprint['difficulty_mix'])
+        for level, target in targets.items():
+            self.assertLessEqual(abs(sum(1 for q in questions if q['difficulty'] == level) - target), 1)
+        self.assertFalse(any(q['bloom_level'] == 'Create' for q in questions))
+
+    def test_question_texts_are_distinct(self):
+        """No question text repeats, even when the pool renders the same text twice"""
+        for seed in (0, 8):
+            paper = self.generator.generate_blueprint_paper(self.units, self.blueprint, seed=seed)
+            texts = [q['question'] for q in paper['questions']]
+            self.assertEqual(len(texts), len(set(texts)))
+        blueprint = {'total_questions': 8, 'question_types': ['Long Answer']}
+        for seed in range(4):
+            paper = self.generator.generate_blueprint_paper(['Normalization'], blueprint, seed=seed)
+            texts = [q['question'] for q in paper['questions']]
+            self.assertEqual(len(texts), len(set(texts)))
+        repeated = [{'type': 'MCQ', 'marks': 1, 'question': 'Define a key.'} for _ in range(5)]
+        repeated.append({'type': 'MCQ', 'marks': 1, 'question': 'Define a join.'})
+        self.assertEqual(len(BlueprintSolver().solve(repeated, {'total_questions': 2}, seed=0)), 2)
+        with self.assertRaises(ValueError):
+            BlueprintSolver().solve(repeated, {'total_questions': 3}, seed=0)
+
+    def test_infeasible_blueprint_raises_fast(self):
+        """An impossible blueprint is reported quickly"""
+        blueprint = dict(self.blueprint, total_marks=500)
+        start = time.time()
+        with self.assertRaises(ValueError):
+            self.generator.generate_blueprint_paper(self.units, blueprint, seed=1)
+        self.assertLess(time.time() - start, 1.0)
+
+    def test_section_pool_too_small(self):
+        """A section with too few eligible candidates fails before solving"""
+        candidates = [{'type': 'MCQ', 'marks': 1, 'question': str(i)} for i in range(3)]
+        with self.assertRaises(ValueError):
+            BlueprintSolver().solve(candidates, {'total_questions': 5})
+
+    def test_hundred_question_blueprint_is_fast(self):
+        """A 100-question blueprint solves well under a second"""
+        units = {f'Unit {u}': [f'Topic {u}.{i}' for i in range(4)] for u in range(1, 6)}
+        blueprint = {
+            'total_marks': 300,
+            'sections': [
+                {'name': 'Section A', 'questions': 50, 'question_types': ['MCQ']},
+                {'name': 'Section B', 'questions': 30, 'question_types': ['Short Answer']},
+                {'name': 'Section C', 'questions': 20, 'question_types': ['Long Answer', 'Case Study']}
+            ],
+            'unit_marks': {unit: [50, 70] for unit in units},
+            'bloom_mix': {'Remember': 0.2, 'Understand': 0.3, 'Apply': 0.2, 'Analyze': 0.2, 'Evaluate': 0.05, 'Create': 0.05},
+            'difficulty_mix': {'Easy': 0.3, 'Medium': 0.5, 'Hard': 0.2}
+        }
+        start = time.time()
+        paper = self.generator.generate_blueprint_paper(units, blueprint, seed=3)
+        self.assertLess(time.time() - start, 1.0)
+        self.assertEqual(len(paper['questions']), 100)
+        self.assertEqual(paper['paper_info']['total_marks'], 300)
+
+
+class TestQuestionBank(unittest.TestCase):
+    """Test suite for the pre-rendered question bank"""
+
+    FLAT_TEMPLATES = {
+        'MCQ': ['What is {topic}?', 'Which statement about {topic} is true?'],
+        'Short Answer': ['Explain {topic} in {subject}.']
+    }
+
+    def test_sample_is_a_lookup(self):
+        """Samples come from the bank's pre-rendered strata"""
+        bank = QuestionBank(self.FLAT_TEMPLATES)
+        bank.sync('DBMS', TOPICS)
+        self.assertEqual(len(bank), 15)
+        entry = bank.sample('DBMS', 'Indexing', 'Short Answer')
+        self.assertEqual(entry['question'], 'Explain Indexing in DBMS.')
+        self.assertIsNone(bank.sample('DBMS', 'Unknown Topic', 'MCQ'))
+
+    def test_incremental_sync_and_persistence(self):
+        """Only changed topics are rendered; a template change invalidates the saved bank"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'bank.json.gz')
+            QuestionBank(self.FLAT_TEMPLATES, path=path).sync('DBMS', TOPICS)
+
+            reloaded = QuestionBank(self.FLAT_TEMPLATES, path=path)
+            self.assertEqual(len(reloaded), 15)
+            self.assertEqual(reloaded.sync('DBMS', TOPICS[1:] + ['Hashing']), {'added': 1, 'removed': 1})
+            self.assertIsNone(reloaded.sample('DBMS', TOPICS[0], 'MCQ'))
+
+            changed = dict(self.FLAT_TEMPLATES, MCQ=['Define {topic}.'])
+            self.assertEqual(len(QuestionBank(changed, path=path)), 0)
+
+    def test_generator_draws_from_stratified_bank(self):
+        """An attached bank serves every (type, Bloom, difficulty) stratum"""
+        generator = AdvancedQuestionGenerator()
+        bank = QuestionBank(generator.question_templates, generator=generator, per_stratum=3)
+        bank.sync('DBMS', TOPICS[:2])
+        generator.attach_question_bank(bank, 'DBMS')
+        paper = generator.generate_question_paper(TOPICS[:2], {'total_questions': 12})
+        self.assertEqual(len(paper['questions']), 12)
+        for q in paper['questions']:
+            stratum = bank.strata[('DBMS', q['topic'], q['type'], q['bloom_level'], q['difficulty'])]
+            self.assertIn(q['question'], stratum)
+
+    def test_exhausted_stratum_renders_live(self):
+        """Once a paper has used a stratum's texts, the generator renders fresh questions instead of repeating"""
+        bank = QuestionBank(self.FLAT_TEMPLATES)
+        bank.sync('DBMS', TOPICS)
+        used = {'What is Indexing?'}
+        self.assertEqual(bank.sample('DBMS', 'Indexing', 'MCQ', exclude=used)['question'],
+                         'Which statement about Indexing is true?')
+        used.add('Which statement about Indexing is true?')
+        self.assertIsNone(bank.sample('DBMS', 'Indexing', 'MCQ', exclude=used))
+
+        generator = AdvancedQuestionGenerator()
+        thin = QuestionBank(generator.question_templates, generator=generator, per_stratum=1)
+        thin.sync('DBMS', ['Normalization'])
+        generator.attach_question_bank(thin, 'DBMS')
+        paper = generator.generate_question_paper(['Normalization'], {'total_questions': 12,
+                                                                      'question_types': ['Long Answer']}, seed=0)
+        self.assertEqual(paper['paper_info']['repeated_questions'], 0)
+
+    def test_process_wide_bank(self):
+        """Every app call shares one synced bank per app name"""
+        with tempfile.TemporaryDirectory() as directory:
+            previous, question_bank.DEFAULT_BANK_DIR = question_bank.DEFAULT_BANK_DIR, directory
+            try:
+                bank = get_question_bank('test_app', self.FLAT_TEMPLATES, {'DBMS': TOPICS})
+                self.assertIs(get_question_bank('test_app', self.FLAT_TEMPLATES, {'DBMS': TOPICS}), bank)
+                self.assertEqual(len(bank), 15)
+                self.assertTrue(os.path.exists(os.path.join(directory, 'test_app.json.gz')))
+            finally:
+                question_bank.DEFAULT_BANK_DIR = previous
+                question_bank._banks.pop('test_app', None)
+
+
+class TestDeduplication(unittest.TestCase):
+    """Test suite for hash-based duplicate suppression"""
+
+    def test_exact_and_near_duplicates(self):
+        """Normalised text matches exactly; rewordings match only with a near threshold"""
+        exact = DuplicateFilter()
+        exact.add('Explain the concept of SQL Queries.')
+        self.assertIn('explain the  concept of sql queries', exact)
+        self.assertNotIn('Explain the concept of SQL Queries in detail.', exact)
+
+        near = DuplicateFilter(near_threshold=0.6)
+        near.add('Explain the concept of SQL Queries.')
+        self.assertIn('Explain the concept of SQL Queries in detail.', near)
+        self.assertNotIn('Compare hashing with indexing.', near)
+
+    def test_only_colliding_slots_are_redrawn(self):
+        """Resampling is called for repeated slots only"""
+        questions = [{'question': text} for text in ['a', 'b', 'a', 'c', 'b']]
+        redrawn = []
+
+        def resample(index, q):
+            redrawn.append(index)
+            return {'question': f'new {index}'}
+
+        unique = deduplicate_questions(questions, resample)
+        self.assertEqual(redrawn, [2, 4])
+        self.assertEqual([q['question'] for q in unique], ['a', 'b', 'new 2', 'c', 'new 4'])
+        self.assertEqual(len(deduplicate_questions(questions)), 3)
+
+    def test_papers_and_batches_are_unique(self):
+        """A paper never repeats a question, and a zero-overlap batch shares none"""
+        generator = AdvancedQuestionGenerator()
+        paper = generator.generate_question_paper(TOPICS[:2], {'total_questions': 30})
+        texts = [q['question'] for q in paper['questions']]
+        self.assertEqual(len(texts), len(set(texts)))
+
+        config = {'total_questions': 15, 'question_types': ['Short Answer', 'Long Answer']}
+        variants = generator.generate_question_paper_variants(TOPICS, config, seeds=[1, 2, 3], max_overlap=0.0)
+        all_texts = [q['question'] for p in variants for q in p['questions']]
+        self.assertEqual(len(all_texts), len(set(all_texts)))
+
+    def test_padded_paper(self):
+        """Types share the questions evenly; padded topics are redrawn until the texts are unique"""
+        make = lambda topic, qtype: {'question': f'{qtype} on {topic} #{random.randrange(3)}', 'type': qtype}
+        questions = padded_paper(TOPICS, 11, ['MCQ', 'Short Answer'], make, random.Random(1))
+        self.assertEqual(Counter(q['type'] for q in questions), {'MCQ': 6, 'Short Answer': 5})
+        self.assertEqual(len({q['question'] for q in questions}), 11)
+        self.assertIsNone(repeat_warning(questions))
+
+    def test_short_syllabus_fills_with_marked_repeats(self):
+        """A paper too long for its syllabus keeps its length, flags the repeats, or fails when asked to"""
+        generator = AdvancedQuestionGenerator()
+        config = {'total_questions': 30, 'question_types': ['Long Answer']}
+        paper = generator.generate_question_paper(['Normalization'], config, seed=1)
+        self.assertEqual(len(paper['questions']), 30)
+        repeats = paper['paper_info']['repeated_questions']
+        self.assertGreater(repeats, 0)
+        unique = [q['question'] for q in paper['questions'] if not q.get('repeat')]
+        self.assertEqual(len(unique), len(set(unique)))
+        self.assertEqual(len(unique), 30 - repeats)
+        self.assertIn(f'{repeats} of 30', repeat_warning(paper['questions']))
+
+        streamed = list(generator.iter_question_paper(['Normalization'], config, seed=1))
+        self.assertEqual(len(streamed), 30)
+        self.assertTrue(any(q.get('repeat') for q in streamed))
+
+        with self.assertRaises(ValueError):
+            generator.generate_question_paper(['Normalization'], config, seed=1, allow_repeats=False)
+        with self.assertRaises(ValueError):
+            list(generator.iter_question_paper(['Normalization'], config, seed=1, allow_repeats=False))
+
+        kept = deduplicate_questions([{'question': 'a'}, {'question': 'a'}], keep_repeats=True)
+        self.assertEqual(kept, [{'question': 'a'}, {'question': 'a', 'repeat': True}])
+        self.assertIsNone(repeat_warning(kept[:1]))
+
+
+class TestBulkGeneration(unittest.TestCase):
+    """Test suite for process-pool bulk generation"""
+
+    CATALOGUE = {
+        'CSE': {
+            'subjects': ['DBMS', 'Networks', 'Compilers'],
+            'exam_topics': {
+                'DBMS': TOPICS,
+                'Networks': ['Routing', 'TCP/IP', 'Switching', 'DNS', 'Wireless'],
+                'Compilers': ['Parsing']
+            }
+        }
+    }
+
+    def _run(self, output_dir, **kwargs):
+        # Only the fallback template exists for this type, so one topic cannot fill five questions
+        job = BulkGenerationJob(self.CATALOGUE, {'total_questions': 5, 'question_types': ['Oral']},
+                                num_variants=2, base_seed=11, output_dir=output_dir, max_workers=2, **kwargs)
+        return job, job.run()
+
+    def test_deterministic_with_failures_reported(self):
+        """Seeded runs reproduce the same papers; a failing unit is retried then reported"""
+        with tempfile.TemporaryDirectory() as first_dir, tempfile.TemporaryDirectory() as second_dir:
+            job, first = self._run(first_dir, max_retries=1)
+            _, second = self._run(second_dir, max_retries=1)
+            self.assertEqual(len(first['completed']), 4)
+            self.assertEqual(len(first['failed']), 2)
+            for unit in job.work_units():
+                if unit['subject'] == 'Compilers':
+                    continue
+                relative = os.path.relpath(unit['path'], first_dir)
+                with open(unit['path']) as f, open(os.path.join(second_dir, relative)) as g:
+                    self.assertEqual(json.load(f)['questions'], json.load(g)['questions'])
+                self.assertTrue(os.path.exists(unit['path'][:-5] + '.txt'))
+
+    def test_retries_use_new_seeds(self):
+        """A seed-dependent failure is retried with a fresh seed, recorded on the paper"""
+        # With base seed 2 this unit's first seed runs out of distinct questions; its first retry does not
+        config = {'total_questions': 16, 'question_types': ['Long Answer']}
+        with tempfile.TemporaryDirectory() as output_dir:
+            job = BulkGenerationJob({'Compilers': ['Parsing']}, config, base_seed=2, output_dir=output_dir,
+                                    max_workers=1, max_retries=0)
+            self.assertEqual(len(job.run()['failed']), 1)
+            job.max_retries = 2
+            summary = job.run()
+            self.assertEqual(len(summary['completed']), 1)
+            with open(summary['completed'][0]) as f:
+                info = json.load(f)['paper_info']
+            self.assertEqual(info['attempt'], 1)
+            self.assertEqual(info['seed'], unit_seed(2, '', 'Compilers', 0, 1))
+            self.assertNotEqual(info['seed'], job.work_units()[0]['seed'])
+
+    def test_resume_skips_finished_units(self):
+        """A re-run only retries what is missing"""
+        with tempfile.TemporaryDirectory() as output_dir:
+            self._run(output_dir, max_retries=0)
+            _, rerun = self._run(output_dir, max_retries=0)
+            self.assertEqual(rerun['skipped'], 4)
+            self.assertEqual(rerun['completed'], [])
+
+
+class TestStreamingGeneration(unittest.TestCase):
+    """Test suite for question-by-question paper generation"""
+
+    def test_yields_questions_before_paper_is_done(self):
+        """The first question is available before the rest are generated"""
+        generator = AdvancedQuestionGenerator()
+        config = {'total_questions': 50, 'question_types': ['MCQ', 'Short Answer', 'Long Answer']}
+        stream = generator.iter_question_paper(TOPICS, config, seed=3)
+        first = next(stream)
+        self.assertEqual(first['id'], 1)
+        questions = [first] + list(stream)
+        self.assertEqual([q['id'] for q in questions], list(range(1, 51)))
+        self.assertEqual(len({q['question'] for q in questions}), 50)
+        paper = generator.assemble_paper(questions, TOPICS, config)
+        self.assertEqual(paper['paper_info']['total_questions'], 50)
+
+
+class TestModelAnswerCache(unittest.TestCase):
+    """Test suite for memoised model answers"""
+
+    def setUp(self):
+        self.questions = AdvancedQuestionGenerator().generate_question_paper(
+            TOPICS, {'total_questions': 100}, seed=5)['questions']
+
+    def test_batch_matches_single_answers(self):
+        """The batch API returns what a fresh per-question call would"""
+        answers = ModelAnswerGenerator().generate_model_answers(self.questions)
+        reference = ModelAnswerGenerator(cache_size=0)
+        self.assertEqual(len(answers), len(self.questions))
+        for question, answer in zip(self.questions, answers):
+            self.assertEqual(answer, reference.generate_model_answer(question))
+
+    def test_components_cached_at_their_own_granularity(self):
+        """A new topic reuses the components that do not depend on it"""
+        generator = ModelAnswerGenerator()
+        generator.generate_model_answer({'type': 'Long Answer', 'bloom_level': 'Analyze', 'topic': 'SQL', 'marks': 10})
+        generator.generate_model_answer({'type': 'Long Answer', 'bloom_level': 'Analyze', 'topic': 'ER Model', 'marks': 10})
+        self.assertEqual(generator.caches['marking_scheme'].hits, 1)
+        self.assertEqual(generator.caches['expected_length'].hits, 1)
+        self.assertEqual(generator.caches['key_points'].hits, 0)
+
+    def test_answer_key_is_fast(self):
+        """A 100-question answer key renders in a few milliseconds once warm"""
+        generator = ModelAnswerGenerator()
+        generator.generate_model_answers(self.questions)
+        start = time.perf_counter()
+        generator.generate_model_answers(self.questions)
+        self.assertLess(time.perf_counter() - start, 0.02)
+
+    def test_answers_are_lazy_and_kept_on_paper(self):
+        """Answers are generated on first use only, then read back from the paper"""
+        generator = ModelAnswerGenerator()
+        paper = {'questions': [dict(q) for q in self.questions[:5]]}
+        self.assertTrue(all('model_answer' not in q for q in paper['questions']))
+        first = generator.answer_key(paper)
+        generator.generate_model_answer = None  # any further generation would fail
+        self.assertEqual(generator.answer_key(paper), first)
+
+    def test_question_only_export_skips_answers(self):
+        """Exporting without answers never generates one"""
+        questions = generate_questions(['SQL', 'Joins'], ['MCQ', 'Short Answer'], 4)
+        text = format_export_text(questions, include_answers=False)
+        self.assertNotIn('Model Answer', text)
+        self.assertTrue(all('model_answer' not in q for q in questions))
+        self.assertIn('Model Answer', format_export_text(questions))
+
+    def test_lru_eviction(self):
+        """The least recently used entry goes first"""
+        cache = LRUCache(maxsize=2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.get('a')
+        cache.put('c', 3)
+        self.assertEqual(len(cache), 2)
+        self.assertIn('a', cache)
+        self.assertNotIn('b', cache)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,846 @@
+import unittest
+import os
+import sys
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import tempfile
+
+import requests
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from src.llm_stream import (QuestionStreamParser, is_complete_response, iter_sse_content, iter_streamed_questions,
+                            parse_questions)
+from src.llm_fanout import fan_out
+from src.llm_cache import LLMResponseCache, cache_key
+from src.llm_client import APIError, ChatCompletionsClient, CircuitBreaker, CircuitOpenError
+from src.local_llm import LocalLLMServer, benchmark, get_local_llm
+from src.token_budget import TokenBudget, compact_prompt, estimate_tokens
+from src.singleflight import SingleFlight, request_key
+from src.mock_openai_server import DEFAULT_PAYLOAD, MockOpenAIServer, load_test
+from src.hedged_generation import HedgedPaper
+from src.nlp_models import load_shared, loaded_models
+
+
+QUESTIONS = [
+    {'type': 'MCQ', 'question': 'Which key identifies a row {uniquely}?', 'options': ['A', 'B', 'C', 'D'],
+     'correct_answer': 'A', 'topic': 'SQL'},
+    {'type': 'Short Answer', 'question': 'Explain "normal forms".', 'topic': 'Normalization'},
+    {'type': 'Long Answer', 'question': 'Discuss ACID properties.', 'topic': 'Transactions'},
+]
+
+
+def sse_lines(text, size=7):
+    """Split a completion into chat-completions stream events"""
+    for i in range(0, len(text), size):
+        event = {'choices': [{'delta': {'content': text[i:i + size]}, 'index': 0}]}
+        yield f"data: {json.dumps(event)}".encode('utf-8')
+        yield b''
+    yield b'data: [DONE]'
+
+
+class TestQuestionStreamParser(unittest.TestCase):
+    """Test suite for incremental question parsing of streamed completions"""
+
+    def setUp(self):
+        self.completion = "Here you go:\n```json\n" + json.dumps({'questions': QUESTIONS}, indent=2) + "\n```"
+
+    def test_emits_each_question_when_its_object_closes(self):
+        """Questions appear one by one, each right after its closing brace"""
+        parser = QuestionStreamParser()
+        emitted_at = []
+        for position, ch in enumerate(self.completion):
+            for question in parser.feed(ch):
+                emitted_at.append((position, question))
+        self.assertEqual([q for _, q in emitted_at], QUESTIONS)
+        first_close = self.completion.index('}', self.completion.index('correct_answer'))
+        self.assertEqual(emitted_at[0][0], first_close)
+
+    def test_truncated_stream_keeps_complete_questions(self):
+        """A cut-off completion still yields every question that finished"""
+        cut = self.completion.index('Discuss')
+        questions = list(iter_streamed_questions([self.completion[:cut]]))
+        self.assertEqual(questions, QUESTIONS[:2])
+
+    def test_reads_server_sent_events(self):
+        """Deltas are reassembled from the event stream in order"""
+        text = ''.join(iter_sse_content(sse_lines(self.completion)))
+        self.assertEqual(text, self.completion)
+        questions = list(iter_streamed_questions(iter_sse_content(sse_lines(self.completion, size=3))))
+        self.assertEqual(len(questions), 3)
+
+    def test_skips_bracketed_prose_and_finds_nested_arrays(self):
+        """Asides like [1] before the JSON are passed over; nested question arrays are found"""
+        nested = json.dumps({'paper': {'sections': [{'name': 'A', 'questions': QUESTIONS[:2]}]}})
+        text = "Here are [2] questions {as requested}:\n" + nested
+        self.assertEqual(parse_questions(text), QUESTIONS[:2])
+
+    def test_tolerates_trailing_commas_and_cut_strings(self):
+        """A trailing comma is forgiven; a cut inside a string drops only that question"""
+        text = '{"questions": [{"question": "Define a key.", "type": "MCQ",}, {"question": "Explain jo'
+        self.assertEqual(parse_questions(text), [{'question': 'Define a key.', 'type': 'MCQ'}])
+
+    def test_bare_array_and_several_blocks(self):
+        """Top-level arrays work, and a second JSON block is read after the first"""
+        text = json.dumps(QUESTIONS[:1]) + "\nAnd one more:\n" + json.dumps({'questions': QUESTIONS[2:]})
+        self.assertEqual(parse_questions(text), [QUESTIONS[0], QUESTIONS[2]])
+
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Answers a chat-completions request with one question per topic named in the prompt"""
+
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        prompt = body['messages'][0]['content']
+        with server.lock:
+            server.active += 1
+            server.peak = max(server.peak, server.active)
+        time.sleep(server.latency)
+        with server.lock:
+            server.active -= 1
+        topics = json.loads(prompt)['topics']
+        questions = [{'type': 'Short Answer', 'question': f'Explain {topic}.', 'topic': topic} for topic in topics]
+        questions.append({'type': 'MCQ', 'question': 'What is a database?', 'topic': topics[0]})
+        content = json.dumps({'questions': questions})
+        payload = json.dumps({'choices': [{'message': {'role': 'assistant', 'content': content}}]}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestConcurrentFanOut(unittest.TestCase):
+    """Test suite for per-topic parallel generation against a local stand-in server"""
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+        self.server.lock = threading.Lock()
+        self.server.active = self.server.peak = 0
+        self.server.latency = 0.2
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/v1/chat/completions"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def generate_chunk(self, topics, count):
+        prompt = json.dumps({'topics': topics, 'count': count})
+        response = requests.post(self.url, json={'messages': [{'role': 'user', 'content': prompt}]}, timeout=5)
+        return json.loads(response.json()['choices'][0]['message']['content'])['questions']
+
+    def test_requests_run_in_parallel_under_the_cap(self):
+        """Chunks overlap up to the cap, and the merged result has no duplicates"""
+        topics = [f'Topic {i}' for i in range(8)]
+        chunks = [([topic], 2) for topic in topics]
+        start = time.perf_counter()
+        questions = fan_out(chunks, self.generate_chunk, max_concurrency=4)
+        elapsed = time.perf_counter() - start
+        self.assertEqual(self.server.peak, 4)
+        self.assertLess(elapsed, 8 * self.server.latency)
+        texts = [q['question'] for q in questions]
+        self.assertEqual(len(texts), 9)  # one per topic plus the shared question once
+        self.assertEqual(texts[0], 'Explain Topic 0.')
+
+    def test_failed_chunk_uses_fallback(self):
+        """A chunk whose request fails is filled by the fallback"""
+        def generate_chunk(topics, count):
+            if topics == ['b']:
+                raise ConnectionError('upstream down')
+            return self.generate_chunk(topics, count)
+        fallback = lambda topics, count: [{'question': f'Fallback on {topics[0]}', 'topic': topics[0]}]
+        questions = fan_out([(['a'], 1), (['b'], 1)], generate_chunk, fallback=fallback)
+        self.assertIn('Fallback on b', [q['question'] for q in questions])
+
+
+
+class TestLLMResponseCache(unittest.TestCase):
+    """Test suite for the persistent LLM response cache"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'llm_cache.db')
+        self.calls = []
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def call(self):
+        self.calls.append(1)
+        return f'response {len(self.calls)}'
+
+    def test_normalised_prompts_share_an_entry(self):
+        """Whitespace differences hit the same entry; model parameters do not"""
+        cache = LLMResponseCache(self.path)
+        params = {'model': 'gpt-3.5-turbo', 'temperature': 0.7}
+        first = cache.get_or_call('Generate  5 questions\n  on SQL', params, self.call)
+        second = cache.get_or_call('Generate 5 questions on SQL', params, self.call)
+        self.assertEqual(first, second)
+        self.assertEqual(len(self.calls), 1)
+        cache.get_or_call('Generate 5 questions on SQL', dict(params, temperature=0.2), self.call)
+        self.assertEqual(len(self.calls), 2)
+
+    def test_shared_across_instances_and_fresh_flag(self):
+        """Another process's cache object sees the entry; fresh forces and stores a new sample"""
+        LLMResponseCache(self.path).get_or_call('prompt', None, self.call)
+        other = LLMResponseCache(self.path)
+        self.assertEqual(other.get_or_call('prompt', None, self.call), 'response 1')
+        self.assertEqual(other.get_or_call('prompt', None, self.call, fresh=True), 'response 2')
+        self.assertEqual(other.get(cache_key('prompt')), 'response 2')
+
+    def test_rejected_response_is_not_stored(self):
+        """A truncated completion is returned to the caller, but the next request calls the model again"""
+        cache = LLMResponseCache(self.path)
+        responses = iter(['{"questions": [{"question": "Define SQL."}, {"quest',
+                          '{"questions": [{"question": "Define SQL."}]}'])
+        call = lambda: next(responses)
+        truncated = cache.get_or_call('prompt', None, call, validate=is_complete_response)
+        self.assertTrue(truncated.endswith('{"quest'))
+        self.assertEqual(len(cache), 0)
+        complete = cache.get_or_call('prompt', None, call, validate=is_complete_response)
+        self.assertEqual(cache.get_or_call('prompt', None, call, validate=is_complete_response), complete)
+        self.assertEqual(cache.get(cache_key('prompt')), complete)
+        self.assertFalse(is_complete_response('Sorry, I cannot help with that.'))
+
+    def test_ttl_and_size_eviction(self):
+        """Expired entries miss, and the least recently used entry is evicted first"""
+        expired = LLMResponseCache(self.path, ttl=-1)
+        expired.put('a', 'x')
+        self.assertIsNone(expired.get('a'))
+
+        cache = LLMResponseCache(self.path, max_entries=2)
+        cache.put('a', '1')
+        time.sleep(0.01)
+        cache.put('b', '2')
+        time.sleep(0.01)
+        cache.get('a')
+        cache.put('c', '3')
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), '1')
+
+
+
+class ScriptedHandler(BaseHTTPRequestHandler):
+    """Replies with the next scripted (status, delay) and records the client port of each request"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        server = self.server
+        server.ports.append(self.client_address[1])
+        status, delay = server.script.pop(0) if server.script else (200, 0)
+        time.sleep(delay)
+        if status == 200:
+            payload = json.dumps({'choices': [{'message': {'content': 'ok'}}]}).encode('utf-8')
+        else:
+            payload = b'{"error": {"message": "scripted"}}'
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        if status == 429:
+            self.send_header('Retry-After', '0.01')
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestChatCompletionsClient(unittest.TestCase):
+    """Test suite for the pooled client's timeouts, retries and circuit breaker"""
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), ScriptedHandler)
+        self.server.script = []
+        self.server.ports = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/v1/chat/completions"
+        self.sleeps = []
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def client(self, **kwargs):
+        return ChatCompletionsClient(self.url, sleep=self.sleeps.append, **kwargs)
+
+    def test_keeps_connection_alive(self):
+        """Consecutive calls reuse one pooled connection"""
+        client = self.client()
+        for _ in range(3):
+            self.assertEqual(client.complete({'messages': []}, 'key'), 'ok')
+        self.assertEqual(len(set(self.server.ports)), 1)
+
+    def test_retries_transient_failures_with_backoff(self):
+        """429 and 5xx are retried; Retry-After is honoured and jitter stays under the ceiling"""
+        self.server.script = [(503, 0), (429, 0)]
+        client = self.client(backoff_base=0.5)
+        self.assertEqual(client.complete({'messages': []}, 'key'), 'ok')
+        self.assertEqual(len(self.sleeps), 2)
+        self.assertLessEqual(self.sleeps[0], 0.5)
+        self.assertEqual(self.sleeps[1], 0.01)
+        metrics = client.metrics.snapshot()
+        # One call that succeeded after two failed attempts
+        self.assertEqual((metrics['calls'], metrics['failures'], metrics['error_rate']), (1, 0, 0.0))
+        self.assertEqual((metrics['attempts'], metrics['attempt_failures'], metrics['retries']), (3, 2, 2))
+        self.assertEqual(metrics['statuses'], {503: 1, 429: 1, 200: 1})
+
+    def test_client_errors_are_not_retried(self):
+        """A 4xx other than 429 fails at once"""
+        self.server.script = [(401, 0)]
+        with self.assertRaises(APIError) as raised:
+            self.client().complete({'messages': []}, 'bad key')
+        self.assertEqual(raised.exception.status, 401)
+        self.assertEqual(len(self.server.ports), 1)
+
+    def test_read_timeout_bounds_a_slow_upstream(self):
+        """A hung response is abandoned after the read timeout"""
+        self.server.script = [(200, 1.0)]
+        start = time.perf_counter()
+        with self.assertRaises(APIError):
+            self.client(read_timeout=0.2, max_retries=0).complete({'messages': []}, 'key')
+        self.assertLess(time.perf_counter() - start, 0.9)
+
+    def test_breaker_fails_fast_then_recovers(self):
+        """Once open, calls are refused without a request until the reset timeout passes"""
+        self.server.script = [(500, 0)] * 2
+        client = self.client(max_retries=0, breaker=CircuitBreaker(failure_threshold=2, reset_timeout=0.2))
+        for _ in range(2):
+            with self.assertRaises(APIError):
+                client.complete({'messages': []}, 'key')
+        with self.assertRaises(CircuitOpenError):
+            client.complete({'messages': []}, 'key')
+        self.assertEqual(len(self.server.ports), 2)
+        time.sleep(0.25)
+        self.assertEqual(client.complete({'messages': []}, 'key'), 'ok')
+        self.assertEqual(client.breaker.state, 'closed')
+        self.assertEqual(client.metrics.snapshot()['short_circuited'], 1)
+
+    def test_unexpected_error_ends_the_trial(self):
+        """A half-open trial that dies with a non-request error does not leave the circuit stuck"""
+        self.server.script = [(500, 0)]
+        client = self.client(max_retries=0, breaker=CircuitBreaker(failure_threshold=1, reset_timeout=0.05))
+        with self.assertRaises(APIError):
+            client.complete({'messages': []}, 'key')
+        time.sleep(0.1)
+        post = client.session.post
+        client.session.post = lambda *args, **kwargs: json.loads('not json')
+        with self.assertRaises(ValueError):
+            client.complete({'messages': []}, 'key')
+        client.session.post = post
+        self.assertEqual(client.complete({'messages': []}, 'key'), 'ok')
+        self.assertEqual(client.breaker.state, 'closed')
+        metrics = client.metrics.snapshot()
+        self.assertEqual((metrics['calls'], metrics['failures']), (3, 2))
+
+
+
+class TestTokenBudget(unittest.TestCase):
+    """Test suite for request planning against a token budget"""
+
+    def setUp(self):
+        self.budget = TokenBudget(max_completion_tokens=1000)
+        self.topics = [f'Topic {i}' for i in range(10)]
+
+    def test_estimates_and_compaction(self):
+        """Estimates track text length; compaction drops indentation and blank lines"""
+        self.assertEqual(estimate_tokens(''), 0)
+        self.assertAlmostEqual(estimate_tokens('word ' * 400), 534, delta=150)
+        prompt = """
+            First line
+
+            Second line   
+        """
+        self.assertEqual(compact_prompt(prompt), 'First line\nSecond line')
+
+    def test_large_paper_split_within_budget(self):
+        """Every request fits max_tokens and the counts add up to the paper"""
+        plan = self.budget.plan(self.topics, 100, ['MCQ', 'Long Answer'], prompt_tokens=300)
+        self.assertGreater(len(plan), 1)
+        self.assertEqual(sum(r['count'] for r in plan), 100)
+        self.assertTrue(all(r['max_tokens'] <= 1000 for r in plan))
+        self.assertEqual({t for r in plan for t in r['topics']}, set(self.topics))
+
+    def test_small_paper_is_one_request(self):
+        """A paper that fits is not split, and one topic with many questions is split by count"""
+        self.assertEqual(len(self.budget.plan(self.topics, 5, ['Short Answer'], prompt_tokens=300)), 1)
+        plan = self.budget.plan(['SQL'], 40, ['MCQ'], prompt_tokens=300)
+        self.assertGreater(len(plan), 1)
+        self.assertEqual(sum(r['count'] for r in plan), 40)
+
+    def test_estimate_predicts_cost_and_latency(self):
+        """Cost follows the tokens, and concurrency shortens the expected time"""
+        plan = self.budget.plan(self.topics, 100, ['MCQ'], prompt_tokens=300)
+        serial = self.budget.estimate(plan, 300, concurrency=1)
+        parallel = self.budget.estimate(plan, 300, concurrency=4)
+        self.assertEqual(serial['requests'], len(plan))
+        self.assertGreater(serial['cost'], 0)
+        self.assertLess(parallel['seconds'], serial['seconds'])
+
+    def test_budget_follows_model(self):
+        """GPT-4 plans against its smaller window and prices; unknown models keep the defaults"""
+        gpt4 = TokenBudget.for_model('gpt-4', max_completion_tokens=1000)
+        self.assertEqual((gpt4.context_window, gpt4.max_completion_tokens), (8192, 1000))
+        plan = self.budget.plan(self.topics, 20, ['MCQ'], prompt_tokens=300)
+        self.assertGreater(gpt4.estimate(plan, 300)['cost'], 10 * self.budget.estimate(plan, 300)['cost'])
+        self.assertEqual(TokenBudget.for_model('other').context_window, TokenBudget().context_window)
+
+
+
+def build_tiny_model(path):
+    """Save a randomly initialised two-layer GPT-2 with a word-level tokenizer (no downloads)"""
+    from tokenizers import Tokenizer, models, pre_tokenizers, trainers
+    from transformers import PreTrainedTokenizerFast, GPT2Config, GPT2LMHeadModel
+
+    tokenizer = Tokenizer(models.WordLevel(unk_token='[UNK]'))
+    tokenizer.pre_tokenizer = pre_tokenizers.Whitespace()
+    tokenizer.train_from_iterator(['generate a question about sql joins normalization topic database'],
+                                  trainers.WordLevelTrainer(special_tokens=['[UNK]', '[EOS]']))
+    fast = PreTrainedTokenizerFast(tokenizer_object=tokenizer, unk_token='[UNK]', eos_token='[EOS]')
+    fast.save_pretrained(path)
+    config = GPT2Config(vocab_size=fast.vocab_size, n_positions=64, n_embd=32, n_layer=2, n_head=2,
+                        bos_token_id=1, eos_token_id=1)
+    GPT2LMHeadModel(config).save_pretrained(path)
+
+
+class TestLocalLLMServer(unittest.TestCase):
+    """Test suite for the process-wide micro-batching local model server"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        build_tiny_model(cls.tmp.name)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+
+    def test_concurrent_prompts_share_batches(self):
+        """Prompts arriving together are generated in one pipeline call"""
+        server = LocalLLMServer(self.tmp.name, max_batch_size=8, max_wait=0.2, device=-1,
+                                generation_defaults={'max_new_tokens': 4, 'do_sample': False})
+        server.warmup()
+        served, batches = server.stats['requests'], server.stats['batches']
+        prompts = [f'generate a question about topic {i}' for i in range(8)]
+        futures = [server.submit(prompt) for prompt in prompts]
+        outputs = [future.result(timeout=30) for future in futures]
+        for prompt, output in zip(prompts, outputs):
+            self.assertTrue(output.startswith(prompt.split()[0]))
+        self.assertEqual(server.stats['requests'] - served, 8)
+        self.assertLess(server.stats['batches'] - batches, 8)
+
+    def test_model_loaded_once_per_process(self):
+        """The registry hands every caller the same loaded server"""
+        first = get_local_llm(self.tmp.name, device=-1)
+        self.assertIs(get_local_llm(self.tmp.name), first)
+        first.start_warmup().join(30)
+        pipe = first.pipe
+        self.assertIsNotNone(pipe)
+        first.generate('sql joins', max_new_tokens=2)
+        self.assertIs(first.pipe, pipe)
+
+    def test_worker_survives_failed_and_cancelled_requests(self):
+        """A batch that fails after generation, or a cancelled prompt, leaves the worker serving"""
+        server = LocalLLMServer('unused', max_wait=0.2)
+        server.pipe = lambda prompts, **kwargs: [{}]  # malformed output: reading it fails
+        with self.assertRaises(KeyError):
+            server.generate('first', timeout=5)
+
+        seen = []
+        server.pipe = lambda prompts, **kwargs: seen.extend(prompts) or [[{'generated_text': p + '!'}] for p in prompts]
+        cancelled = server.submit('cancelled')
+        self.assertTrue(cancelled.cancel())
+        self.assertEqual(server.generate('second', timeout=5), 'second!')
+        self.assertEqual(seen, ['second'])
+        self.assertTrue(server.worker.is_alive())
+
+    def test_warmup_runs_on_the_worker(self):
+        """A background warm-up calls the pipeline from the batching worker, never its own thread"""
+        server = LocalLLMServer('unused', max_wait=0.05)
+        threads = []
+        server.pipe = lambda prompts, **kwargs: (threads.append(threading.current_thread())
+                                                 or [[{'generated_text': p}] for p in prompts])
+        server.start_warmup().join(5)
+        server.generate('sql joins', timeout=5)
+        self.assertEqual(threads, [server.worker, server.worker])
+
+    def test_cpu_benchmark_with_quantised_model(self):
+        """The benchmark reports throughput and latency for a quantised CPU model"""
+        server = LocalLLMServer(self.tmp.name, max_batch_size=4, device=-1, quantize=True)
+        result = benchmark(server, ['generate a question'] * 8, concurrency=4, max_new_tokens=2, do_sample=False)
+        self.assertEqual(result['requests'], 8)
+        self.assertGreater(result['throughput'], 0)
+        self.assertLessEqual(result['largest_batch'], 4)
+
+
+class TestSingleFlight(unittest.TestCase):
+    """Identical concurrent requests run once and share the result"""
+
+    def run_together(self, flight, key, fn, callers, timeout=None):
+        """Start callers identical calls once the first is in flight; returns results or exceptions"""
+        def call():
+            try:
+                return flight.do(key, fn, timeout)
+            except Exception as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=callers) as executor:
+            first = executor.submit(call)
+            while not flight.waiting(key):
+                time.sleep(0.001)
+            rest = [executor.submit(call) for _ in range(callers - 1)]
+            return [first.result()] + [future.result() for future in rest]
+
+    def test_identical_calls_run_once(self):
+        flight = SingleFlight()
+        runs = []
+
+        def generate():
+            runs.append(1)
+            time.sleep(0.2)
+            return [dict(q) for q in QUESTIONS]
+
+        results = self.run_together(flight, 'paper', generate, 10)
+        self.assertEqual(len(runs), 1)
+        self.assertEqual(flight.stats, {'calls': 1, 'shared': 9})
+        for result in results:
+            self.assertEqual(result, QUESTIONS)
+        # Every caller gets its own copy to annotate
+        results[1][0]['model_answer'] = 'x'
+        self.assertNotIn('model_answer', results[2][0])
+        self.assertNotIn('model_answer', results[0][0])
+
+    def test_distinct_keys_run_separately(self):
+        flight = SingleFlight()
+        runs = []
+        for key in ('a', 'b'):
+            flight.do(key, lambda: runs.append(1))
+        self.assertEqual(len(runs), 2)
+
+    def test_key_released_after_completion(self):
+        flight = SingleFlight()
+        runs = []
+        flight.do('paper', lambda: runs.append(1))
+        self.assertFalse(flight.waiting('paper'))
+        flight.do('paper', lambda: runs.append(1))
+        self.assertEqual(len(runs), 2)
+
+    def test_waiter_timeout(self):
+        flight = SingleFlight()
+        results = self.run_together(flight, 'slow', lambda: time.sleep(0.3) or 'done', 2, timeout=0.05)
+        self.assertEqual(results[0], 'done')
+        self.assertIsInstance(results[1], FuturesTimeoutError)
+
+    def test_errors_reach_waiters(self):
+        flight = SingleFlight()
+
+        def fail():
+            time.sleep(0.1)
+            raise APIError("API call failed: 503", 503)
+
+        results = self.run_together(flight, 'paper', fail, 3)
+        for result in results:
+            self.assertIsInstance(result, APIError)
+        self.assertFalse(flight.waiting('paper'))
+
+    def test_leader_stop_is_not_forwarded(self):
+        """A leader stopped by a rerun/stop raises alone; its waiters retry and one of them leads"""
+        class RerunSignal(BaseException):
+            pass
+
+        flight = SingleFlight()
+        runs = []
+
+        def generate():
+            runs.append(1)
+            time.sleep(0.1)
+            if len(runs) == 1:
+                raise RerunSignal()
+            return 'paper'
+
+        def call():
+            try:
+                return flight.do('paper', generate)
+            except RerunSignal as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            first = executor.submit(call)
+            while not flight.waiting('paper'):
+                time.sleep(0.001)
+            rest = [executor.submit(call) for _ in range(3)]
+            self.assertIsInstance(first.result(), RerunSignal)
+            self.assertEqual([future.result() for future in rest], ['paper'] * 3)
+        self.assertEqual(len(runs), 2)
+        self.assertFalse(flight.waiting('paper'))
+
+    def test_stream_is_shared(self):
+        """The leader sees items as they are produced; waiters get them all; an abandoned stream is retried"""
+        flight = SingleFlight()
+        runs = []
+
+        def produce():
+            runs.append(1)
+            for i in range(3):
+                time.sleep(0.05)
+                yield {'n': i}
+
+        leader = flight.stream('s', produce)
+        self.assertEqual(next(leader), {'n': 0})
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            waiters = [executor.submit(lambda: list(flight.stream('s', produce))) for _ in range(2)]
+            while flight.stats['shared'] < 2:
+                time.sleep(0.001)
+            self.assertEqual(list(leader), [{'n': 1}, {'n': 2}])
+            for waiter in waiters:
+                self.assertEqual(waiter.result(), [{'n': 0}, {'n': 1}, {'n': 2}])
+        self.assertEqual(len(runs), 1)
+
+        # A leader whose consumer stops early hands the request to its waiters
+        leader = flight.stream('s', produce)
+        next(leader)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            waiter = executor.submit(lambda: list(flight.stream('s', produce)))
+            while flight.stats['shared'] < 3:
+                time.sleep(0.001)
+            leader.close()
+            self.assertEqual(len(waiter.result(timeout=5)), 3)
+        self.assertEqual(len(runs), 3)
+        self.assertFalse(flight.waiting('s'))
+
+    def test_request_key_normalisation(self):
+        self.assertEqual(request_key('llm', 'Database  Systems', ['SQL'], {'b': 1, 'a': 2}),
+                         request_key('llm', 'database systems', ['sql'], {'a': 2, 'b': 1}))
+        self.assertNotEqual(request_key('llm', ['SQL', 'Joins']), request_key('llm', ['Joins', 'SQL']))
+        self.assertNotEqual(request_key('llm', 10), request_key('llm', 20))
+
+
+class TestMockOpenAIServer(unittest.TestCase):
+    """Test suite for the offline chat-completions stand-in and the load-test harness"""
+
+    def serve(self, **options):
+        server = MockOpenAIServer(**dict({'latency': 'fixed', 'latency_mean': 0.0, 'seed': 0}, **options)).start()
+        self.addCleanup(server.stop)
+        return server
+
+    def test_answers_in_the_app_format(self):
+        """Plain and streamed completions parse into the requested questions"""
+        server = self.serve(stream_chunk_chars=5)
+        client = ChatCompletionsClient(server.url)
+        questions = parse_questions(client.complete(DEFAULT_PAYLOAD, 'key'))
+        self.assertEqual(len(questions), 5)
+        self.assertEqual(questions[0]['type'], 'MCQ')
+        self.assertEqual([q['topic'] for q in questions[:3]], ['SQL', 'Normalization', 'Transactions'])
+        streamed = list(iter_streamed_questions(client.stream(DEFAULT_PAYLOAD, 'key')))
+        self.assertEqual(streamed, questions)
+        self.assertEqual(server.stats['streamed'], 1)
+
+    def test_latency_distributions(self):
+        """Sampled latencies follow the configured mean"""
+        for latency in ('fixed', 'uniform', 'normal', 'lognormal', 'exponential'):
+            server = MockOpenAIServer(latency=latency, latency_mean=0.2, latency_spread=0.05, seed=1)
+            samples = [server.sample_latency() for _ in range(2000)]
+            server.stop()
+            self.assertTrue(all(sample >= 0 for sample in samples))
+            self.assertAlmostEqual(sum(samples) / len(samples), 0.2, delta=0.02, msg=latency)
+        with self.assertRaises(ValueError):
+            MockOpenAIServer(latency='bimodal')
+
+    def test_injected_errors_are_retried(self):
+        """Injected 5xx responses reach the client, which retries them"""
+        server = self.serve(error_rate=0.3)
+        client = ChatCompletionsClient(server.url, sleep=lambda seconds: None, max_retries=5)
+        result = load_test(client, num_requests=40, concurrency=4)
+        self.assertEqual(result['succeeded'], 40)
+        self.assertGreater(server.stats['injected_errors'], 0)
+        self.assertEqual(result['client']['retries'], server.stats['injected_errors'])
+
+    def test_rate_limit(self):
+        """Requests beyond the burst get 429 with a Retry-After the client waits out"""
+        server = self.serve(rate_limit=20, burst=2)
+        impatient = load_test(ChatCompletionsClient(server.url, max_retries=0), num_requests=6, concurrency=6)
+        self.assertEqual(impatient['failed'], 4)
+        self.assertEqual(impatient['errors'], {'APIError 429': 4})
+        patient = load_test(ChatCompletionsClient(server.url, max_retries=10), num_requests=6, concurrency=6)
+        self.assertEqual(patient['succeeded'], 6)
+        self.assertGreater(patient['client']['retries'], 0)
+
+    def test_hung_requests_hit_the_read_timeout(self):
+        """A hung upstream is cut off by the client's read timeout"""
+        server = self.serve(hang_rate=1.0, hang_seconds=2.0)
+        client = ChatCompletionsClient(server.url, read_timeout=0.2, max_retries=0)
+        result = load_test(client, num_requests=2, concurrency=2)
+        self.assertEqual(result['errors'], {'APIError': 2})
+        self.assertLess(result['latency_p99'], 1.0)
+
+    def test_load_test_concurrency(self):
+        """The harness keeps concurrency calls in flight and reports latency percentiles"""
+        server = self.serve(latency_mean=0.1)
+        result = load_test(ChatCompletionsClient(server.url), num_requests=16, concurrency=8)
+        self.assertEqual(server.stats['peak_concurrency'], 8)
+        self.assertLess(result['elapsed'], 16 * 0.1)
+        self.assertGreaterEqual(result['latency_p50'], 0.1)
+        self.assertLessEqual(result['latency_p50'], result['latency_p95'])
+
+
+class TestHedgedPaper(unittest.TestCase):
+    """Test suite for the instant template paper upgraded by the LLM in the background"""
+
+    def setUp(self):
+        self.template = [{'id': i + 1, 'type': qtype, 'marks': marks, 'question': f'Template {i + 1}'}
+                         for i, (qtype, marks) in enumerate([('MCQ', 1), ('Short Answer', 5), ('MCQ', 1)])]
+
+    def llm(self, questions, delay=0.0, fail_after=None):
+        def generate():
+            for i, question in enumerate(questions):
+                if fail_after is not None and i == fail_after:
+                    raise APIError("API call failed: 503", 503)
+                time.sleep(delay)
+                yield question
+        return generate
+
+    def test_template_is_available_at_once(self):
+        """The template paper is served before the LLM answers"""
+        start = time.perf_counter()
+        paper = HedgedPaper(self.template, self.llm(QUESTIONS, delay=0.5), latency_budget=5)
+        self.assertLess(time.perf_counter() - start, 0.1)
+        self.assertEqual(paper.current(), self.template)
+        self.assertFalse(paper.final)
+        self.assertEqual(paper.source, 'template')
+
+    def test_llm_questions_replace_template_by_type(self):
+        """Each LLM question takes a slot of its own type and keeps the slot's id and marks"""
+        paper = HedgedPaper(self.template, self.llm(QUESTIONS), latency_budget=5)
+        questions = paper.result()
+        self.assertEqual(paper.source, 'llm')
+        self.assertEqual([q['question'] for q in questions],
+                         [QUESTIONS[0]['question'], QUESTIONS[1]['question'], QUESTIONS[2]['question']])
+        self.assertEqual([q['id'] for q in questions], [1, 2, 3])
+        self.assertEqual(questions[1]['marks'], 5)
+        self.assertEqual(questions[2]['type'], 'Long Answer')
+        # No Long Answer in the template, so the MCQ slot's 1 mark is not carried over
+        self.assertNotIn('marks', questions[2])
+
+    def test_marks_follow_the_question_type(self):
+        """An LLM question placed in a slot of another type takes the marks of its own type"""
+        template = self.template + [{'id': 4, 'type': 'Long Answer', 'marks': 8, 'question': 'Template 4'}]
+        long_answers = [{'type': 'Long Answer', 'question': f'Discuss topic {i}.'} for i in range(3)]
+        questions = HedgedPaper(template, self.llm(long_answers), latency_budget=5).result()
+        upgraded = [q for q in questions if q['type'] == 'Long Answer']
+        self.assertEqual(len(upgraded), 3)
+        self.assertEqual([q['marks'] for q in upgraded], [8, 8, 8])
+        self.assertEqual(sorted(q['id'] for q in questions), [1, 2, 3, 4])
+        own_marks = dict(long_answers[0], marks=10)
+        self.assertEqual(HedgedPaper(template, self.llm([own_marks]), latency_budget=5).result()[3]['marks'], 10)
+
+    def test_budget_makes_the_paper_final(self):
+        """Questions arriving after the budget are dropped and result() does not wait for them"""
+        paper = HedgedPaper(self.template, self.llm(QUESTIONS, delay=0.3), latency_budget=0.45)
+        start = time.perf_counter()
+        questions = paper.result()
+        self.assertLess(time.perf_counter() - start, 0.6)
+        self.assertEqual(paper.source, 'mixed')
+        self.assertEqual(questions[0]['question'], QUESTIONS[0]['question'])
+        self.assertEqual(questions[1:], self.template[1:])
+        time.sleep(0.4)
+        self.assertEqual(paper.current(), questions)
+
+    def test_llm_failure_keeps_template(self):
+        """A failing LLM leaves the template questions it did not replace"""
+        paper = HedgedPaper(self.template, self.llm(QUESTIONS, fail_after=1), latency_budget=5)
+        questions = paper.result()
+        self.assertIsInstance(paper.error, APIError)
+        self.assertEqual(paper.upgraded, 1)
+        self.assertEqual(questions[1:], self.template[1:])
+
+    def test_wait_for_change(self):
+        """Waiters wake on each swap"""
+        paper = HedgedPaper(self.template, self.llm(QUESTIONS, delay=0.1), latency_budget=5)
+        versions = [0]
+        while not paper.final:
+            versions.append(paper.wait_for_change(versions[-1]))
+        self.assertEqual(sorted(set(versions)), [0, 1, 2, 3])
+
+    def test_identical_papers_share_one_llm_stream(self):
+        """Hedged papers for the same request coalesce their LLM streams; the leader still streams"""
+        flight = SingleFlight()
+        runs = []
+
+        def produce():
+            runs.append(1)
+            return self.llm(QUESTIONS, delay=0.1)()
+
+        llm = lambda: flight.stream('paper', produce, timeout=5)
+        first = HedgedPaper(self.template, llm, latency_budget=5)
+        while not flight.waiting('paper'):
+            time.sleep(0.001)
+        second = HedgedPaper(self.template, llm, latency_budget=5)
+        self.assertEqual(first.wait_for_change(0), 1)
+        self.assertEqual(second.upgraded, 0)
+        self.assertEqual(second.result(), first.result())
+        self.assertEqual(first.source, 'llm')
+        self.assertEqual(len(runs), 1)
+        self.assertEqual(flight.stats, {'calls': 1, 'shared': 1})
+
+    def test_against_mock_server(self):
+        """A fast endpoint upgrades the paper; a hung one leaves the template final at the budget"""
+        server = MockOpenAIServer(latency='fixed', latency_mean=0.05, seed=0).start()
+        self.addCleanup(server.stop)
+        client = ChatCompletionsClient(server.url, read_timeout=5, max_retries=0)
+        payload = {'messages': [{'role': 'system', 'content': 'Question types needed: MCQ, Short Answer'},
+                                {'role': 'user', 'content': 'Topics: SQL\nGenerate 3 questions.'}]}
+        llm = lambda: iter_streamed_questions(client.stream(payload, 'key'))
+        self.assertEqual(HedgedPaper(self.template, llm, latency_budget=5).result()[0]['topic'], 'SQL')
+
+        server.hang_rate = 1.0
+        start = time.perf_counter()
+        paper = HedgedPaper(self.template, llm, latency_budget=0.3)
+        self.assertEqual(paper.result(), self.template)
+        self.assertLess(time.perf_counter() - start, 1.0)
+
+
+class TestSharedModelRegistry(unittest.TestCase):
+    """Test suite for the process-wide lazy model registry"""
+
+    def test_concurrent_first_use_loads_once(self):
+        """Sessions arriving together share a single load"""
+        loads = []
+
+        def loader():
+            loads.append(1)
+            time.sleep(0.2)
+            return object()
+
+        key = ('test-model', str(time.time()))
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            models = list(executor.map(lambda _: load_shared(key, loader), range(8)))
+        self.assertEqual(len(loads), 1)
+        self.assertTrue(all(model is models[0] for model in models))
+        self.assertIs(load_shared(key, loader), models[0])
+        self.assertIn(':'.join(key), loaded_models())
+
+    def test_models_load_independently(self):
+        """A slow load does not hold up a different model"""
+        slow_key, fast_key = ('slow', str(time.time())), ('fast', str(time.time()))
+        threading.Thread(target=load_shared, args=(slow_key, lambda: time.sleep(0.5) or 'slow'), daemon=True).start()
+        time.sleep(0.05)
+        start = time.perf_counter()
+        self.assertEqual(load_shared(fast_key, lambda: 'fast'), 'fast')
+        self.assertLess(time.perf_counter() - start, 0.2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -6,6 +6,10 @@ import sys
 from unittest.mock import patch, MagicMock
 import json
 
+# Keep LLM responses and topics cached by the tests out of the real caches
+os.environ['LLM_CACHE_PATH'] = os.path.join(tempfile.mkdtemp(), 'llm_cache.db')
+os.environ['TOPIC_CACHE_PATH'] = os.path.join(tempfile.mkdtemp(), 'topic_cache.db')
+
 # Patch Streamlit secrets before importing the app
 with patch('streamlit.secrets', new_callable=MagicMock) as mock_secrets:
     mock_secrets.get.return_value = "test_api_key"
@@ -134,7 +138,7 @@ class TestQuestVibeSystem(unittest.TestCase):
             chatgpt_no_key = QuestVibeChatGPT()
             self.assertIsNotNone(chatgpt_no_key.api_key)
     
-    @patch('requests.post')
+    @patch('requests.Session.post')
     def test_chatgpt_api_call(self, mock_post):
         """Test ChatGPT API call functionality"""
         # Mock successful API response
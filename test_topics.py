@@ -0,0 +1,270 @@
+import unittest
+import os
+import sys
+import zlib
+import time
+import tempfile
+import multiprocessing
+
+import numpy as np
+import spacy
+from spacy.language import Language
+from keybert import KeyBERT
+from keybert.backend import BaseEmbedder
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from src.syllabus_nlp import (DEFAULT_NLP_PROCESSES, embed_syllabus, extract_syllabus_topics, noun_phrases, pipe_for_noun_chunks,
+                              select_topics, split_units)
+from src.topic_cache import TopicCache, cached_syllabus_topics, content_key
+
+
+SYLLABUS = """UNIT 1: Data Models
+Relational model and entity relationship diagrams. Relational algebra.
+
+UNIT 2: Transactions
+Concurrency control and crash recovery. Relational model revisited.
+
+Unit III - Storage
+Hash indexes and tree indexes."""
+
+NOUNS = {'model', 'diagrams', 'algebra', 'control', 'recovery', 'indexes', 'transactions', 'storage', 'models'}
+ADJECTIVES = {'relational', 'entity', 'relationship', 'concurrency', 'crash', 'hash', 'tree', 'data'}
+component_calls = []
+
+
+@Language.component('toy_parser')
+def toy_parser(doc):
+    """Tags nouns and their adjective/compound modifiers so noun_chunks works without a trained model"""
+    component_calls.append('parser')
+    for token in doc:
+        word = token.lower_
+        if word in NOUNS:
+            token.pos_, token.dep_ = 'NOUN', 'ROOT'
+        elif word in ADJECTIVES and token.i + 1 < len(doc):
+            token.pos_, token.dep_ = 'ADJ', 'amod'
+            token.head = doc[token.i + 1]
+        else:
+            token.pos_, token.dep_ = 'X', 'dep'
+    return doc
+
+
+@Language.component('toy_ner')
+def toy_ner(doc):
+    component_calls.append('ner')
+    return doc
+
+
+class HashingEmbedder(BaseEmbedder):
+    """Deterministic bag-of-words embeddings that record every call"""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    def embed(self, documents, verbose=False):
+        self.calls.append(list(documents))
+        vectors = np.zeros((len(documents), 64))
+        for row, document in enumerate(documents):
+            for word in document.lower().split():
+                vectors[row, zlib.crc32(word.strip('.,:').encode()) % 64] += 1
+        return vectors
+
+
+def build_nlp():
+    nlp = spacy.blank('en')
+    nlp.add_pipe('toy_parser', name='parser')
+    nlp.add_pipe('toy_ner', name='ner')
+    return nlp
+
+
+class TestSyllabusNLP(unittest.TestCase):
+    """Test suite for batched, parser-only syllabus noun chunking"""
+
+    def setUp(self):
+        component_calls.clear()
+        self.nlp = build_nlp()
+
+    def test_split_units(self):
+        """Syllabi are cut at unit headings and long units at line breaks"""
+        units = split_units(SYLLABUS)
+        self.assertEqual(len(units), 3)
+        self.assertTrue(units[2].startswith('Unit III'))
+        long_unit = 'UNIT 1\n' + 'line of text\n' * 50
+        chunks = split_units(long_unit, max_chars=100)
+        self.assertTrue(all(len(chunk) <= 100 for chunk in chunks))
+        self.assertEqual(''.join(chunks).replace('\n', ''), long_unit.replace('\n', ''))
+        self.assertEqual(split_units('no headings here'), ['no headings here'])
+        self.assertEqual(split_units('  \n '), [])
+
+    def test_only_noun_chunk_components_run(self):
+        """NER is skipped while chunking and left enabled on the shared pipeline"""
+        docs = list(pipe_for_noun_chunks(self.nlp, split_units(SYLLABUS)))
+        self.assertEqual(len(docs), 3)
+        self.assertEqual(component_calls, ['parser'] * 3)
+        self.assertEqual(self.nlp.pipe_names, ['parser', 'ner'])
+        self.nlp('Relational model')
+        self.assertIn('ner', component_calls)
+
+    def test_noun_phrases(self):
+        """Distinct noun chunks in order of first appearance"""
+        phrases = noun_phrases(pipe_for_noun_chunks(self.nlp, split_units(SYLLABUS)))
+        self.assertEqual(phrases[:3], ['Data Models', 'Relational model', 'entity relationship diagrams'])
+        self.assertEqual(phrases.count('Relational model'), 1)
+        self.assertIn('Hash indexes', phrases)
+        self.assertEqual(noun_phrases(pipe_for_noun_chunks(self.nlp, [SYLLABUS]), max_words=2),
+                         [p for p in phrases if len(p.split()) < 2])
+
+
+class TestTopicExtraction(unittest.TestCase):
+    """Test suite for KeyBERT + spaCy topic extraction with shared embeddings"""
+
+    def setUp(self):
+        self.embedder = HashingEmbedder()
+        self.kw_model = KeyBERT(model=self.embedder)
+        self.nlp = build_nlp()
+
+    def test_embeds_document_once(self):
+        """The syllabus is embedded once; candidates and extra noun phrases in one more call"""
+        topics = extract_syllabus_topics(SYLLABUS, self.kw_model, self.nlp, max_keywords=5)
+        self.assertEqual(len(self.embedder.calls), 2)
+        self.assertEqual(self.embedder.calls[0], [SYLLABUS])
+        candidates = self.embedder.calls[1]
+        self.assertEqual(len(candidates), len(set(candidates)))
+        # Noun phrases KeyBERT already has as n-grams are not embedded again
+        self.assertIn('relational model', candidates)
+        self.assertNotIn('Relational model', candidates)
+        self.assertIn('Data Models', topics)
+        self.assertEqual(len(topics), len({topic.lower() for topic in topics}))
+
+    def test_reselect_without_embedding(self):
+        """Changing max_keywords reuses the embeddings"""
+        embeddings = embed_syllabus(SYLLABUS, self.kw_model, self.nlp)
+        calls = len(self.embedder.calls)
+        few = select_topics(embeddings, max_keywords=2)
+        many = select_topics(embeddings, max_keywords=10)
+        self.assertEqual(len(self.embedder.calls), calls)
+        self.assertGreaterEqual(len(many), len(few))
+
+    def test_near_duplicates_removed(self):
+        """A lower dedup threshold keeps fewer, more distinct topics"""
+        embeddings = embed_syllabus(SYLLABUS, self.kw_model, self.nlp)
+        strict = select_topics(embeddings, dedup_threshold=0.5)
+        loose = select_topics(embeddings, dedup_threshold=1.01)
+        self.assertLess(len(strict), len(loose))
+
+    def test_empty_syllabus(self):
+        self.assertEqual(extract_syllabus_topics('', self.kw_model, self.nlp), [])
+        self.assertEqual(extract_syllabus_topics('the and of', self.kw_model, self.nlp), [])
+
+
+def store_topics(path, key, topics):
+    """Runs in a separate process"""
+    TopicCache(path).put_topics(key, topics)
+
+
+class TestTopicCache(unittest.TestCase):
+    """Test suite for the cross-process topic and embedding cache"""
+
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), 'topic_cache.db')
+        self.cache = TopicCache(self.path)
+        self.embedder = HashingEmbedder()
+        self.kw_model = KeyBERT(model=self.embedder)
+        self.loads = []
+
+    def load_models(self):
+        self.loads.append(1)
+        return self.kw_model, build_nlp()
+
+    def test_key(self):
+        """Keys follow the text, extractor and settings; line endings do not matter"""
+        key = content_key(SYLLABUS, 'keybert', {'max_keywords': 20})
+        self.assertEqual(key, content_key(SYLLABUS.replace('\n', '\r\n'), 'keybert', {'max_keywords': 20}))
+        self.assertNotEqual(key, content_key(SYLLABUS, 'keybert', {'max_keywords': 10}))
+        self.assertNotEqual(key, content_key(SYLLABUS, 'patterns', {'max_keywords': 20}))
+        self.assertNotEqual(key, content_key(SYLLABUS + ' ', 'keybert', {'max_keywords': 20}))
+
+    def test_embeddings_round_trip(self):
+        embeddings = embed_syllabus(SYLLABUS, self.kw_model, build_nlp())
+        self.cache.put_embeddings('k', embeddings)
+        restored = self.cache.get_embeddings('k')
+        self.assertEqual(restored['phrases'], embeddings['phrases'])
+        self.assertEqual(restored['words'], embeddings['words'])
+        for name in ('doc_embedding', 'word_embeddings', 'phrase_embeddings'):
+            np.testing.assert_array_equal(restored[name], embeddings[name])
+        self.assertEqual(select_topics(restored), select_topics(embeddings))
+        self.assertIsNone(self.cache.get_embeddings('missing'))
+
+    def test_shared_across_processes(self):
+        """Topics stored by another worker process are served here"""
+        process = multiprocessing.Process(target=store_topics, args=(self.path, 'k', ['SQL', 'Joins']))
+        process.start()
+        process.join(30)
+        self.assertEqual(process.exitcode, 0)
+        self.assertEqual(self.cache.get_topics('k'), ['SQL', 'Joins'])
+
+    def test_least_recently_used_eviction(self):
+        cache = TopicCache(self.path, max_entries=2)
+        cache.put_topics('a', ['A'])
+        time.sleep(0.01)
+        cache.put_topics('b', ['B'])
+        time.sleep(0.01)
+        cache.get_topics('a')
+        cache.put_topics('c', ['C'])
+        self.assertIsNone(cache.get_topics('b'))
+        self.assertEqual((cache.get_topics('a'), cache.get_topics('c')), (['A'], ['C']))
+        self.assertEqual(len(cache), 2)
+
+    def test_expiry(self):
+        cache = TopicCache(self.path, ttl=0.05)
+        cache.put_topics('a', ['A'])
+        time.sleep(0.1)
+        self.assertIsNone(cache.get_topics('a'))
+        cache.put_topics('b', ['B'])
+        time.sleep(0.1)
+        self.assertEqual(cache.purge_expired(), 1)
+
+    def test_get_or_extract(self):
+        calls = []
+        extract = lambda: calls.append(1) or ['Normalization']
+        for _ in range(2):
+            self.assertEqual(self.cache.get_or_extract(SYLLABUS, 'patterns', None, extract), ['Normalization'])
+        self.assertEqual(len(calls), 1)
+
+    def test_cached_syllabus_topics(self):
+        """Repeats skip the models; a new max_keywords reuses the embeddings"""
+        topics = cached_syllabus_topics(SYLLABUS, self.load_models, 5, ('mini', 'sm'), cache=self.cache)
+        self.assertEqual(topics, extract_syllabus_topics(SYLLABUS, self.kw_model, build_nlp(), max_keywords=5))
+        embed_calls = len(self.embedder.calls)
+
+        self.assertEqual(cached_syllabus_topics(SYLLABUS, self.load_models, 5, ('mini', 'sm'), cache=self.cache),
+                         topics)
+        more = cached_syllabus_topics(SYLLABUS, self.load_models, 10, ('mini', 'sm'), cache=self.cache)
+        self.assertGreaterEqual(len(more), len(topics))
+        self.assertEqual(len(self.loads), 1)
+        self.assertEqual(len(self.embedder.calls), embed_calls)
+
+        # A different model means different embeddings
+        cached_syllabus_topics(SYLLABUS, self.load_models, 5, ('mpnet', 'sm'), cache=self.cache)
+        self.assertEqual(len(self.loads), 2)
+
+    def test_processes_reach_pipe(self):
+        """SYLLABUS_NLP_PROCESSES (or an explicit n_process) is what nlp.pipe runs with"""
+        nlp = build_nlp()
+        pipe, processes = nlp.pipe, []
+
+        def recording_pipe(texts, **kwargs):
+            processes.append(kwargs['n_process'])
+            return pipe(texts, **dict(kwargs, n_process=1))
+        nlp.pipe = recording_pipe
+
+        load = lambda: (self.kw_model, nlp)
+        cached_syllabus_topics(SYLLABUS, load, 5, ('mini', 'sm'), cache=self.cache)
+        cached_syllabus_topics(SYLLABUS, load, 5, ('mpnet', 'sm'), cache=self.cache, n_process=2)
+        self.assertEqual(processes, [DEFAULT_NLP_PROCESSES, 2])
+
+
+if __name__ == '__main__':
+    unittest.main()
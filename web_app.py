@@ -4,7 +4,7 @@ print("PYTHON PATH:", os.environ['PATH'])
 import streamlit as st
 
 from src.ingest import DocumentIngestor
-from src.generate import generate_questions, generate_model_answer, assign_marks, format_export_text, format_export_docx
+from src.generate import generate_questions, get_model_answer, assign_marks, format_export_text, format_export_docx
 from src.analyze import compute_analytics, compute_topic_frequency
 from src.classify import tag_questions_by_topic
 
@@ -63,15 +63,16 @@ if mode == 'Syllabus Mode':
                 marks = assign_marks(q)
                 total_assigned_marks += marks
                 st.markdown(f'**Q{idx} ({q["type"]}, {q["bloom_level"]}, {q["topic"]}, {marks} marks):** {q["question"]}')
-                model_answer = generate_model_answer(q)
+                model_answer = get_model_answer(q)
                 st.markdown(f'*Model Answer:* {model_answer}')
             st.info(f'Total Assigned Marks: {total_assigned_marks}')
             # Export options
             st.subheader('Export')
-            export_text = format_export_text(questions)
+            include_answers = st.checkbox('Include model answers in exports', value=True)
+            export_text = format_export_text(questions, include_answers)
             st.download_button('Download as Text', export_text, file_name='question_paper.txt')
             docx_filename = 'question_paper.docx'
-            format_export_docx(questions, docx_filename)
+            format_export_docx(questions, docx_filename, include_answers)
             with open(docx_filename, 'rb') as f:
                 st.download_button('Download as Word (.docx)', f, file_name=docx_filename)
             # Analytics